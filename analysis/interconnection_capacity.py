@@ -27,7 +27,8 @@ def interconnection_capacity(output_directory):
     # Read the interconnection capacity
     all_data = pd.DataFrame()
     for interconnection_type in ["hvac", "hvdc"]:
-        data = utils.read_csv(output_directory / "capacity" / "interconnections" / f"{interconnection_type}.csv")
+        filepath = utils.get_result_filepath(output_directory / "capacity" / "interconnections", interconnection_type)
+        data = utils.read_dataframe(filepath, index_col=[0, 1]).reset_index()
 
         if aggregrate_per_country:
             # Change the market nodes to countries
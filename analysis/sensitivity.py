@@ -1,3 +1,5 @@
+import re
+
 import numpy as np
 import pandas as pd
 import streamlit as st
@@ -42,6 +44,32 @@ def _retrieve_statistics(steps, method, output_directory, **kwargs):
     return data
 
 
+def _get_step_durations(output_directory, *, breakdown):
+    """
+    Return the wall time of a run per step or technology, or an empty Series if the steps were not measured
+    """
+    assert validate.is_directory_path(output_directory)
+    assert breakdown in ["step", "technology"]
+
+    steps_filepath = output_directory / "model" / "steps.csv"
+    if not steps_filepath.is_file():
+        return pd.Series(dtype="float64")
+
+    # Read the step labels as strings, so the numbered steps are not converted to integers
+    step_durations = utils.read_csv(steps_filepath, dtype={"step": str})
+    if breakdown == "technology":
+        step_durations = step_durations.dropna(subset="technology")
+    return step_durations.groupby(breakdown).wall_time.sum()
+
+
+def _get_step_sort_key(step):
+    """
+    Return the key to sort the step labels in the order they are run (2, 2B, 3A, ..., 10, 11)
+    """
+    number, letter = re.match(r"(\d+)(\w*)", step).groups()
+    return int(number), letter
+
+
 def _plot(output_directory, sensitivity_config, sensitivity_plot, statistic_name, *, label=None, line_color=colors.primary()):
     """
     Analyze the sensitivity
@@ -187,12 +215,21 @@ def _plot(output_directory, sensitivity_config, sensitivity_plot, statistic_name
         sensitivity_plot.axs.set_xlim([round(data.index.min(), 2), round(data.index.max(), 2)])
         sensitivity_plot.axs.set_ylim([0, sensitivity_plot.axs.set_ylim()[1]])
     if statistic_name == "optimization_duration":
-        data = steps.apply(lambda step: utils.read_csv(output_directory / step / "model" / "duration.csv", index_col=0).sum(axis=1)) / 3600
+        breakdown_options = {"phase": "Phase", "step": "Step", "technology": "Technology"}
+        breakdown = st.sidebar.selectbox("Breakdown", breakdown_options.keys(), format_func=lambda key: breakdown_options[key], help="The steps and technologies are only measured for runs that are not decomposed")
+        if breakdown == "phase":
+            data = steps.apply(lambda step: utils.read_csv(output_directory / step / "model" / "duration.csv", index_col=0).sum(axis=1).pipe(lambda duration: duration[~duration.index.str.startswith(("cache_hit", "capacity_drift"))])) / 3600
+        else:
+            data = steps.apply(lambda step: _get_step_durations(output_directory / step, breakdown=breakdown)).fillna(0) / 3600
+            data = data[sorted(data.columns, key=_get_step_sort_key)] if breakdown == "step" else data
+        # Pick the colors from a colormap, since there can be more steps than shades of a single color
+        colormap = colors.colormap("blue")
         cumulative_data = 0
         for index, column_name in enumerate(data.columns):
             cumulative_data += data[column_name]
-            line_color = colors.get("blue", (index + 1) * 300)
-            sensitivity_plot.axs.fill_between(data[column_name].index, cumulative_data - data[column_name], cumulative_data, label=utils.format_str(column_name), color=line_color)
+            line_color = colormap((index + 1) / len(data.columns))
+            label = f"Step {column_name}" if breakdown == "step" else utils.format_str(column_name)
+            sensitivity_plot.axs.fill_between(data[column_name].index, cumulative_data - data[column_name], cumulative_data, label=label, color=line_color)
         sensitivity_plot.axs.set_ylabel("Duration (H)")
         sensitivity_plot.axs.set_xlim([data.index.min(), data.index.max()])
         sensitivity_plot.axs.set_ylim([0, sensitivity_plot.axs.set_ylim()[1]])
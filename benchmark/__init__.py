@@ -0,0 +1,3 @@
+from .compare_benchmarks import compare_benchmarks
+from .create_scenario import create_scenario
+from .run_benchmark import run_benchmark
@@ -0,0 +1,38 @@
+import argparse
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import optimization
+import utils
+from .compare_benchmarks import compare_benchmarks
+from .run_benchmark import run_benchmark
+
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Measure the duration of each phase of a run on a generated scenario for a growing number of countries and climate years")
+    parser.add_argument("--country-counts", type=int, nargs="+", default=[1, 2, 4, 8], help="Numbers of countries that are benchmarked")
+    parser.add_argument("--climate-year-counts", type=int, nargs="+", default=[1, 2], help="Numbers of climate years that are benchmarked")
+    parser.add_argument("--builders", choices=["loop", "vectorized"], nargs="+", default=["loop"], help="Model builders that are benchmarked")
+    parser.add_argument("--resolution", default="24H", help="Resolution of the benchmarked runs")
+    parser.add_argument("--solver", choices=["gurobi", "highs"], default="gurobi", help="Solver of the benchmarked runs")
+    parser.add_argument("--thread-count", type=int, default=max(os.cpu_count() // 2, 1), help="Number of threads used by the solver")
+    parser.add_argument("--repeat-count", type=int, default=1, help="Number of times each benchmark is repeated")
+    parser.add_argument("--baseline", help="Path of the results of an earlier benchmark to compare with")
+    args = parser.parse_args()
+
+    # Run the benchmark and store the results
+    results = run_benchmark(country_counts=args.country_counts, climate_year_counts=args.climate_year_counts, builders=args.builders, resolution=args.resolution, solver=args.solver, thread_count=args.thread_count, repeat_count=args.repeat_count, status=optimization.ConsoleStatus())
+    results_directory = utils.path("benchmark", "results")
+    results_directory.mkdir(parents=True, exist_ok=True)
+    results_filepath = results_directory / f"{datetime.now():%Y-%m-%d_%H-%M-%S}.csv"
+    results.to_csv(results_filepath, index=False)
+    print(f"The results are stored in {results_filepath}")
+
+    # Show the comparison with the baseline or the mean value of each measurement
+    if args.baseline:
+        comparison = compare_benchmarks(pd.read_csv(args.baseline), results)
+        print(comparison.to_string(index=False))
+    else:
+        print(results.pivot_table(index=["phase", "step"], columns=["builder", "country_count", "climate_year_count"], values="value").to_string())
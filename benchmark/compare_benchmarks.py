@@ -0,0 +1,20 @@
+import pandas as pd
+
+# The columns that identify a measurement in both benchmarks
+key_columns = ["country_count", "market_node_count", "climate_year_count", "resolution", "solver", "builder", "phase", "step"]
+
+
+def compare_benchmarks(baseline, benchmark):
+    """
+    Return the mean value of each measurement in the baseline and the benchmark, and the relative change compared to the baseline
+    """
+    # The benchmarks without a builder column only measured the vectorized builder
+    if "builder" not in baseline.columns:
+        baseline = baseline.assign(builder="vectorized")
+
+    # Average the repetitions and merge the benchmarks on the measurements they have in common
+    baseline_values = baseline.groupby(key_columns).value.mean().rename("baseline")
+    benchmark_values = benchmark.groupby(key_columns).value.mean().rename("benchmark")
+    comparison = pd.concat([baseline_values, benchmark_values], axis=1, join="inner")
+    comparison["relative_change"] = comparison.benchmark / comparison.baseline - 1
+    return comparison.reset_index()
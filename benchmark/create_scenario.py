@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+import utils
+import validate
+
+# The first climate year of the generated scenario
+first_climate_year = 1982
+
+
+def _create_demand(market_nodes, *, index, rng):
+    """
+    Return the hourly demand with a daily and seasonal profile for each market node
+    """
+    hour = index.hour.to_numpy()
+    day_of_year = index.dayofyear.to_numpy()
+    demand = {}
+    for market_node in market_nodes:
+        base_demand = rng.uniform(2000, 20000)
+        demand[market_node] = base_demand * (1 + 0.2 * np.sin((hour - 6) / 24 * 2 * np.pi) + 0.15 * np.cos(day_of_year / 365 * 2 * np.pi) + 0.05 * rng.random(len(index)))
+    return pd.DataFrame(demand, index=index)
+
+
+def _create_ires_capacity_factors(market_node, *, index, rng, ires_node_count):
+    """
+    Return the hourly capacity factors of each IRES node in a market node
+    """
+    hour = index.hour.to_numpy()
+    day_of_year = index.dayofyear.to_numpy()
+    capacity_factors = {}
+    for ires_node_number in range(ires_node_count):
+        ires_node = f"{market_node}{ires_node_number}"
+        capacity_factors[f"pv_{ires_node}_cf"] = np.clip(np.sin((hour - 6) / 12 * np.pi) * (0.7 - 0.3 * np.cos(day_of_year / 365 * 2 * np.pi)), 0, None) * rng.uniform(0.6, 1, len(index))
+        capacity_factors[f"onshore_{ires_node}_cf"] = np.clip(0.3 + 0.15 * np.cos(day_of_year / 365 * 2 * np.pi) + 0.2 * rng.standard_normal(len(index)), 0, 1)
+        capacity_factors[f"offshore_{ires_node}_cf"] = np.clip(0.45 + 0.15 * np.cos(day_of_year / 365 * 2 * np.pi) + 0.2 * rng.standard_normal(len(index)), 0, 1)
+    return pd.DataFrame(capacity_factors, index=index)
+
+
+def _create_hydropower_data(*, index, rng, interval_hours):
+    """
+    Return the inflow and generation and reservoir limits of a hydropower plant
+    """
+    hydropower_data = pd.DataFrame(index=index)
+    hydropower_data["inflow_MWh"] = rng.uniform(0.2, 1, len(index)) * 100 * interval_hours
+    hydropower_data["min_generation_MW"] = np.nan
+    hydropower_data["max_generation_MW"] = np.nan
+    hydropower_data["min_pumping_MW"] = np.nan
+    hydropower_data["max_pumping_MW"] = np.nan
+    hydropower_data["reservoir_soc"] = np.nan
+    hydropower_data["min_reservoir_soc"] = np.where(rng.random(len(index)) > 0.5, 0.1, np.nan)
+    hydropower_data["max_reservoir_soc"] = np.nan
+    return hydropower_data
+
+
+def create_scenario(country_codes, *, climate_year_count, scenario="Benchmark", seed=0):
+    """
+    Create a scenario with generated demand, IRES, hydropower, and interconnection data for the countries, so the model can be built and solved without the ERAA data
+    """
+    assert validate.is_country_code_list(country_codes, code_type="nuts2")
+    assert validate.is_integer(climate_year_count, min_value=1)
+    assert validate.is_string(scenario)
+    assert validate.is_integer(seed)
+
+    # Use a fixed seed so every benchmark run solves the same scenario
+    rng = np.random.default_rng(seed)
+    market_nodes = utils.get_market_nodes_for_countries(country_codes)
+    scenario_directory = utils.path("input", "scenarios", scenario)
+    last_climate_year = first_climate_year + climate_year_count - 1
+    hourly_index = pd.date_range(f"{first_climate_year}-01-01", f"{last_climate_year}-12-31 23:00", freq="1H", tz="UTC")
+
+    # Create the demand file
+    scenario_directory.mkdir(parents=True, exist_ok=True)
+    _create_demand(market_nodes, index=hourly_index, rng=rng).to_csv(scenario_directory / "demand.csv")
+
+    # Create an IRES file for each market node
+    (scenario_directory / "ires").mkdir(exist_ok=True)
+    for market_node in market_nodes:
+        _create_ires_capacity_factors(market_node, index=hourly_index, rng=rng, ires_node_count=2).to_csv(scenario_directory / "ires" / f"{market_node}.csv")
+
+    # Create the hydropower files, run-of-river has daily data and the other technologies weekly data (like the ERAA data)
+    for hydropower_technology, frequency in [("run_of_river", "D"), ("reservoir", "W-MON"), ("pumped_storage_open", "W-MON"), ("pumped_storage_closed", "W-MON")]:
+        hydropower_directory = scenario_directory / "hydropower" / hydropower_technology
+        hydropower_directory.mkdir(parents=True, exist_ok=True)
+        hydropower_index = pd.date_range(f"{first_climate_year}-01-01", f"{last_climate_year}-12-31", freq=frequency, tz="UTC")
+        interval_hours = 24 if frequency == "D" else 168
+
+        # Only give every other market node hydropower capacity
+        hydropower_capacity = pd.DataFrame(0.0, index=market_nodes, columns=["turbine", "pump", "reservoir"])
+        for market_node in market_nodes[::2]:
+            has_pump = hydropower_technology.startswith("pumped_storage")
+            has_reservoir = hydropower_technology != "run_of_river"
+            hydropower_capacity.loc[market_node] = [rng.uniform(200, 2000), rng.uniform(200, 1000) if has_pump else 0, rng.uniform(2e4, 2e5) if has_reservoir else 0]
+            _create_hydropower_data(index=hydropower_index, rng=rng, interval_hours=interval_hours).to_csv(hydropower_directory / f"{market_node}.csv")
+        hydropower_capacity.to_csv(hydropower_directory / "capacity.csv")
+
+    # Create the interconnection files for a single model year, HVAC connects consecutive market nodes and HVDC every other market node
+    (scenario_directory / "interconnections").mkdir(exist_ok=True)
+    interconnection_index = pd.date_range("2025-01-01", "2025-12-31 23:00", freq="1H", tz="UTC")
+    for connection_type, step in [("hvac", 1), ("hvdc", 2)]:
+        interconnections = [(from_node, to_node) for from_node, to_node in zip(market_nodes, market_nodes[step:])]
+        interconnections += [(to_node, from_node) for from_node, to_node in interconnections]
+        columns = pd.MultiIndex.from_tuples(interconnections, names=["from", "to"])
+        export_limits = np.outer(np.where(rng.random(len(interconnection_index)) > 0.05, 1, 0.5), rng.uniform(500, 3000, len(interconnections)))
+        pd.DataFrame(export_limits, index=interconnection_index, columns=columns).to_csv(scenario_directory / "interconnections" / f"{connection_type}.csv")
+
+    return scenario
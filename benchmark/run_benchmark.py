@@ -0,0 +1,153 @@
+import os
+import pathlib
+import tempfile
+import time
+
+import pandas as pd
+
+import optimization
+import utils
+import validate
+from .create_scenario import create_scenario, first_climate_year
+from .step_status import StepStatus
+
+# The countries that are added to the benchmark in this order, the first countries have a single market node so the smallest benchmarks stay small
+country_codes = ["NL", "BE", "DE", "FR", "AT", "CH", "CZ", "PL", "DK", "SE", "NO", "IT"]
+
+
+def _measure(function):
+    """
+    Return the result of the function and its wall time in seconds
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def _create_config(country_codes, *, climate_year_count, scenario, resolution, solver, builder, thread_count):
+    """
+    Return the config of a benchmark run
+    """
+    return {
+        "name": "Benchmark",
+        "scenario": scenario,
+        "country_codes": country_codes,
+        "climate_years": {"start": first_climate_year, "end": first_climate_year + climate_year_count - 1},
+        "resolution": resolution,
+        "technologies": {"scenario": 0, "ires": ["pv", "onshore", "offshore"], "dispatchable": ["h2_ccgt", "nuclear"], "hydropower": ["run_of_river", "reservoir", "pumped_storage_open", "pumped_storage_closed"], "storage": ["lion"], "electrolysis": ["pem"]},
+        "nuclear_capacity_constraint": "capped",
+        "relative_hydrogen_demand": 0.1,
+        "extra_hydrogen_costs_per_kg": 0.0,
+        "voll": 10000,
+        "self_sufficiency": {"min_electricity": 0.8, "max_electricity": 1.5, "min_hydrogen": 0.8, "max_hydrogen": 1.5},
+        "interconnections": {"efficiency": {"hvac": 0.95, "hvdc": 0.95}, "relative_capacity": 1.0, "optimize_individual_interconnections": False},
+        "optimization": {"solver": solver, "method": 2, "max_barrier_iterations": 2000, "barrier_convergence_tolerance": 10**-6, "thread_count": thread_count, "vectorized_builder": builder == "vectorized", "reduce_model": True, "model_cache": False, "output_format": "csv", "store_model": False},
+        "upload_results": False,
+        "send_notification": False,
+    }
+
+
+def _measure_input(config):
+    """
+    Return the durations of reading and resampling the input files of the config, first from the source files and then from the disk cache
+    """
+    scenario_directory = utils.path("input", "scenarios", config["scenario"])
+    market_nodes = utils.get_market_nodes_for_countries(config["country_codes"])
+    filepaths = [scenario_directory / "demand.csv"] + [scenario_directory / "ires" / f"{market_node}.csv" for market_node in market_nodes]
+    filepaths += [filepath for hydropower_technology in config["technologies"]["hydropower"] for market_node in market_nodes if (filepath := scenario_directory / "hydropower" / hydropower_technology / f"{market_node}.csv").is_file()]
+
+    # Update the modification time of the input files, so they are not read from the disk cache the first time
+    for filepath in filepaths:
+        os.utime(filepath)
+
+    def read_input_files():
+        for filepath in filepaths:
+            utils.read_resampled_temporal_data(filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"], resolution=config["resolution"])
+
+    return pd.Series({"read_and_resample": _measure(read_input_files)[1], "read_from_cache": _measure(read_input_files)[1]})
+
+
+def _measure_run(config, *, output_directory):
+    """
+    Build and solve the model of the config and return the durations of each phase and the size of the model, or None if the model could not be solved
+    """
+    durations = {}
+    output_directory.mkdir()
+
+    # Build the model, the input files are already in the disk cache so only the construction of the model is measured
+    step_status = StepStatus()
+    model_handle, durations[("build", "total")] = _measure(lambda: optimization.build_model(config, status=step_status))
+    step_status.stop()
+    for step_name, step_duration in step_status.durations.items():
+        durations[("build", step_name)] = step_duration
+
+    # Store the size of the model
+    model = model_handle.model
+    model.update()
+    for attribute in ["NumVars", "NumConstrs", "NumNZs"]:
+        durations[("model_size", attribute)] = model.getAttr(attribute)
+
+    # Solve the model and store the results like a regular run
+    error_message = optimization.solve_model(model_handle, status=StepStatus(), output_directory=output_directory)
+    if error_message is not None:
+        return None
+    utils.write_yaml(output_directory / "config.yaml", config)
+    durations[("solve", "optimizing")] = model_handle.duration["optimizing"]
+    durations[("solve", "storing")] = model_handle.duration["storing"]
+
+    # Convert and store the results again to measure the conversion and writing separately
+    result_values, durations[("results", "convert_variables")] = _measure(lambda: optimization.get_result_values(model_handle, status=StepStatus()))
+    (output_directory / "store").mkdir()
+    durations[("results", "write_csv")] = _measure(lambda: optimization.store_result_values(result_values, status=StepStatus(), output_directory=output_directory / "store", output_format="csv"))[1]
+
+    # Read the results with the heavy readers of the analysis, without the results that are cached in memory by an earlier reader (only the data of the typical week and correlation pages is loaded, the pages themselves are not rendered)
+    readers = {
+        "get_temporal_results": lambda: utils.get_temporal_results(output_directory),
+        "firm_lcoe": lambda: utils.previous_run.firm_lcoe(output_directory),
+        "typical_week_data": lambda: utils.get_temporal_results(output_directory, group="all"),
+        "correlation_data": lambda: utils.get_temporal_results(output_directory, group="country"),
+    }
+    for reader_name, reader in readers.items():
+        utils.clear_cache()
+        durations[("analysis", reader_name)] = _measure(reader)[1]
+
+    return pd.Series(durations)
+
+
+def run_benchmark(*, country_counts, climate_year_counts, builders=("loop",), resolution="24H", solver="gurobi", thread_count=1, repeat_count=1, status=None):
+    """
+    Measure the duration of each phase of a run for each combination of the number of countries, climate years, and model builder, and return the durations in a long format DataFrame
+    """
+    assert validate.is_list_like(country_counts)
+    assert validate.is_list_like(climate_year_counts)
+    assert validate.is_list_like(builders) and all(builder in ["loop", "vectorized"] for builder in builders)
+    assert validate.is_resolution(resolution)
+    assert validate.is_integer(thread_count, min_value=1)
+    assert validate.is_integer(repeat_count, min_value=1)
+
+    # Create the scenario for the largest benchmark, the smaller benchmarks use the first countries and climate years
+    scenario = create_scenario(country_codes[: max(country_counts)], climate_year_count=max(climate_year_counts))
+
+    measurements = []
+    for country_count in country_counts:
+        for climate_year_count in climate_year_counts:
+            for builder in builders:
+                config = _create_config(country_codes[:country_count], climate_year_count=climate_year_count, scenario=scenario, resolution=resolution, solver=solver, builder=builder, thread_count=thread_count)
+                market_node_count = len(utils.get_market_nodes_for_countries(config["country_codes"]))
+
+                for repetition in range(repeat_count):
+                    if status is not None:
+                        status.update(f"Benchmarking {country_count} countries and {climate_year_count} climate years with the {builder} builder ({repetition + 1}/{repeat_count})")
+
+                    # Measure the phases in a temporary output directory, so the benchmark runs are not shown as previous runs
+                    utils.clear_cache()
+                    input_durations = _measure_input(config)
+                    with tempfile.TemporaryDirectory() as temporary_directory:
+                        run_durations = _measure_run(config, output_directory=pathlib.Path(temporary_directory) / "run")
+
+                    # Add the durations, a run that could not be solved is still stored with the durations of the input
+                    durations = pd.concat([pd.Series(input_durations.values, index=pd.MultiIndex.from_product([["input"], input_durations.index])), run_durations])
+                    for (phase, step), value in durations.items():
+                        measurements.append({"country_count": country_count, "market_node_count": market_node_count, "climate_year_count": climate_year_count, "resolution": resolution, "solver": solver, "builder": builder, "repetition": repetition, "phase": phase, "step": step, "value": value})
+
+    return pd.DataFrame(measurements)
@@ -0,0 +1,34 @@
+import time
+
+import pandas as pd
+
+
+class StepStatus:
+    """
+    Status that measures how long each status message is shown, so the duration of each step of the model is known without changing the model itself
+    """
+
+    # The solver log is only written to the log file of the run
+    is_interactive = False
+
+    def __init__(self):
+        self.durations = pd.Series(dtype="float64")
+        self.text = None
+        self.start = None
+
+    def update(self, text, *, status_type="info"):
+        self.stop()
+
+        # Remove the flag of the market node, so the durations of a step are added up over all market nodes
+        if not text[0].isascii():
+            text = text.split(" ", 1)[-1]
+        self.text = text
+        self.start = time.perf_counter()
+
+    def stop(self):
+        """
+        Add the duration of the current status message
+        """
+        if self.text is not None:
+            self.durations[self.text] = self.durations.get(self.text, 0) + time.perf_counter() - self.start
+            self.text = None
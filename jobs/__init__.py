@@ -0,0 +1,3 @@
+from .job_queue import JobQueue
+from .job_status import JobStatus
+from .run_worker import run_worker
@@ -0,0 +1,27 @@
+import argparse
+import os
+import pathlib
+import signal
+import sys
+
+import psutil
+
+from .run_worker import run_worker
+
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Run the optimization jobs that are submitted on the Optimization page")
+    parser.add_argument("--core-count", type=int, default=os.cpu_count(), help="Number of cores that are shared by the simultaneous jobs")
+    parser.add_argument("--memory", type=float, default=psutil.virtual_memory().total / 1024**3, help="Memory in GB that is shared by the simultaneous jobs")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Number of seconds between checks for new jobs")
+    parser.add_argument("--log-file", type=pathlib.Path, help="Append the progress to this file instead of printing it")
+    args = parser.parse_args()
+
+    # Stop the worker like an interrupt if it's terminated, so its running jobs are stopped as well
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(0))
+
+    # Run the jobs until the worker is stopped
+    try:
+        run_worker(core_count=args.core_count, memory=args.memory, poll_interval=args.poll_interval, log_filepath=args.log_file)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,214 @@
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import optimization
+import utils
+import validate
+
+
+class JobQueue:
+    """
+    Persistent queue of runs and sensitivity analysis steps in a SQLite database, so the jobs survive the Streamlit session and are shared by all users and workers
+    """
+
+    def __init__(self, database_filepath=None):
+        if database_filepath is None:
+            utils.path("output").mkdir(exist_ok=True)
+            database_filepath = utils.path("output", "jobs.sqlite")
+        self.database_filepath = database_filepath
+
+        # Create the tables if the queue is used for the first time
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, step_key TEXT, parent_id INTEGER, kind TEXT NOT NULL, config TEXT NOT NULL, sensitivity_config TEXT, core_count INTEGER NOT NULL, memory REAL NOT NULL, state TEXT NOT NULL, progress TEXT, error_message TEXT, worker TEXT, submitted_at TEXT NOT NULL, started_at TEXT, finished_at TEXT)")
+            connection.execute("CREATE TABLE IF NOT EXISTS workers (name TEXT PRIMARY KEY, core_count INTEGER NOT NULL, memory REAL NOT NULL, heartbeat_at TEXT NOT NULL)")
+
+    def _connect(self):
+        """
+        Return a connection that is closed after use and commits each statement directly, transactions are started explicitly
+        """
+        connection = sqlite3.connect(self.database_filepath, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return closing(connection)
+
+    @staticmethod
+    def _insert_job(connection, *, name, kind, config, core_count, memory, sensitivity_config=None, step_key=None, parent_id=None):
+        """
+        Add a job to the queue and return its ID
+        """
+        columns = {"name": name, "step_key": step_key, "parent_id": parent_id, "kind": kind, "config": json.dumps(config), "sensitivity_config": json.dumps(sensitivity_config) if sensitivity_config is not None else None, "core_count": core_count, "memory": memory, "state": "queued", "submitted_at": datetime.now().isoformat(timespec="seconds")}
+        cursor = connection.execute(f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", list(columns.values()))
+        return cursor.lastrowid
+
+    def submit_run(self, config, *, memory):
+        """
+        Add a single run to the queue and return its ID, the run uses a core per solver thread and the memory is its expected peak memory in GB
+        """
+        assert validate.is_config(config)
+        assert validate.is_number(memory, min_value=0)
+
+        with self._connect() as connection:
+            return self._insert_job(connection, name=config["name"], kind="run", config=config, core_count=config["optimization"]["thread_count"], memory=memory)
+
+    def submit_sensitivity(self, config, sensitivity_config, *, memory):
+        """
+        Add a sensitivity analysis to the queue and return the ID of its main job, each step is a separate job if the steps are independent of each other
+        """
+        assert validate.is_config(config)
+        assert validate.is_sensitivity_config(sensitivity_config)
+        assert validate.is_number(memory, min_value=0)
+
+        with self._connect() as connection:
+            # The curtailment steps depend on the results of the previous step and warm-started steps share a model, so they are run as a single job
+            if sensitivity_config["analysis_type"] == "curtailment" or sensitivity_config.get("warm_start", False):
+                return self._insert_job(connection, name=config["name"], kind="sensitivity", config=config, sensitivity_config=sensitivity_config, core_count=config["optimization"]["thread_count"], memory=memory)
+
+            # Split the threads over the simultaneous steps, like a sensitivity analysis that is run in the app itself
+            thread_count = max(config["optimization"]["thread_count"] // min(sensitivity_config.get("worker_count", 1), len(sensitivity_config["steps"])), 1)
+
+            # Add a job that stores the sensitivity config after all steps have finished and a job for each step (in a single transaction, so a worker never sees an incomplete analysis)
+            connection.execute("BEGIN IMMEDIATE")
+            parent_id = self._insert_job(connection, name=config["name"], kind="sensitivity_summary", config=config, sensitivity_config=sensitivity_config, core_count=0, memory=0)
+            for step_key, step_value in sensitivity_config["steps"].items():
+                step_config = optimization.create_step_config(config, sensitivity_config, step_value)
+                step_config["optimization"]["thread_count"] = thread_count
+                self._insert_job(connection, name=config["name"], kind="sensitivity_step", config=step_config, step_key=step_key, parent_id=parent_id, core_count=thread_count, memory=memory)
+            connection.execute("COMMIT")
+            return parent_id
+
+    def claim_job(self, *, worker, available_cores, available_memory, is_idle):
+        """
+        Mark the oldest job that can be started as running and return it as a dictionary, or return None if it doesn't fit in the available cores and memory (a job that is larger than the worker is only started when the worker is idle)
+        """
+        assert validate.is_string(worker)
+        assert validate.is_number(available_cores)
+        assert validate.is_number(available_memory)
+        assert validate.is_bool(is_idle)
+
+        with self._connect() as connection:
+            # Lock the database for writing, so two workers never claim the same job
+            connection.execute("BEGIN IMMEDIATE")
+
+            # A sensitivity summary can only be started when all its steps have finished
+            job = connection.execute("SELECT * FROM jobs WHERE state = 'queued' AND NOT EXISTS (SELECT 1 FROM jobs AS steps WHERE steps.parent_id = jobs.id AND steps.state IN ('queued', 'running')) ORDER BY id LIMIT 1").fetchone()
+
+            # Don't skip the oldest job if it doesn't fit, otherwise a large job could wait forever for smaller jobs
+            if job is None or (not is_idle and (job["core_count"] > available_cores or job["memory"] > available_memory)):
+                connection.execute("COMMIT")
+                return None
+
+            connection.execute("UPDATE jobs SET state = 'running', worker = ?, started_at = ? WHERE id = ?", (worker, datetime.now().isoformat(timespec="seconds"), job["id"]))
+            connection.execute("COMMIT")
+
+        job = dict(job)
+        job["config"] = json.loads(job["config"])
+        job["sensitivity_config"] = json.loads(job["sensitivity_config"]) if job["sensitivity_config"] is not None else None
+        return job
+
+    def update_progress(self, job_id, progress):
+        """
+        Set the latest status message of a job
+        """
+        assert validate.is_integer(job_id)
+        assert validate.is_string(progress)
+
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET progress = ? WHERE id = ?", (progress, job_id))
+
+    def finish_job(self, job_id, *, error_message=None):
+        """
+        Mark a running job as finished, or as failed if there is an error message (a job that has been cancelled stays cancelled)
+        """
+        assert validate.is_integer(job_id)
+        assert validate.is_string(error_message, required=False)
+
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET state = ?, error_message = ?, finished_at = ? WHERE id = ? AND state = 'running'", ("finished" if error_message is None else "failed", error_message, datetime.now().isoformat(timespec="seconds"), job_id))
+
+    def cancel_job(self, job_id):
+        """
+        Cancel a job and the steps of a sensitivity analysis that have not finished yet, the worker stops the jobs that are already running
+        """
+        assert validate.is_integer(job_id)
+
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET state = 'cancelled', finished_at = ? WHERE (id = ? OR parent_id = ?) AND state IN ('queued', 'running')", (datetime.now().isoformat(timespec="seconds"), job_id, job_id))
+
+    def get_job_states(self, job_ids):
+        """
+        Return a dictionary with the state of each job
+        """
+        assert validate.is_list_like(job_ids)
+
+        with self._connect() as connection:
+            rows = connection.execute(f"SELECT id, state FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))})", list(job_ids)).fetchall()
+        return {row["id"]: row["state"] for row in rows}
+
+    def get_finished_steps(self, parent_id):
+        """
+        Return the keys of the steps of a sensitivity analysis that have finished successfully
+        """
+        assert validate.is_integer(parent_id)
+
+        with self._connect() as connection:
+            rows = connection.execute("SELECT step_key FROM jobs WHERE parent_id = ? AND state = 'finished'", (parent_id,)).fetchall()
+        return [row["step_key"] for row in rows]
+
+    def get_jobs(self, *, limit=100):
+        """
+        Return a DataFrame with the most recent jobs, without their configs
+        """
+        assert validate.is_integer(limit, min_value=1)
+
+        with self._connect() as connection:
+            rows = connection.execute("SELECT id, name, step_key, parent_id, kind, core_count, memory, state, progress, error_message, worker, submitted_at, started_at, finished_at FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=["id", "name", "step_key", "parent_id", "kind", "core_count", "memory", "state", "progress", "error_message", "worker", "submitted_at", "started_at", "finished_at"]).set_index("id")
+
+    def get_active_names(self):
+        """
+        Return the names of the runs that are queued or running
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT DISTINCT name FROM jobs WHERE state IN ('queued', 'running')").fetchall()
+        return [row["name"] for row in rows]
+
+    def heartbeat(self, worker, *, core_count, memory):
+        """
+        Register that the worker is still alive
+        """
+        assert validate.is_string(worker)
+
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO workers (name, core_count, memory, heartbeat_at) VALUES (?, ?, ?, ?)", (worker, core_count, memory, datetime.now().isoformat(timespec="seconds")))
+
+    def remove_worker(self, worker):
+        """
+        Remove a worker that has stopped
+        """
+        assert validate.is_string(worker)
+
+        with self._connect() as connection:
+            connection.execute("DELETE FROM workers WHERE name = ?", (worker,))
+
+    def get_workers(self, *, timeout=60):
+        """
+        Return a DataFrame with the workers that sent a heartbeat within the timeout in seconds
+        """
+        assert validate.is_number(timeout, min_value=0)
+
+        with self._connect() as connection:
+            rows = connection.execute("SELECT * FROM workers WHERE heartbeat_at >= ?", ((datetime.now() - timedelta(seconds=timeout)).isoformat(timespec="seconds"),)).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=["name", "core_count", "memory", "heartbeat_at"]).set_index("name")
+
+    def fail_abandoned_jobs(self, *, timeout=60):
+        """
+        Mark the running jobs of workers that have not sent a heartbeat within the timeout in seconds as failed
+        """
+        assert validate.is_number(timeout, min_value=0)
+
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET state = 'failed', error_message = 'The worker of the job stopped', finished_at = ? WHERE state = 'running' AND worker NOT IN (SELECT name FROM workers WHERE heartbeat_at >= ?)", (datetime.now().isoformat(timespec="seconds"), (datetime.now() - timedelta(seconds=timeout)).isoformat(timespec="seconds")))
@@ -0,0 +1,23 @@
+class JobStatus:
+    """
+    Status that stores its latest update in the job queue, so the progress of a job in a worker can be followed on the Optimization page
+    """
+
+    # The solver log is only written to the log file of the run
+    is_interactive = False
+
+    def __init__(self, job_queue, job_id, *, prefix=None):
+        self.job_queue = job_queue
+        self.job_id = job_id
+        self.prefix = prefix
+
+    def update(self, text, *, status_type="info"):
+        prefix = f"{self.prefix}: " if self.prefix is not None else ""
+        self.job_queue.update_progress(self.job_id, f"{prefix}{text}")
+
+    def add_section(self, title):
+        """
+        Return a status that prefixes its updates with the title
+        """
+        self.update(title)
+        return JobStatus(self.job_queue, self.job_id, prefix=title)
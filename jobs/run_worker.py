@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import socket
+import time
+
+import psutil
+
+import optimization
+import utils
+import validate
+from .job_queue import JobQueue
+from .job_status import JobStatus
+
+
+def _run_job(job, *, database_filepath):
+    """
+    Run a job in its own process and store the result in the job queue
+    """
+    job_queue = JobQueue(database_filepath)
+    status = JobStatus(job_queue, job["id"])
+    config = job["config"]
+    output_directory = utils.path("output", job["name"])
+
+    try:
+        if job["kind"] == "run":
+            error_message = optimization.run(config, status=status, output_directory=output_directory).error_message
+            if error_message is None:
+                status.update("Optimization has finished and results are stored", status_type="success")
+                if config["send_notification"]:
+                    utils.send_notification(f"Optimization '{config['name']}' has finished")
+
+        elif job["kind"] == "sensitivity":
+            optimization.run_sensitivity(config, job["sensitivity_config"], status=status)
+            error_message = None
+
+        elif job["kind"] == "sensitivity_step":
+            error_message = optimization.run(config, status=status, output_directory=output_directory / job["step_key"]).error_message
+            if error_message is None:
+                status.update("Optimization has finished and results are stored", status_type="success")
+            if config["send_notification"]:
+                utils.send_notification(f"Optimization {job['step_key']} of '{config['name']}' has finished")
+
+        elif job["kind"] == "sensitivity_summary":
+            # Only keep the steps that finished successfully in the sensitivity config
+            sensitivity_config = job["sensitivity_config"]
+            finished_steps = job_queue.get_finished_steps(job["id"])
+            sensitivity_config["steps"] = {step_key: step_value for step_key, step_value in sensitivity_config["steps"].items() if step_key in finished_steps}
+            if sensitivity_config["steps"]:
+                optimization.finish_sensitivity(config, sensitivity_config, status=status)
+                error_message = None
+            else:
+                error_message = "None of the sensitivity runs finished successfully"
+                status.update(error_message, status_type="error")
+
+    # An exception only fails this job, the worker continues with the next job
+    except Exception as exception:
+        error_message = f"The run failed: {exception}"
+        status.update(error_message, status_type="error")
+
+    job_queue.finish_job(job["id"], error_message=error_message)
+
+
+def run_worker(*, core_count, memory, poll_interval=1.0, database_filepath=None, log_filepath=None):
+    """
+    Run the queued jobs until the worker is stopped, the jobs run simultaneously as long as their cores and memory (in GB) fit within the limits of the worker and the free memory of the machine
+    """
+    assert validate.is_integer(core_count, min_value=1)
+    assert validate.is_number(memory, min_value=0)
+    assert validate.is_number(poll_interval, min_value=0)
+    assert validate.is_filepath(database_filepath, required=False)
+    assert validate.is_filepath(log_filepath, required=False)
+
+    job_queue = JobQueue(database_filepath)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    status = optimization.ConsoleStatus(log_filepath, prefix=worker)
+    status.update(f"Worker started with {core_count} cores and {memory:.1f} GB of memory")
+
+    # Spawn the job processes, so each job creates its own Gurobi environment
+    context = multiprocessing.get_context("spawn")
+    running_jobs = {}
+
+    try:
+        while True:
+            # Register that the worker is alive and fail the jobs of workers that stopped without finishing their jobs
+            job_queue.heartbeat(worker, core_count=core_count, memory=memory)
+            job_queue.fail_abandoned_jobs()
+
+            # Stop the jobs that have been cancelled and remove the jobs that have finished
+            job_states = job_queue.get_job_states(list(running_jobs)) if running_jobs else {}
+            for job_id, (process, job) in list(running_jobs.items()):
+                if job_states.get(job_id) == "cancelled" and process.is_alive():
+                    process.terminate()
+                    status.update(f"Cancelled job {job_id}", status_type="warning")
+                if not process.is_alive():
+                    process.join()
+
+                    # A job process that crashed (for example because it ran out of memory) did not store its result itself
+                    if process.exitcode != 0:
+                        job_queue.finish_job(job_id, error_message=f"The job process stopped unexpectedly (exit code {process.exitcode})")
+                    status.update(f"Job {job_id} stopped")
+                    del running_jobs[job_id]
+
+            # Start the next jobs as long as they fit in the remaining cores and memory
+            while True:
+                available_cores = core_count - sum(job["core_count"] for _, job in running_jobs.values())
+                available_memory = min(memory - sum(job["memory"] for _, job in running_jobs.values()), psutil.virtual_memory().available / 1024**3)
+                job = job_queue.claim_job(worker=worker, available_cores=available_cores, available_memory=available_memory, is_idle=not running_jobs)
+                if job is None:
+                    break
+
+                process = context.Process(target=_run_job, args=(job,), kwargs={"database_filepath": job_queue.database_filepath})
+                process.start()
+                running_jobs[job["id"]] = (process, job)
+                step = f" ({job['step_key']})" if job["step_key"] is not None else ""
+                status.update(f"Started job {job['id']}: {job['name']}{step} with {job['core_count']} cores and {job['memory']:.1f} GB of memory")
+
+            time.sleep(poll_interval)
+
+    # Stop the running jobs if the worker is stopped, so they don't continue without a worker
+    finally:
+        for job_id, (process, job) in running_jobs.items():
+            process.terminate()
+            process.join()
+            job_queue.finish_job(job_id, error_message="The worker of the job stopped")
+        job_queue.remove_worker(worker)
+        status.update("Worker stopped")
@@ -1,16 +1,30 @@
+import multiprocessing
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from copy import deepcopy
 
-import streamlit as st
+import pandas as pd
 
 import utils
 import validate
-from .optimize import optimize
+from .console_status import ConsoleStatus
+from .decomposition import optimize_decomposed
+from .model_handle import ModelHandle
+from .multi_resolution import optimize_multi_resolution
+from .optimize import build_model, get_result_values, optimize, solve_model, store_result_values
+from .queue_status import QueueStatus
+from .sensitivity_manifest import SensitivityManifest
 from .status import Status
+from .step_leases import StepLeases
 
 
-def run(config, *, status=None, output_directory):
+def run(config, *, status=None, output_directory, model_handle=None):
     """
-    Run the model with the given configuration file
+    Run the model with the given configuration file and return the model handle, the model of the given model handle is updated instead of rebuilt if possible
     """
     assert validate.is_config(config)
     assert validate.is_directory_path(output_directory)
@@ -25,14 +39,20 @@ def run(config, *, status=None, output_directory):
     if status is None:
         status = Status()
 
-    error_message = optimize(config, status=status, output_directory=output_directory)
+    # Solve a subproblem per climate year if the model is decomposed, refine the solution from coarser resolutions if enabled, otherwise create or update the model and solve it
+    if config.get("decomposition") is not None:
+        model_handle = optimize_decomposed(config, status=status, output_directory=output_directory)
+    elif config.get("multi_resolution") is not None:
+        model_handle = optimize_multi_resolution(config, status=status, output_directory=output_directory)
+    else:
+        model_handle = optimize(config, status=status, output_directory=output_directory, model_handle=model_handle)
 
     # Stop the run if an error occurred during the optimization
-    if error_message is not None:
-        status.update(error_message, status_type="error")
+    if model_handle.error_message is not None:
+        status.update(model_handle.error_message, status_type="error")
         if config["send_notification"]:
-            utils.send_notification(error_message)
-        return error_message
+            utils.send_notification(model_handle.error_message)
+        return model_handle
 
     # Store the config as a .YAML file
     utils.write_yaml(output_directory / "config.yaml", config)
@@ -48,72 +68,352 @@ def run(config, *, status=None, output_directory):
         if config["send_notification"]:
             utils.send_notification(f"Optimization '{config['name']}' has finished")
 
+    return model_handle
+
+
+def create_step_config(config, sensitivity_config, step_value):
+    """
+    Return a copy of the config with the parameters of a sensitivity analysis step
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config)
+
+    step_config = deepcopy(config)
+
+    # Change the config parameters relevant for the current analysis type for this step
+    if sensitivity_config["analysis_type"] == "curtailment":
+        utils.set_nested_key(step_config, "fixed_ires.annual_costs", float(step_value * sensitivity_config["annual_ires_costs_optimal"]))
+        utils.set_nested_key(step_config, "fixed_ires.direction", "gte" if step_value > 1 else "lte" if step_value < 1 else None)
+    elif sensitivity_config["analysis_type"] == "climate_years":
+        last_climate_year = utils.get_nested_key(step_config, "climate_years.end")
+        utils.set_nested_key(step_config, "climate_years.start", last_climate_year - (step_value - 1))
+    if sensitivity_config["analysis_type"] == "technology_scenario":
+        utils.set_nested_key(step_config, "technologies.scenario", step_value)
+    elif sensitivity_config["analysis_type"] == "hydrogen_demand":
+        utils.set_nested_key(step_config, "relative_hydrogen_demand", step_value)
+    elif sensitivity_config["analysis_type"] == "extra_hydrogen_costs":
+        utils.set_nested_key(step_config, "extra_hydrogen_costs_per_kg", step_value)
+    elif sensitivity_config["analysis_type"] == "dispatchable_generation":
+        utils.set_nested_key(step_config, "fixed_dispatchable_capacity", {"technology": sensitivity_config["dispatchable_technology"], "share": step_value})
+    elif sensitivity_config["analysis_type"] == "hydropower_capacity":
+        utils.set_nested_key(step_config, "technologies.relative_hydropower_capacity", step_value)
+    elif sensitivity_config["analysis_type"] == "interconnection_capacity":
+        utils.set_nested_key(step_config, "interconnections.relative_capacity", step_value)
+    elif sensitivity_config["analysis_type"] == "interconnection_efficiency":
+        utils.set_nested_key(step_config, "interconnections.efficiency.hvac", step_value)
+        utils.set_nested_key(step_config, "interconnections.efficiency.hvdc", step_value)
+    elif sensitivity_config["analysis_type"] == "min_self_sufficiency":
+        utils.set_nested_key(step_config, "self_sufficiency.min_electricity", step_value)
+    elif sensitivity_config["analysis_type"] == "max_self_sufficiency":
+        utils.set_nested_key(step_config, "self_sufficiency.max_electricity", step_value)
+    elif sensitivity_config["analysis_type"] == "barrier_convergence_tolerance":
+        utils.set_nested_key(step_config, "optimization.barrier_convergence_tolerance", step_value)
+
+    return step_config
+
+
+def _run_step_in_process(step_config, *, queue, step_key, output_directory):
+    """
+    Run a single sensitivity analysis step in a worker process and send its progress to the queue
+    """
+    return run(step_config, status=QueueStatus(queue, step_key), output_directory=output_directory).error_message
+
+
+def _run_steps_in_parallel(config, sensitivity_config, *, status, output_directory, manifest):
+    """
+    Run the sensitivity analysis steps simultaneously in a pool of worker processes
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config)
+    assert validate.is_directory_path(output_directory)
+
+    # Create a copy of the steps' dictionary (this is required because it gets updated when a run is not completed)
+    all_steps = dict(sensitivity_config["steps"])
+    number_of_steps = len(all_steps)
+
+    # Create a status for each step, the steps that finished in a previous attempt are not run again
+    step_statuses = {}
+    missing_steps = {}
+    for step_number, step_key in enumerate(all_steps, start=1):
+        step_statuses[step_key] = status.add_section(f"Sensitivity run {step_number}/{number_of_steps}")
+        if manifest.is_finished(step_key):
+            step_statuses[step_key].update("The results of a previous attempt are used", status_type="success")
+            manifest.add_step(step_key, all_steps[step_key])
+        else:
+            step_statuses[step_key].update("Waiting for an available worker")
+            missing_steps[step_key] = all_steps[step_key]
+
+    # Stop if all steps finished in a previous attempt
+    if not missing_steps:
+        return
+
+    # Split the threads over the workers
+    worker_count = min(sensitivity_config["worker_count"], len(missing_steps))
+    thread_count = max(config["optimization"]["thread_count"] // worker_count, 1)
+
+    # Spawn the worker processes, so each worker creates its own Gurobi environment
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=worker_count, mp_context=context) as executor:
+        queue = manager.Queue()
+
+        # Submit the missing steps to the pool
+        futures = {}
+        for step_key, step_value in missing_steps.items():
+            manifest.remove_step(step_key)
+            step_config = create_step_config(config, sensitivity_config, step_value)
+            step_config["optimization"]["thread_count"] = thread_count
+            future = executor.submit(_run_step_in_process, step_config, queue=queue, step_key=step_key, output_directory=output_directory / step_key)
+            futures[future] = step_key
+
+        # Show the progress of the workers until all steps have finished
+        pending_futures = set(futures)
+        while pending_futures:
+            finished_futures, pending_futures = wait(pending_futures, timeout=0.5, return_when=FIRST_COMPLETED)
+
+            # Show the status updates that were sent by the workers
+            while not queue.empty():
+                step_key, text, status_type = queue.get()
+                step_statuses[step_key].update(text, status_type=status_type)
+
+            for future in finished_futures:
+                step_key = futures[future]
+                step_number = list(all_steps).index(step_key) + 1
+
+                # Get the error message of the step, an exception in a worker only fails that step
+                try:
+                    error_message = future.result()
+                except Exception as exception:
+                    error_message = f"The run failed: {exception}"
+                    step_statuses[step_key].update(error_message, status_type="error")
+                manifest.add_step(step_key, all_steps[step_key], error_message=error_message)
+
+                # Remove the step from the sensitivity analysis if the run did not finish successfully
+                if error_message is not None:
+                    del sensitivity_config["steps"][step_key]
+                else:
+                    step_statuses[step_key].update("Optimization has finished and results are stored", status_type="success")
+
+                # If enabled, send a notification
+                if config["send_notification"]:
+                    utils.send_notification(f"Optimization {step_number}/{number_of_steps} of '{config['name']}' has finished")
+
 
-def run_sensitivity(config, sensitivity_config):
+def finish_sensitivity(config, sensitivity_config, *, status):
     """
-    Run the model for each step in the sensitivity analysis
+    Store the sensitivity config with the steps that finished successfully and set the final status of the sensitivity analysis
     """
     assert validate.is_config(config)
     assert validate.is_sensitivity_config(sensitivity_config)
 
-    status = Status()
+    # Store the sensitivity config file
     output_directory = utils.path("output", config["name"])
+    utils.write_yaml(output_directory / "sensitivity.yaml", sensitivity_config, exist_ok=True)
+
+    # Upload the sensitivity config to Dropbox
+    if config["upload_results"]:
+        utils.upload_to_dropbox(output_directory / "sensitivity.yaml", output_directory)
+
+    # Set the final status
+    status.update("Sensitivity analysis has finished and results are stored", status_type="success")
+    if config["send_notification"]:
+        utils.send_notification(f"The '{config['name']}' sensitivity analysis has finished")
+
+
+def _run_curtailment_search(config, sensitivity_config, *, status, output_directory, manifest):
+    """
+    Bracket the feasible relative IRES costs with solves at a coarse resolution, and solve the steps where the curve of the firm LCOE and curtailment bends at the full resolution simultaneously
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config)
+    assert validate.is_directory_path(output_directory)
+
+    """
+    Step 1: Bracket the feasible IRES costs at a coarse resolution
+    """
+    # Solve the coarse steps at a daily resolution without uploading or notifying, the coarse steps are twice as close as the steps of the geometric search
+    coarse_config = deepcopy(config)
+    coarse_config["resolution"] = "24H" if pd.Timedelta(config["resolution"]) < pd.Timedelta("24H") else config["resolution"]
+    coarse_config.pop("multi_resolution", None)
+    coarse_config["upload_results"] = False
+    coarse_config["send_notification"] = False
+    coarse_step_factor = sensitivity_config["step_factor"] ** 0.5
+    coarse_status = status.add_section(f"Bracketing the IRES costs at the {coarse_config['resolution']} resolution")
+
+    # Get the curtailment and firm LCOE of the coarse optimum and of each coarse step away from the optimum until the model is infeasible or the maximum LCOE is exceeded
+    coarse_points = {}
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        for step_factor in [1, 1 / coarse_step_factor, coarse_step_factor]:
+            relative_ires_costs = step_factor
+            while True:
+                coarse_status.update(f"Solving the coarse step {relative_ires_costs:.3f}")
+                coarse_output_directory = pathlib.Path(temporary_directory) / f"{relative_ires_costs:.3f}"
+                error_message = run(create_step_config(coarse_config, sensitivity_config, relative_ires_costs), status=coarse_status, output_directory=coarse_output_directory).error_message
+
+                # Stop at the first infeasible step (HiGHS can't always tell if it's infeasible or unbounded, but the model is never unbounded) and skip a step that could not be solved for another reason
+                if error_message in ["The model was infeasible", "The model was either infeasible or unbounded"]:
+                    break
+                if error_message is None:
+                    firm_lcoe = utils.previous_run.firm_lcoe(coarse_output_directory)
+                    coarse_points[relative_ires_costs] = {"relative_curtailment": utils.previous_run.relative_curtailment(coarse_output_directory), "firm_lcoe": firm_lcoe}
+                    if firm_lcoe >= sensitivity_config["max_lcoe"]:
+                        break
+
+                # The optimum is only solved once
+                if step_factor == 1:
+                    break
+                relative_ires_costs *= step_factor
+
+    # Stop if no coarse step could be solved
+    if not coarse_points:
+        coarse_status.update("None of the coarse steps could be solved", status_type="error")
+        return
+    coarse_status.update(f"The feasible relative IRES costs are between {min(coarse_points):.3f} and {max(coarse_points):.3f}", status_type="success")
+
+    """
+    Step 2: Solve the steps where the curve bends at the full resolution
+    """
+    # Select the steps that are needed to follow the coarse curve with straight lines, the optimum is already solved
+    selected_steps = utils.select_bending_points(pd.DataFrame.from_dict(coarse_points, orient="index"), count=sensitivity_config.get("step_count", 10), required_points=[1] if 1 in coarse_points else None)
+    selected_steps = {f"{step:.3f}": float(step) for step in selected_steps if f"{step:.3f}" != "1.000"}
+
+    # Solve the selected steps simultaneously, they don't depend on each other because the IRES costs are relative to the optimum (the steps that could not be solved are removed from the search config)
+    search_sensitivity_config = {**sensitivity_config, "steps": dict(selected_steps), "worker_count": sensitivity_config.get("worker_count", 1)}
+    if selected_steps:
+        _run_steps_in_parallel(config, search_sensitivity_config, status=status, output_directory=output_directory, manifest=manifest)
+        sensitivity_config["steps"].update(search_sensitivity_config["steps"])
+
+    """
+    Step 3: Bisect the lower edge of the feasible IRES costs at the full resolution
+    """
+    # The coarse resolution underestimates the flexibility that is required, so the lowest selected steps can be infeasible at the full resolution (a step that failed for another reason says nothing about the edge)
+    lowest_feasible_step = min(sensitivity_config["steps"].values())
+    infeasible_steps = [step for step_key, step in selected_steps.items() if manifest.failed_steps.get(step_key) in ["The model was infeasible", "The model was either infeasible or unbounded"] and step < lowest_feasible_step]
+    if not infeasible_steps:
+        return
+    highest_infeasible_step = max(infeasible_steps)
+
+    # Halve the bracket (on a logarithmic scale) until it's smaller than half a coarse step
+    while lowest_feasible_step / highest_infeasible_step > coarse_step_factor ** 0.5:
+        relative_ires_costs = (lowest_feasible_step * highest_infeasible_step) ** 0.5
+        step_key = f"{relative_ires_costs:.3f}"
+        step_status = status.add_section(f"Sensitivity run {step_key}")
+
+        # Run the optimization if it didn't finish in a previous attempt
+        if manifest.is_finished(step_key):
+            step_status.update("The results of a previous attempt are used", status_type="success")
+            error_message = None
+        else:
+            manifest.remove_step(step_key)
+            error_message = run(create_step_config(config, sensitivity_config, relative_ires_costs), status=step_status, output_directory=output_directory / step_key).error_message
+        manifest.add_step(step_key, relative_ires_costs, error_message=error_message)
+
+        # Narrow the bracket and add the step if it could be solved, or if it was infeasible (or infeasible or unbounded, the model is never unbounded)
+        if error_message is None:
+            sensitivity_config["steps"][step_key] = relative_ires_costs
+            lowest_feasible_step = relative_ires_costs
+        elif error_message in ["The model was infeasible", "The model was either infeasible or unbounded"]:
+            highest_infeasible_step = relative_ires_costs
+
+        # Stop the search if the step could not be solved for another reason, because it's unknown on which side of the edge the step is
+        else:
+            step_status.update(f"The search is stopped, because the step could not be solved: {error_message}", status_type="error")
+            return
+
+
+def run_sensitivity(config, sensitivity_config, *, status=None, resume=False):
+    """
+    Run the model for each step in the sensitivity analysis, if resumed only the steps without complete results are run
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config)
+    assert validate.is_bool(resume)
+
+    # Initialize a status object if not defined yet
+    if status is None:
+        status = Status()
+    output_directory = utils.path("output", config["name"])
+
+    # Store the configs and the finished steps after each step, so the sensitivity analysis can be resumed if it's interrupted
+    manifest = SensitivityManifest(config, sensitivity_config, resume=resume)
+    model_handle = None
+
+    # The model is only built once and updated for each step if the steps are warm-started
+    warm_start = sensitivity_config.get("warm_start", False)
 
     # Run a specific sensitivity analysis for the curtailment
     if sensitivity_config["analysis_type"] == "curtailment":
         # Calculate the optimal IRES costs
-        st.subheader(f"Sensitivity run 1.000")
-        run(config, status=status, output_directory=output_directory / "1.000")
+        status.add_section("Sensitivity run 1.000")
+        if manifest.is_finished("1.000"):
+            status.update("The results of a previous attempt are used", status_type="success")
+            manifest.add_step("1.000", 1.0)
+        else:
+            manifest.remove_step("1.000")
+            model_handle = run(config, status=status, output_directory=output_directory / "1.000")
+            manifest.add_step("1.000", 1.0, error_message=model_handle.error_message)
         annual_ires_costs_optimal = utils.previous_run.annual_costs(output_directory / "1.000", breakdown_level=1)["ires"]
 
         # Send the notification
         if config["send_notification"]:
             utils.send_notification(f"Optimization 1.000 of '{config['name']}' has finished")
 
-        # Add the steps dictionary to the sensitivity config
+        # Add the optimal IRES costs and the steps dictionary to the sensitivity config
+        sensitivity_config["annual_ires_costs_optimal"] = float(annual_ires_costs_optimal)
         sensitivity_config["steps"] = {"1.000": 1.0}
 
-        # Run the sensitivity analysis incrementally for ires cost values both larger and smaller than the optimal
-        for step_factor in [1 / sensitivity_config["step_factor"], sensitivity_config["step_factor"]]:
-            # Set the first relative_ires_costs to the step factor
-            relative_ires_costs = step_factor
-
-            while True:
-                step_key = f"{relative_ires_costs:.3f}"
-                st.subheader(f"Sensitivity run {step_key}")
-
-                # Set the total IRES costs for this step
-                step_config = deepcopy(config)
-                annual_ires_costs_step = float(relative_ires_costs * annual_ires_costs_optimal)
-                utils.set_nested_key(step_config, "fixed_ires.annual_costs", annual_ires_costs_step)
-                fixed_ires_costs_direction = "gte" if step_factor > 1 else "lte" if step_factor < 1 else None
-                utils.set_nested_key(step_config, "fixed_ires.direction", fixed_ires_costs_direction)
-
-                # Run the optimization
-                output_directory_step = output_directory / step_key
-                error_message = run(step_config, status=status, output_directory=output_directory_step)
-
-                # Send the notification
-                if config["send_notification"]:
-                    utils.send_notification(f"Optimization {step_key} of '{config['name']}' has finished")
-
-                # Break the while loop if the model was infeasible, continue to the next step if the model could not be solved for another reason
-                if error_message == "The model was infeasible":
-                    break
-                elif error_message is not None:
+        # Bracket the feasible IRES costs at a coarse resolution and only solve the steps where the curve bends, if enabled
+        if sensitivity_config.get("search") == "adaptive":
+            _run_curtailment_search(config, sensitivity_config, status=status, output_directory=output_directory, manifest=manifest)
+
+        # Otherwise run the sensitivity analysis incrementally for ires cost values both larger and smaller than the optimal
+        else:
+            for step_factor in [1 / sensitivity_config["step_factor"], sensitivity_config["step_factor"]]:
+                # Set the first relative_ires_costs to the step factor
+                relative_ires_costs = step_factor
+
+                while True:
+                    step_key = f"{relative_ires_costs:.3f}"
+                    status.add_section(f"Sensitivity run {step_key}")
+
+                    # Set the total IRES costs for this step
+                    step_config = create_step_config(config, sensitivity_config, relative_ires_costs)
+
+                    # Run the optimization if it didn't finish in a previous attempt (the fixed IRES costs and its direction are updated in the model of the previous step if the steps are warm-started)
+                    output_directory_step = output_directory / step_key
+                    if manifest.is_finished(step_key):
+                        status.update("The results of a previous attempt are used", status_type="success")
+                        error_message = None
+                    else:
+                        manifest.remove_step(step_key)
+                        model_handle = run(step_config, status=status, output_directory=output_directory_step, model_handle=model_handle if warm_start else None)
+                        error_message = model_handle.error_message
+                    manifest.add_step(step_key, relative_ires_costs, error_message=error_message)
+
+                    # Send the notification
+                    if config["send_notification"]:
+                        utils.send_notification(f"Optimization {step_key} of '{config['name']}' has finished")
+
+                    # Break the while loop if the model was infeasible (or infeasible or unbounded, the model is never unbounded), continue to the next step if the model could not be solved for another reason
+                    if error_message in ["The model was infeasible", "The model was either infeasible or unbounded"]:
+                        break
+                    elif error_message is not None:
+                        relative_ires_costs *= step_factor
+                        continue
+
+                    # Add the step to the sensitivity config
+                    sensitivity_config["steps"][step_key] = relative_ires_costs
+
+                    # Break the while loop if the premium exceeds the maximum premium
+                    firm_lcoe = utils.previous_run.firm_lcoe(output_directory_step)
+                    if firm_lcoe >= sensitivity_config["max_lcoe"]:
+                        break
+
+                    # Update the relative IRES capacity for the next pass
                     relative_ires_costs *= step_factor
-                    continue
-
-                # Add the step to the sensitivity config
-                sensitivity_config["steps"][step_key] = relative_ires_costs
-
-                # Break the while loop if the premium exceeds the maximum premium
-                firm_lcoe = utils.previous_run.firm_lcoe(output_directory_step)
-                if firm_lcoe >= sensitivity_config["max_lcoe"]:
-                    break
 
-                # Update the relative IRES capacity for the next pass
-                relative_ires_costs *= step_factor
+    # Run the steps of the general sensitivity analysis simultaneously if multiple workers are selected
+    elif sensitivity_config.get("worker_count", 1) > 1:
+        _run_steps_in_parallel(config, sensitivity_config, status=status, output_directory=output_directory, manifest=manifest)
 
     # Otherwise run the general sensitivity analysis
     else:
@@ -124,37 +424,22 @@ def run_sensitivity(config, sensitivity_config):
         for step_key, step_value in all_steps.items():
             step_number = list(sensitivity_config["steps"].keys()).index(step_key) + 1
             number_of_steps = len(sensitivity_config["steps"])
-            st.subheader(f"Sensitivity run {step_number}/{number_of_steps}")
-            step_config = deepcopy(config)
+            status.add_section(f"Sensitivity run {step_number}/{number_of_steps}")
+
+            # Skip the step if it finished in a previous attempt
+            if manifest.is_finished(step_key):
+                status.update("The results of a previous attempt are used", status_type="success")
+                manifest.add_step(step_key, step_value)
+                continue
+            manifest.remove_step(step_key)
 
             # Change the config parameters relevant for the current analysis type for this step
-            if sensitivity_config["analysis_type"] == "climate_years":
-                last_climate_year = utils.get_nested_key(step_config, "climate_years.end")
-                utils.set_nested_key(step_config, "climate_years.start", last_climate_year - (step_value - 1))
-            if sensitivity_config["analysis_type"] == "technology_scenario":
-                utils.set_nested_key(step_config, "technologies.scenario", step_value)
-            elif sensitivity_config["analysis_type"] == "hydrogen_demand":
-                utils.set_nested_key(step_config, "relative_hydrogen_demand", step_value)
-            elif sensitivity_config["analysis_type"] == "extra_hydrogen_costs":
-                utils.set_nested_key(step_config, "extra_hydrogen_costs_per_kg", step_value)
-            elif sensitivity_config["analysis_type"] == "dispatchable_generation":
-                utils.set_nested_key(step_config, "fixed_dispatchable_capacity", {"technology": sensitivity_config["dispatchable_technology"], "share": step_value})
-            elif sensitivity_config["analysis_type"] == "hydropower_capacity":
-                utils.set_nested_key(step_config, "technologies.relative_hydropower_capacity", step_value)
-            elif sensitivity_config["analysis_type"] == "interconnection_capacity":
-                utils.set_nested_key(step_config, "interconnections.relative_capacity", step_value)
-            elif sensitivity_config["analysis_type"] == "interconnection_efficiency":
-                utils.set_nested_key(step_config, "interconnections.efficiency.hvac", step_value)
-                utils.set_nested_key(step_config, "interconnections.efficiency.hvdc", step_value)
-            elif sensitivity_config["analysis_type"] == "min_self_sufficiency":
-                utils.set_nested_key(step_config, "interconnections.min_self_sufficiency", step_value)
-            elif sensitivity_config["analysis_type"] == "max_self_sufficiency":
-                utils.set_nested_key(step_config, "interconnections.max_self_sufficiency", step_value)
-            elif sensitivity_config["analysis_type"] == "barrier_convergence_tolerance":
-                utils.set_nested_key(step_config, "optimization.barrier_convergence_tolerance", step_value)
-
-            # Run the optimization
-            error_message = run(step_config, status=status, output_directory=output_directory / step_key)
+            step_config = create_step_config(config, sensitivity_config, step_value)
+
+            # Run the optimization (the model of the previous step is updated if the steps are warm-started, unless the step changes the structure of the model)
+            model_handle = run(step_config, status=status, output_directory=output_directory / step_key, model_handle=model_handle if warm_start else None)
+            error_message = model_handle.error_message
+            manifest.add_step(step_key, step_value, error_message=error_message)
 
             # Remove the step from the sensitivity analysis if the run did not finish successfully
             if error_message is not None:
@@ -164,14 +449,196 @@ def run_sensitivity(config, sensitivity_config):
             if config["send_notification"]:
                 utils.send_notification(f"Optimization {step_number}/{number_of_steps} of '{config['name']}' has finished")
 
-    # Store the sensitivity config file
-    utils.write_yaml(output_directory / "sensitivity.yaml", sensitivity_config)
+    # Store the sensitivity config file and set the final status
+    finish_sensitivity(config, sensitivity_config, status=status)
 
-    # Upload the sensitivity config to Dropbox
-    if config["upload_results"]:
-        utils.upload_to_dropbox(output_directory / "sensitivity.yaml", output_directory)
 
-    # Set the final status
-    status.update("Sensitivity analysis has finished and results are stored", status_type="success")
-    if config["send_notification"]:
-        utils.send_notification(f"The '{config['name']}' sensitivity analysis has finished")
+def _run_leased_steps(config, sensitivity_config, *, status, leases, poll_interval, thread_count=None):
+    """
+    Claim and run the steps of a distributed sensitivity analysis until every step has finished or failed, the steps that are claimed by other workers are run again if their lease expires
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config)
+    assert validate.is_number(poll_interval, min_value=0)
+    assert validate.is_integer(thread_count, min_value=1, required=False)
+
+    output_directory = utils.path("output", config["name"])
+    all_steps = sensitivity_config["steps"]
+    number_of_steps = len(all_steps)
+
+    while True:
+        # Stop when all steps are done
+        remaining_steps = [step_key for step_key in all_steps if not leases.is_done(step_key)]
+        if not remaining_steps:
+            return
+
+        # Claim the first step that is not claimed by another worker, wait if all remaining steps are claimed
+        step_key = next((step_key for step_key in remaining_steps if leases.claim(step_key)), None)
+        if step_key is None:
+            time.sleep(poll_interval)
+            continue
+
+        step_number = list(all_steps).index(step_key) + 1
+        step_status = status.add_section(f"Sensitivity run {step_number}/{number_of_steps}")
+
+        # Use the results of the step if it finished but its worker stopped before storing the result
+        output_directory_step = output_directory / step_key
+        if SensitivityManifest.has_complete_results(output_directory_step):
+            step_status.update("The results of a previous attempt are used", status_type="success")
+            leases.release(step_key)
+            continue
+
+        # Remove the incomplete results of a previous attempt, a running step never writes to this directory
+        if output_directory_step.exists():
+            shutil.rmtree(output_directory_step)
+
+        # Run the step in a directory of this worker, so a worker whose lease expired while the step was still running never writes to the directory of the worker that took it over
+        worker_directory_step = output_directory / f"{step_key}.{leases.worker.replace(':', '-')}.tmp"
+        step_config = create_step_config(config, sensitivity_config, all_steps[step_key])
+        step_config["upload_results"] = False
+        if thread_count is not None:
+            step_config["optimization"]["thread_count"] = thread_count
+
+        # Run the step with the threads of this machine and renew the lease while it's running
+        with leases.keep_alive(step_key) as lease_lost:
+            try:
+                error_message = run(step_config, status=step_status, output_directory=worker_directory_step).error_message
+            except Exception as exception:
+                error_message = f"The run failed: {exception}"
+                step_status.update(error_message, status_type="error")
+
+        # Discard the results if the lease expired and the step was taken over by another worker
+        if lease_lost.is_set() or not leases.is_owner(step_key):
+            step_status.update("The lease of the step expired and another worker took it over, the results are discarded", status_type="warning")
+            shutil.rmtree(worker_directory_step, ignore_errors=True)
+            continue
+
+        # Move the results to the step directory, unless another worker has just stored the results of the step
+        try:
+            os.rename(worker_directory_step, output_directory_step)
+        except OSError:
+            shutil.rmtree(worker_directory_step, ignore_errors=True)
+        if error_message is None:
+            if config["upload_results"]:
+                step_status.update("Uploading the results to Dropbox")
+                utils.upload_to_dropbox(output_directory_step, output_directory_step)
+            step_status.update("Optimization has finished and results are stored", status_type="success")
+        if not leases.release(step_key, error_message=error_message):
+            step_status.update("The lease of the step expired and another worker took it over", status_type="warning")
+            continue
+
+        # If enabled, send a notification
+        if config["send_notification"]:
+            utils.send_notification(f"Optimization {step_number}/{number_of_steps} of '{config['name']}' has finished")
+
+
+def run_distributed_sensitivity(config, sensitivity_config, *, status=None, resume=False, lease_duration=600, poll_interval=10, thread_count=None):
+    """
+    Coordinate a sensitivity analysis whose steps are run by this and other workers that share the output directory, and return the error message if it could not be started
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config)
+    assert validate.is_bool(resume)
+
+    # Initialize a status object if not defined yet
+    if status is None:
+        status = Status()
+
+    # The curtailment steps depend on the results of the previous step, so they can't be distributed
+    if sensitivity_config["analysis_type"] == "curtailment":
+        error_message = "The curtailment sensitivity analysis can't be distributed"
+        status.update(error_message, status_type="error")
+        return error_message
+
+    # Store the configs in the manifest, so the other workers can join the sensitivity analysis by its name
+    manifest = SensitivityManifest(config, sensitivity_config, resume=resume)
+    leases = StepLeases(manifest.output_directory / "leases", lease_duration=lease_duration)
+
+    # Run the steps that failed in a previous attempt again
+    if resume:
+        for step_key in sensitivity_config["steps"]:
+            if leases.is_done(step_key) and leases.get_error_message(step_key) is not None:
+                leases.reset(step_key)
+
+    # Run the steps together with the other workers until every step has finished or failed
+    status.update(f"Waiting for the steps, other machines can join with 'python -m optimization --join \"{config['name']}\"'")
+    _run_leased_steps(config, sensitivity_config, status=status, leases=leases, poll_interval=poll_interval, thread_count=thread_count)
+
+    # Remove the directories of the steps that were taken over from a worker whose lease expired
+    for worker_directory_step in manifest.output_directory.glob("*.tmp"):
+        shutil.rmtree(worker_directory_step, ignore_errors=True)
+
+    # Add the results of all workers to the manifest and remove the steps that did not finish successfully
+    for step_key, step_value in dict(sensitivity_config["steps"]).items():
+        error_message = leases.get_error_message(step_key)
+        manifest.add_step(step_key, step_value, error_message=error_message)
+        if error_message is not None:
+            del sensitivity_config["steps"][step_key]
+
+    # Store the sensitivity config file and set the final status
+    finish_sensitivity(config, sensitivity_config, status=status)
+    return None
+
+
+def join_sensitivity(name, *, status=None, lease_duration=600, poll_interval=10, thread_count=None):
+    """
+    Run the steps of a distributed sensitivity analysis that is coordinated by another worker, and return the error message if it could not be joined
+    """
+    assert validate.is_string(name)
+
+    # Initialize a status object if not defined yet
+    if status is None:
+        status = Status()
+
+    # Get the configs from the manifest of the coordinator
+    if not utils.path("output", name, "manifest.yaml").is_file():
+        error_message = f"There is no sensitivity analysis called '{name}' to join"
+        status.update(error_message, status_type="error")
+        return error_message
+    manifest = SensitivityManifest.read(name)
+
+    # Run the steps together with the other workers, the coordinator stores the sensitivity config when all steps are done
+    leases = StepLeases(utils.path("output", name, "leases"), lease_duration=lease_duration)
+    _run_leased_steps(manifest["config"], manifest["sensitivity_config"], status=status, leases=leases, poll_interval=poll_interval, thread_count=thread_count)
+    status.update("All steps of the sensitivity analysis are done", status_type="success")
+    return None
+
+
+def run_batch(config, *, sensitivity_config=None, log_filepath=None, resume=False, distributed=False, lease_duration=600):
+    """
+    Run the model or sensitivity analysis without a Streamlit session and return the error message of the run, the progress is printed to the console or appended to the log file
+    """
+    assert validate.is_config(config)
+    assert validate.is_sensitivity_config(sensitivity_config, required=False)
+    assert validate.is_filepath(log_filepath, required=False)
+    assert validate.is_bool(resume)
+    assert validate.is_bool(distributed)
+
+    status = ConsoleStatus(log_filepath)
+
+    # Only a sensitivity analysis can be resumed or distributed
+    if (resume or distributed) and sensitivity_config is None:
+        error_message = "Only a sensitivity analysis can be resumed or distributed"
+        status.update(error_message, status_type="error")
+        return error_message
+
+    # Don't overwrite the results of a previous run, unless the sensitivity analysis is resumed
+    output_directory = utils.path("output", config["name"])
+    if output_directory.exists() and not resume:
+        error_message = f"There is already a run called '{config['name']}'"
+        status.update(error_message, status_type="error")
+        return error_message
+
+    # Run the sensitivity analysis if a sensitivity config is given, otherwise run the model once
+    if distributed:
+        return run_distributed_sensitivity(config, sensitivity_config, status=status, resume=resume, lease_duration=lease_duration)
+    if sensitivity_config is not None:
+        run_sensitivity(config, sensitivity_config, status=status, resume=resume)
+        return None
+
+    model_handle = run(config, status=status, output_directory=output_directory)
+    if model_handle.error_message is None:
+        status.update("Optimization has finished and results are stored", status_type="success")
+        if config["send_notification"]:
+            utils.send_notification(f"Optimization '{config['name']}' has finished")
+    return model_handle.error_message
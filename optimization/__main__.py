@@ -0,0 +1,37 @@
+import argparse
+import pathlib
+import sys
+
+import utils
+from . import ConsoleStatus, join_sensitivity, run_batch
+
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Run the model or a sensitivity analysis without the Streamlit app")
+    parser.add_argument("config", type=pathlib.Path, nargs="?", help="Path of the config YAML file")
+    parser.add_argument("--sensitivity", type=pathlib.Path, help="Path of the sensitivity config YAML file")
+    parser.add_argument("--name", help="Name of the run, overrides the name in the config")
+    parser.add_argument("--resume", action="store_true", help="Resume the interrupted sensitivity analysis with the same name, only the steps without complete results are run")
+    parser.add_argument("--distributed", action="store_true", help="Coordinate the sensitivity analysis, so workers on other machines that share the output directory can join it")
+    parser.add_argument("--join", metavar="NAME", help="Run the steps of the distributed sensitivity analysis with this name")
+    parser.add_argument("--lease-duration", type=float, default=600, help="Number of seconds after which a step of a worker that stopped is run by another worker")
+    parser.add_argument("--thread-count", type=int, help="Number of threads per step when joining a sensitivity analysis, overrides the thread count in the config")
+    parser.add_argument("--log-file", type=pathlib.Path, help="Append the progress to this file instead of printing it")
+    args = parser.parse_args()
+
+    # Join a distributed sensitivity analysis with the configs of the coordinator
+    if args.join is not None:
+        error_message = join_sensitivity(args.join, status=ConsoleStatus(args.log_file), lease_duration=args.lease_duration, thread_count=args.thread_count)
+        sys.exit(1 if error_message is not None else 0)
+    if args.config is None:
+        parser.error("the config is required unless a sensitivity analysis is joined")
+
+    # Read the configs
+    config = utils.read_yaml(args.config)
+    if args.name is not None:
+        config["name"] = args.name
+    sensitivity_config = utils.read_yaml(args.sensitivity) if args.sensitivity is not None else None
+
+    # Run the model and exit with an error code if the run failed
+    error_message = run_batch(config, sensitivity_config=sensitivity_config, log_filepath=args.log_file, resume=args.resume, distributed=args.distributed, lease_duration=args.lease_duration)
+    sys.exit(1 if error_message is not None else 0)
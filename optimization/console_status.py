@@ -0,0 +1,30 @@
+from datetime import datetime
+
+
+class ConsoleStatus:
+    """
+    Status that prints its updates with a timestamp to the console, or appends them to a log file, so a run can be followed without a Streamlit session
+    """
+
+    # The solver log is only written to the log file of the run
+    is_interactive = False
+
+    def __init__(self, log_filepath=None, *, prefix=None):
+        self.log_filepath = log_filepath
+        self.prefix = prefix
+
+    def update(self, text, *, status_type="info"):
+        prefix = f"[{self.prefix}] " if self.prefix is not None else ""
+        line = f"{datetime.now():%Y-%m-%d %H:%M:%S} {status_type.upper():<7} {prefix}{text}"
+        if self.log_filepath is None:
+            print(line, flush=True)
+        else:
+            with open(self.log_filepath, "a") as file:
+                file.write(f"{line}\n")
+
+    def add_section(self, title):
+        """
+        Show the title and return a status that prefixes its updates with the title
+        """
+        self.update(title)
+        return ConsoleStatus(self.log_filepath, prefix=title)
@@ -0,0 +1,348 @@
+import multiprocessing
+from datetime import datetime
+
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+
+import validate
+from .model_handle import ModelHandle
+from .optimize import build_model, get_error_message, get_result_values, store_result_values
+from .queue_status import QueueStatus
+from .solvers import GurobiSolution
+
+# The named constraint groups that are defined over all climate years, so they can't be enforced within a single climate year
+coupling_constraint_groups = ["electricity_self_sufficiency", "hydrogen_self_sufficiency", "fixed_ires", "fixed_dispatchable_capacity", "interconnection_capacity"]
+
+
+class ClimateYearSubproblem:
+    """
+    Dispatch model of a single climate year, in which the investments and the contributions to the coupling constraints are fixed by the master problem
+    """
+
+    def __init__(self, config, climate_year, *, status):
+        self.climate_year = climate_year
+        self.model_handle = build_model(config, status=status, climate_year=climate_year)
+        self.model = self.model_handle.model
+        self.model.update()
+
+        # Solve the subproblems with the dual simplex method, which warm-starts from the basis of the previous iteration and returns the exact duals that are required for the cuts
+        self.model.setParam("Method", 1)
+
+        # Report an infeasible subproblem as infeasible instead of infeasible or unbounded, so a feasibility cut can be created
+        self.model.setParam("DualReductions", 0)
+
+        # Get the capacity variables in a fixed order, so they are the same in all subproblems
+        results = self.model_handle.results
+        capacities = [*results["ires_capacity"].values(), results["dispatchable_capacity"], *results["storage_capacity"].values(), results["electrolysis_capacity"], *(results["interconnection_capacity"][connection_type][["extra"]] for connection_type in ["hvac", "hvdc"])]
+        investment_variables = [value for capacity in capacities for value in capacity.to_numpy(dtype="object").ravel() if isinstance(value, gp.Var)]
+        coupling_constraints = [constraint for group in coupling_constraint_groups for constraint in self.model_handle.constraints.get(group, [])]
+
+        # Find the constraints that only include investment variables, so they can be added to the master problem
+        constraint_matrix = self.model.getA().tocsc()
+        investment_columns = np.array([variable.index for variable in investment_variables], dtype=int)
+        is_investment_column = np.zeros(constraint_matrix.shape[1], dtype=bool)
+        is_investment_column[investment_columns] = True
+        is_investment_row = (constraint_matrix[:, ~is_investment_column].getnnz(axis=1) == 0) & (constraint_matrix.getnnz(axis=1) > 0)
+        is_investment_row[[constraint.index for constraint in coupling_constraints]] = False
+        investment_constraints = np.array(self.model.getConstrs(), dtype="object")[is_investment_row].tolist()
+        self.investment_data = {
+            "lower_bounds": np.array(self.model.getAttr("LB", investment_variables)),
+            "upper_bounds": np.array(self.model.getAttr("UB", investment_variables)),
+            "matrix": constraint_matrix[is_investment_row][:, investment_columns].tocsr(),
+            "senses": np.array(self.model.getAttr("Sense", investment_constraints)),
+            "rhs": np.array(self.model.getAttr("RHS", investment_constraints)),
+            "coupling_senses": np.array(self.model.getAttr("Sense", coupling_constraints)),
+        }
+
+        # Calculate the lowest possible objective value within the bounds of the variables, so the master problem is bounded before it has any cuts
+        all_variables = self.model.getVars()
+        objective_coefficients = np.array(self.model.getAttr("Obj", all_variables))
+        lower_bounds = np.array(self.model.getAttr("LB", all_variables))
+        upper_bounds = np.array(self.model.getAttr("UB", all_variables))
+        is_positive = objective_coefficients > 0
+        is_negative = objective_coefficients < 0
+        self.investment_data["objective_lower_bound"] = self.model.ObjCon + (objective_coefficients[is_positive] * lower_bounds[is_positive]).sum() + (objective_coefficients[is_negative] * upper_bounds[is_negative]).sum()
+
+        # Replace each coupling constraint (a·x ≥ b) by an equality with a free variable for the contribution of this climate year (a·x - z = b), the master problem ensures that the contributions of all climate years satisfy the constraint
+        coupling_variables = list(self.model.addVars(len(coupling_constraints), lb=-gp.GRB.INFINITY).values())
+        for constraint, coupling_variable in zip(coupling_constraints, coupling_variables):
+            self.model.chgCoeff(constraint, coupling_variable, -1)
+            constraint.Sense = "="
+
+        # Fix the linking variables with a constraint whose right-hand side is set by the master problem, the slack variables are only used to measure the infeasibility
+        linking_variables = gp.MVar.fromlist(investment_variables + coupling_variables)
+        self.positive_slack = self.model.addMVar(linking_variables.shape[0], ub=0)
+        self.negative_slack = self.model.addMVar(linking_variables.shape[0], ub=0)
+        self.linking_constraints = self.model.addConstr(linking_variables + self.positive_slack - self.negative_slack == 0)
+        self.model.update()
+
+    def solve(self, linking_values):
+        """
+        Solve the subproblem for the values of the linking variables and return the objective value and the duals of the linking constraints, if the subproblem is infeasible the sum of the infeasibilities is minimized instead
+        """
+        self.linking_constraints.RHS = linking_values
+        self.model.optimize()
+
+        # Minimize the infeasibilities of the linking constraints if the subproblem is infeasible, so a feasibility cut can be created
+        is_feasible = self.model.status != gp.GRB.INFEASIBLE
+        if not is_feasible:
+            objective = self.model.getObjective()
+            self.positive_slack.UB = gp.GRB.INFINITY
+            self.negative_slack.UB = gp.GRB.INFINITY
+            self.model.setObjective(self.positive_slack.sum() + self.negative_slack.sum())
+            self.model.optimize()
+
+        # Get the objective value and duals, before the original objective and slack bounds are restored
+        self.model_handle.solution = GurobiSolution(self.model)
+        error_message = get_error_message(self.model)
+        response = {"climate_year": self.climate_year, "is_feasible": is_feasible, "error_message": error_message}
+        if error_message is None:
+            response["objective"] = self.model.ObjVal
+            response["duals"] = self.linking_constraints.Pi
+        if not is_feasible:
+            self.positive_slack.UB = 0
+            self.negative_slack.UB = 0
+            self.model.setObjective(objective)
+
+        return response
+
+    def get_result_values(self, *, status):
+        """
+        Return the values of the temporal results and capacities of the last solution
+        """
+        return {"climate_year": self.climate_year, **get_result_values(self.model_handle, status=status)}
+
+
+def _run_subproblems_in_process(config, climate_years, *, connection, queue):
+    """
+    Build the subproblems of the climate years in a worker process and solve them for the values that are sent by the master problem
+    """
+    try:
+        subproblems = [ClimateYearSubproblem(config, climate_year, status=QueueStatus(queue, climate_year)) for climate_year in climate_years]
+        connection.send([{"climate_year": subproblem.climate_year, **subproblem.investment_data} for subproblem in subproblems])
+
+        # Handle the commands of the master problem until it stops the worker
+        while True:
+            command, values = connection.recv()
+            if command == "solve":
+                connection.send([subproblem.solve(values[subproblem.climate_year]) for subproblem in subproblems])
+            elif command == "get_result_values":
+                connection.send([subproblem.get_result_values(status=QueueStatus(queue, subproblem.climate_year)) for subproblem in subproblems])
+            else:
+                break
+    except Exception as exception:
+        connection.send(exception)
+
+
+def _receive_from_workers(connections, *, queue, status):
+    """
+    Wait for the responses of all workers, show their status updates in the meantime, and return the responses sorted by climate year
+    """
+    responses = []
+    for connection in connections:
+        while not connection.poll(0.5):
+            _show_worker_status_updates(queue, status)
+        response = connection.recv()
+
+        # Raise the exception of a worker in the main process
+        if isinstance(response, Exception):
+            raise response
+        responses.extend(response)
+
+    _show_worker_status_updates(queue, status)
+    return sorted(responses, key=lambda response: response["climate_year"])
+
+
+def _show_worker_status_updates(queue, status):
+    """
+    Show the status updates that were sent by the workers
+    """
+    while not queue.empty():
+        climate_year, text, status_type = queue.get()
+        status.update(f"Climate year {climate_year}: {text}", status_type=status_type)
+
+
+def _combine_result_values(result_values):
+    """
+    Return the result values of all climate years combined, the temporal results are concatenated and the mean results are averaged
+    """
+    combined_result_values = {key: result_values[0][key] for key in ["ires_capacity", "storage_capacity", "hydropower_capacity", "dispatchable_capacity", "electrolysis_capacity"]}
+    combined_result_values["temporal_results"] = {market_node: pd.concat([result_values_year["temporal_results"][market_node] for result_values_year in result_values]) for market_node in result_values[0]["temporal_results"]}
+    combined_result_values["temporal_export"] = {connection_type: pd.concat([result_values_year["temporal_export"][connection_type] for result_values_year in result_values]) for connection_type in ["hvac", "hvdc"]}
+
+    # All climate years have the same number of timestamps, so the mean over all years is the mean of the annual means
+    combined_result_values["mean_temporal_data"] = sum(result_values_year["mean_temporal_data"] for result_values_year in result_values) / len(result_values)
+    combined_result_values["interconnection_capacity"] = {connection_type: sum(result_values_year["interconnection_capacity"][connection_type] for result_values_year in result_values) / len(result_values) for connection_type in ["hvac", "hvdc"]}
+    return combined_result_values
+
+
+def optimize_decomposed(config, *, status, output_directory):
+    """
+    Solve the model with a Benders decomposition, with a master problem for the investments and a dispatch subproblem per climate year, and return a model handle without a model (the problems are always solved by Gurobi, since they are re-solved from the previous basis in each iteration)
+    """
+    assert validate.is_config(config)
+    assert validate.is_directory_path(output_directory)
+
+    # Create a dictionary to store the run duration of the different phases
+    duration = pd.Series(dtype="float64")
+    initializing_start = datetime.now()
+    model_handle = ModelHandle(None, config, duration=duration, results={})
+
+    # Initialize the 'model' subdirectory
+    (output_directory / "model").mkdir()
+
+    """
+    Step 1: Build the subproblems in the worker processes
+    """
+    status.update("Building the climate year subproblems")
+    climate_years = list(range(config["climate_years"]["start"], config["climate_years"]["end"] + 1))
+    worker_count = min(config["decomposition"]["worker_count"], len(climate_years))
+
+    # Split the threads over the workers
+    subproblem_config = {**config, "optimization": {**config["optimization"], "thread_count": max(config["optimization"]["thread_count"] // worker_count, 1)}}
+
+    # Spawn the worker processes, so each worker creates its own Gurobi environment, and divide the climate years over the workers
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    connections = []
+    processes = []
+    for worker_climate_years in np.array_split(climate_years, worker_count):
+        connection, worker_connection = context.Pipe()
+        process = context.Process(target=_run_subproblems_in_process, args=(subproblem_config, [int(climate_year) for climate_year in worker_climate_years]), kwargs={"connection": worker_connection, "queue": queue})
+        process.start()
+
+        # Close the connection of the worker in the main process, so the main process notices when a worker stops unexpectedly
+        worker_connection.close()
+        connections.append(connection)
+        processes.append(process)
+
+    try:
+        investment_data = _receive_from_workers(connections, queue=queue, status=status)
+
+        """
+        Step 2: Create the master problem
+        """
+        status.update("Creating the master problem")
+        master_model = gp.Model(f"{config['name']}_master")
+        master_model.setParam("OutputFlag", 0)
+        master_model.setParam("Threads", config["optimization"]["thread_count"])
+
+        # Create the investment variables and the constraints that only include investment variables (they are the same for all climate years)
+        investment_variables = master_model.addMVar(len(investment_data[0]["lower_bounds"]), lb=investment_data[0]["lower_bounds"], ub=investment_data[0]["upper_bounds"])
+        for sense in ["<", ">", "="]:
+            is_sense = investment_data[0]["senses"] == sense
+            if is_sense.any():
+                master_model.addMConstr(investment_data[0]["matrix"][is_sense], investment_variables, sense, investment_data[0]["rhs"][is_sense])
+
+        # Create the contribution of each climate year to the coupling constraints and ensure that their sum satisfies the constraints
+        coupling_senses = investment_data[0]["coupling_senses"]
+        coupling_variables = master_model.addMVar((len(climate_years), len(coupling_senses)), lb=-gp.GRB.INFINITY)
+        for coupling_index, sense in enumerate(coupling_senses):
+            master_model.addLConstr(gp.quicksum(coupling_variables[:, coupling_index].tolist()), sense, 0)
+
+        # Create a variable for the objective value of each climate year and minimize their mean
+        objective_values = master_model.addMVar(len(climate_years), lb=[investment_data_year["objective_lower_bound"] for investment_data_year in investment_data])
+        master_model.setObjective(objective_values.sum() / len(climate_years), gp.GRB.MINIMIZE)
+
+        # Add the initializing duration to the dictionary
+        initializing_end = datetime.now()
+        duration["initializing"] = (initializing_end - initializing_start).total_seconds()
+
+        """
+        Step 3: Solve the master problem and subproblems until the gap is small enough
+        """
+        optimizing_start = datetime.now()
+        iterations = []
+        best_upper_bound = np.inf
+        best_linking_values = None
+        linking_values = None
+        model_handle.error_message = f"The decomposition did not converge within {config['decomposition']['max_iterations']} iterations"
+        for iteration in range(1, config["decomposition"]["max_iterations"] + 1):
+            # Solve the master problem, the master problem is only infeasible if the complete model is infeasible
+            master_model.optimize()
+            if master_model.status != gp.GRB.OPTIMAL:
+                model_handle.error_message = get_error_message(master_model)
+                break
+            lower_bound = master_model.ObjVal
+
+            # Solve the subproblems for the investments and coupling contributions of the master problem
+            linking_values = {climate_year: np.concatenate([investment_variables.X, coupling_variables.X[index]]) for index, climate_year in enumerate(climate_years)}
+            for connection in connections:
+                connection.send(("solve", linking_values))
+            responses = _receive_from_workers(connections, queue=queue, status=status)
+
+            # Stop if one of the subproblems could not be solved
+            error_messages = [response["error_message"] for response in responses if response["error_message"] is not None]
+            if error_messages:
+                model_handle.error_message = error_messages[0]
+                break
+
+            # Add an optimality cut for each feasible subproblem and a feasibility cut for each infeasible subproblem
+            for index, response in enumerate(responses):
+                investment_duals, coupling_duals = np.split(response["duals"], [investment_variables.shape[0]])
+                cut_expression = investment_duals @ investment_variables + (coupling_duals @ coupling_variables[index] if len(coupling_senses) else 0)
+                cut_constant = response["objective"] - response["duals"] @ linking_values[response["climate_year"]]
+                if response["is_feasible"]:
+                    master_model.addConstr(objective_values[index] >= cut_expression + cut_constant)
+                else:
+                    master_model.addConstr(cut_expression + cut_constant <= 0)
+
+            # Update the best solution if all subproblems are feasible
+            is_feasible = all(response["is_feasible"] for response in responses)
+            upper_bound = sum(response["objective"] for response in responses) / len(climate_years) if is_feasible else np.inf
+            if upper_bound < best_upper_bound:
+                best_upper_bound = upper_bound
+                best_linking_values = linking_values
+
+            # Store the bounds of this iteration and stop if the relative gap is small enough
+            gap = (best_upper_bound - lower_bound) / abs(best_upper_bound) if np.isfinite(best_upper_bound) else np.inf
+            iterations.append({"iteration": iteration, "lower_bound": lower_bound, "upper_bound": upper_bound, "gap": gap, "feasibility_cuts": len(responses) - sum(response["is_feasible"] for response in responses)})
+            status.update(f"Iteration {iteration}: the gap is {gap:.2%}" if np.isfinite(gap) else f"Iteration {iteration}: no feasible investments found yet")
+            if gap <= config["decomposition"]["gap"]:
+                model_handle.error_message = None
+                break
+
+        # Store the bounds of each iteration
+        pd.DataFrame(iterations, columns=["iteration", "lower_bound", "upper_bound", "gap", "feasibility_cuts"]).set_index("iteration").to_csv(output_directory / "model" / "decomposition.csv")
+
+        # Add the optimizing duration to the dictionary
+        optimizing_end = datetime.now()
+        duration["optimizing"] = (optimizing_end - optimizing_start).total_seconds()
+
+        # Don't store the results if the decomposition ended with an error
+        if model_handle.error_message is not None:
+            return model_handle
+
+        """
+        Step 4: Store the results
+        """
+        storing_start = datetime.now()
+
+        # Solve the subproblems again for the best solution if the last iteration did not find the best solution
+        if linking_values is not best_linking_values:
+            for connection in connections:
+                connection.send(("solve", best_linking_values))
+            _receive_from_workers(connections, queue=queue, status=status)
+
+        # Get the results of all climate years and store them as the results of a single model
+        for connection in connections:
+            connection.send(("get_result_values", None))
+        result_values = _combine_result_values(_receive_from_workers(connections, queue=queue, status=status))
+        store_result_values(result_values, status=status, output_directory=output_directory, output_format=config["optimization"].get("output_format", "csv"))
+
+        # Add the storing duration to the dictionary
+        storing_end = datetime.now()
+        duration["storing"] = (storing_end - storing_start).total_seconds()
+
+        # Store the duration after the optimization
+        duration.to_csv(output_directory / "model" / "duration.csv")
+        return model_handle
+    finally:
+        # Stop the worker processes
+        for connection, process in zip(connections, processes):
+            if process.is_alive():
+                connection.send(("stop", None))
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
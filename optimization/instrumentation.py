@@ -0,0 +1,66 @@
+import re
+import time
+
+import pandas as pd
+import psutil
+
+# The patterns of the presolved model size in the Gurobi and HiGHS logs
+presolve_patterns = [r"Presolved: (\d+) rows, (\d+) columns, (\d+) nonzeros", r"rows (\d+)\(-?\d+\); columns (\d+)\(-?\d+\); (?:nonzeros|elements) (\d+)"]
+
+
+class Instrumentation:
+    """
+    Wall time, CPU time, and memory of each step of the model, and the size of the model before and after the presolve
+    """
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.steps = []
+        self.current_step = None
+        self.statistics = pd.Series(dtype="float64")
+
+    def start_step(self, step, *, market_node=None, technology=None):
+        """
+        Stop the current step and start measuring the next step
+        """
+        self.stop_step()
+        self.current_step = {"step": step, "market_node": market_node, "technology": technology, "wall_start": time.perf_counter(), "cpu_start": time.process_time(), "rss_start": self.process.memory_info().rss}
+
+    def stop_step(self):
+        """
+        Add the wall time, CPU time, and the resident memory of the process at the end of the current step and how much it increased during the step
+        """
+        if self.current_step is None:
+            return
+
+        # The resident set size is in bytes on every platform
+        step = self.current_step
+        rss = self.process.memory_info().rss
+        self.steps.append({"step": step["step"], "market_node": step["market_node"], "technology": step["technology"], "wall_time": time.perf_counter() - step["wall_start"], "cpu_time": time.process_time() - step["cpu_start"], "rss_MB": rss / 1024**2, "rss_increase_MB": (rss - step["rss_start"]) / 1024**2})
+        self.current_step = None
+
+    def add_model_statistics(self, model):
+        """
+        Add the number of variables, constraints, and non-zeros of the model
+        """
+        model.update()
+        for attribute in ["NumVars", "NumConstrs", "NumNZs"]:
+            self.statistics[attribute] = model.getAttr(attribute)
+
+    def add_presolve_statistics(self, log):
+        """
+        Add the number of rows, columns, and non-zeros of the presolved model from the solver log, the last presolve is used if the model was solved multiple times
+        """
+        for presolve_pattern in presolve_patterns:
+            matches = re.findall(presolve_pattern, log)
+            if matches:
+                self.statistics["PresolvedRows"], self.statistics["PresolvedColumns"], self.statistics["PresolvedNZs"] = [int(value) for value in matches[-1]]
+                return
+
+    def store(self, directory):
+        """
+        Store the steps and the model statistics in the directory
+        """
+        self.stop_step()
+        pd.DataFrame(self.steps, columns=["step", "market_node", "technology", "wall_time", "cpu_time", "rss_MB", "rss_increase_MB"]).to_csv(directory / "steps.csv", index=False)
+        self.statistics.to_csv(directory / "statistics.csv")
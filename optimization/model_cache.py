@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+
+import utils
+import validate
+from .model_handle import ModelHandle, _flatten_config
+from .solvers import gurobi_parameter_keys, set_gurobi_parameters
+
+# Config keys that don't affect the built model, so the cached model can be used if only these keys are different
+independent_keys = [*ModelHandle.independent_keys, *gurobi_parameter_keys, "optimization.solver", "optimization.model_cache", "decomposition.gap", "decomposition.max_iterations", "decomposition.worker_count"]
+
+
+class _ModelPickler(pickle.Pickler):
+    """
+    Pickler that stores the Gurobi variables, expressions, and constraints as references to the index of the variables and constraints in the model
+    """
+
+    def persistent_id(self, obj):
+        if type(obj) is gp.Var:
+            return ("Var", obj.index)
+        if type(obj) is gp.MVar:
+            return ("MVar", np.array([variable.index for variable in obj.reshape(-1).tolist()], dtype=int), obj.shape)
+        if type(obj) is gp.LinExpr:
+            return ("LinExpr", [obj.getVar(index).index for index in range(obj.size())], [obj.getCoeff(index) for index in range(obj.size())], obj.getConstant())
+        if type(obj) is gp.Constr:
+            return ("Constr", obj.index)
+        return None
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """
+    Unpickler that replaces the references to the index of the variables and constraints by the variables and constraints of the loaded model
+    """
+
+    def __init__(self, file, *, variables, constraints):
+        super().__init__(file)
+        self.variables = variables
+        self.constraints = constraints
+
+    def persistent_load(self, pid):
+        if pid[0] == "Var":
+            return self.variables[pid[1]]
+        if pid[0] == "MVar":
+            return gp.MVar.fromlist([self.variables[index] for index in pid[1]]).reshape(pid[2])
+        if pid[0] == "LinExpr":
+            return gp.LinExpr(pid[2], [self.variables[index] for index in pid[1]]) + pid[3]
+        if pid[0] == "Constr":
+            return self.constraints[pid[1]]
+        raise pickle.UnpicklingError(f"Unknown persistent ID: {pid[0]}")
+
+
+def _get_cache_directory(config, *, climate_year):
+    """
+    Return the cache directory of the model, the key is based on the config keys that affect the model and the modification time and size of the input and source files
+    """
+    assert validate.is_config(config)
+
+    # Only include the config keys that affect the model
+    model_config = {key: value for key, value in _flatten_config(config).items() if key not in independent_keys}
+
+    # Include the input files and the source files of the model builder and the utils it uses to read and prepare the input data, so the cache is invalidated when any of them change
+    input_directory = utils.path("input")
+    source_directory = Path(__file__).parent
+    source_filepaths = [*sorted(filepath for filepath in (input_directory / "scenarios" / config["scenario"]).rglob("*") if filepath.is_file()), input_directory / "countries.yaml", input_directory / "technologies.yaml", *sorted(source_directory.glob("*.py")), *sorted((source_directory.parent / "utils").glob("*.py"))]
+    sources = [{"filepath": str(filepath), "modified": filepath.stat().st_mtime_ns, "size": filepath.stat().st_size} for filepath in source_filepaths]
+
+    key = hashlib.sha256(json.dumps({"config": model_config, "climate_year": climate_year, "sources": sources}, sort_keys=True, default=str).encode()).hexdigest()
+    return utils.path("input", "cache", "models", key)
+
+
+def _remove_least_recently_used_models(*, max_size):
+    """
+    Remove the least recently used cached models until the total size of the model cache is below the maximum size
+    """
+    assert validate.is_integer(max_size, min_value=0)
+
+    # Get when the cached models were last used (the modification time of the directory is updated when a model is loaded) and their size, skip the models that are removed by another process in the meantime
+    last_used = {}
+    sizes = {}
+    for directory in utils.path("input", "cache", "models").iterdir():
+        if not directory.is_dir() or directory.suffix == ".tmp":
+            continue
+        try:
+            last_used[directory] = directory.stat().st_mtime
+            sizes[directory] = sum(filepath.stat().st_size for filepath in directory.iterdir())
+        except FileNotFoundError:
+            last_used.pop(directory, None)
+    total_size = sum(sizes[directory] for directory in last_used)
+
+    # Remove the oldest models until the cache fits again
+    for directory in sorted(last_used, key=last_used.get):
+        if total_size <= max_size:
+            break
+        total_size -= sizes[directory]
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def load_cached_model(config, *, climate_year=None):
+    """
+    Return the model handle of the cached model for the config, or None if the model has not been cached yet
+    """
+    assert validate.is_config(config)
+
+    loading_start = datetime.now()
+    cache_directory = _get_cache_directory(config, climate_year=climate_year)
+    if not (cache_directory / "mapping.pickle").is_file():
+        return None
+
+    # Mark the model as recently used and read it in the default environment, so no extra license session is started, it's a cache miss if another process removed the model in the meantime
+    try:
+        os.utime(cache_directory)
+        model = gp.read(str(cache_directory / "model.mps"))
+        file = open(cache_directory / "mapping.pickle", "rb")
+    except FileNotFoundError:
+        return None
+    except gp.GurobiError:
+        if not (cache_directory / "model.mps").is_file():
+            return None
+        raise
+    model.ModelName = config["name"]
+
+    # Don't log the solve to the console, as for a built model
+    model.setParam("OutputFlag", 0)
+
+    # Get the variables and constraints of the model in the order of the built model, the names are used since the order in the MPS file can differ
+    with file:
+        names = pickle.load(file)
+        variables_by_name = dict(zip(model.getAttr("VarName", model.getVars()), model.getVars()))
+        constraints_by_name = dict(zip(model.getAttr("ConstrName", model.getConstrs()), model.getConstrs()))
+        variables = [variables_by_name[variable_name] for variable_name in names["variables"]]
+        constraints = [constraints_by_name[constraint_name] for constraint_name in names["constraints"]]
+
+        # Load the objects that are required to store the results and the named constraint groups
+        cached_data = _ModelUnpickler(file, variables=variables, constraints=constraints).load()
+
+    # Create the model handle, only the solver parameters can be changed without rebuilding the model
+    model_handle = ModelHandle(model, config, duration=pd.Series(dtype="float64"), results=cached_data["results"])
+    model_handle.constraints = cached_data["constraints"]
+    set_gurobi_parameters(model, config)
+    for parameter_key in gurobi_parameter_keys:
+        model_handle.add_parameter_callback(parameter_key, lambda config: set_gurobi_parameters(model, config))
+
+    # Add the loading duration and cache hit to the dictionary
+    model_handle.duration["initializing"] = (datetime.now() - loading_start).total_seconds()
+    model_handle.duration["cache_hit"] = 1
+    return model_handle
+
+
+def store_cached_model(model_handle, *, climate_year=None, max_size=10 * 1024**3):
+    """
+    Store the model as an MPS file with the objects that are required to store its results, and remove the least recently used models if the cache is too large
+    """
+    assert isinstance(model_handle, ModelHandle)
+    assert validate.is_integer(max_size, min_value=0)
+
+    cache_directory = _get_cache_directory(model_handle.config, climate_year=climate_year)
+    if cache_directory.is_dir():
+        return
+
+    # Write the model and mapping to a temporary directory first, so other processes never read a partially written model
+    model = model_handle.model
+    model.update()
+    temporary_directory = cache_directory.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    temporary_directory.mkdir(parents=True)
+    model.write(str(temporary_directory / "model.mps"))
+    with open(temporary_directory / "mapping.pickle", "wb") as file:
+        pickle.dump({"variables": model.getAttr("VarName", model.getVars()), "constraints": model.getAttr("ConstrName", model.getConstrs())}, file)
+        _ModelPickler(file).dump({"results": model_handle.results, "constraints": model_handle.constraints})
+
+    # Move the model to the cache, unless another process has just cached the same model
+    try:
+        os.replace(temporary_directory, cache_directory)
+    except OSError:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+    # Remove the least recently used models if the cache is too large
+    _remove_least_recently_used_models(max_size=max_size)
@@ -0,0 +1,141 @@
+from copy import deepcopy
+from datetime import datetime
+
+import gurobipy as gp
+import pandas as pd
+
+from .instrumentation import Instrumentation
+
+
+class ModelHandle:
+    """
+    Built Gurobi model with its named constraint groups, the objects required to store its results, and the parameters that can be changed without rebuilding the model
+    """
+
+    # Config keys that don't affect the model
+    independent_keys = ["name", "upload_results", "send_notification", "optimization.store_model", "optimization.output_format"]
+
+    def __init__(self, model, config, *, duration, results):
+        self.model = model
+        self.config = deepcopy(config)
+        self.duration = duration
+        self.results = results
+
+        # The wall time, CPU time, and peak memory of each step and the size of the model
+        self.instrumentation = Instrumentation()
+
+        # The solution and error message of the last time the model was solved
+        self.solution = None
+        self.error_message = None
+
+        # The constraints of the model that depend on the parameters, grouped by name
+        self.constraints = {}
+
+        # Each parameter has a list of functions that update the model and a list of conditions that have to be met to update the model
+        self.parameters = {}
+
+    def _get_parameter(self, key):
+        if key not in self.parameters:
+            self.parameters[key] = {"updates": [], "conditions": []}
+        return self.parameters[key]
+
+    def add_constraints(self, name, constraints):
+        """
+        Add constraints to a named constraint group
+        """
+        self.constraints.setdefault(name, []).extend(constraints)
+
+    def add_constraint_parameter(self, key, constraint, expression):
+        """
+        Register a parameter that is multiplied by the expression on the right-hand side of the constraint (constraint: ... == parameter * expression)
+        """
+        expression = gp.LinExpr(expression)
+        coefficients = {}
+
+        def update(old_value, new_value):
+            # Process the pending changes first, so the current coefficients and right-hand side can be retrieved
+            self.model.update()
+
+            # Sum the coefficients per variable, since a variable can occur multiple times in an expression (variables can only be hashed after they are added to the model)
+            if not coefficients:
+                for index in range(expression.size()):
+                    variable = expression.getVar(index)
+                    coefficients[variable] = coefficients.get(variable, 0) + expression.getCoeff(index)
+
+            # Update the coefficients of the variables in the expression and the right-hand side for the constant of the expression
+            for variable, coefficient in coefficients.items():
+                self.model.chgCoeff(constraint, variable, self.model.getCoeff(constraint, variable) - (new_value - old_value) * coefficient)
+            constraint.RHS += (new_value - old_value) * expression.getConstant()
+
+        self._get_parameter(key)["updates"].append(update)
+
+    def add_bound_parameter(self, key, variables, upper_bounds):
+        """
+        Register a parameter that is multiplied by the upper bounds to get the upper bounds of the variables
+        """
+        upper_bounds = pd.Series(upper_bounds).to_numpy()
+        self._get_parameter(key)["updates"].append(lambda old_value, new_value: self.model.setAttr("UB", variables, (new_value * upper_bounds).tolist()))
+
+    def add_parameter_callback(self, key, callback):
+        """
+        Register a function that is called with the new config when the parameter changes
+        """
+        self._get_parameter(key)["updates"].append(lambda old_value, new_value: callback(self.config))
+
+    def add_parameter_condition(self, key, condition):
+        """
+        Register a function that returns if the model can be updated to the new value of the parameter, instead of having to be rebuilt
+        """
+        self._get_parameter(key)["conditions"].append(condition)
+
+    def update(self, config):
+        """
+        Update the model to the new config and return if it succeeded, if the config changes the structure of the model it has to be rebuilt
+        """
+        updating_start = datetime.now()
+
+        # A decomposed model has no single model that can be updated
+        if self.model is None:
+            return False
+
+        # Find the changed keys, except for the keys that don't affect the model
+        old_values = _flatten_config(self.config)
+        new_values = _flatten_config(config)
+        changed_keys = [key for key in old_values.keys() | new_values.keys() if old_values.get(key) != new_values.get(key) and key not in self.independent_keys]
+
+        # Keep the model as it is if none of the parameters changed, only reset the duration and the steps of the previous solve
+        if not changed_keys:
+            self.config = deepcopy(config)
+            self.duration = pd.Series({"initializing": (datetime.now() - updating_start).total_seconds()}, dtype="float64")
+            self.instrumentation = Instrumentation()
+            return True
+
+        # Check if all changed parameters can be updated
+        for key in changed_keys:
+            if key not in self.parameters or not all(condition(new_values.get(key)) for condition in self.parameters[key]["conditions"]):
+                return False
+
+        # Update the config before the updates are applied, so the callbacks can use the new config
+        self.config = deepcopy(config)
+        for key in sorted(changed_keys):
+            for update in self.parameters[key]["updates"]:
+                update(old_values.get(key), new_values.get(key))
+        self.model.update()
+
+        # Reset the duration with the time it took to update the model, and the steps since the model is not built again
+        self.duration = pd.Series({"initializing": (datetime.now() - updating_start).total_seconds()}, dtype="float64")
+        self.instrumentation = Instrumentation()
+        return True
+
+
+def _flatten_config(config, *, prefix=""):
+    """
+    Return a dictionary with the dotted key and value of each leaf in the config
+    """
+    flat_config = {}
+    for key, value in config.items():
+        if isinstance(value, dict):
+            flat_config.update(_flatten_config(value, prefix=f"{prefix}{key}."))
+        else:
+            flat_config[f"{prefix}{key}"] = value
+    return flat_config
@@ -0,0 +1,167 @@
+from copy import deepcopy
+
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+
+import validate
+from .optimize import build_model, solve_model
+
+
+def _get_capacity_variables(results):
+    """
+    Return a dictionary with the capacity variables of the model, the keys are the same for all resolutions
+    """
+    capacities = {
+        **{("ires", market_node): capacity for market_node, capacity in results["ires_capacity"].items()},
+        ("dispatchable",): results["dispatchable_capacity"],
+        **{("storage", market_node): capacity for market_node, capacity in results["storage_capacity"].items()},
+        ("electrolysis",): results["electrolysis_capacity"],
+        **{("interconnection", connection_type): capacity[["extra"]] for connection_type, capacity in results["interconnection_capacity"].items()},
+    }
+
+    # Only include the capacities that are variables (fixed and left out capacities are numbers)
+    capacity_variables = {}
+    for key, capacity in capacities.items():
+        for index in capacity.index:
+            for column_name in capacity.columns:
+                if isinstance(capacity.loc[index, column_name], gp.Var):
+                    capacity_variables[(*key, index, column_name)] = capacity.loc[index, column_name]
+    return capacity_variables
+
+
+def _apply_previous_capacities(model_handle, previous_capacities, *, capacity_margin):
+    """
+    Use the capacities of the previous stage as the start of the primal simplex method, and if a margin is given, limit the capacities to the margin around the previous capacities and return the capacity variables whose bounds were tightened (the primal start is ignored by the default barrier method, so then the stages are only coupled through the bounds)
+    """
+    model = model_handle.model
+    capacity_variables = _get_capacity_variables(model_handle.results)
+    keys = [key for key in capacity_variables if key in previous_capacities]
+    variables = [capacity_variables[key] for key in keys]
+    values = np.array([previous_capacities[key] for key in keys])
+
+    # Set the capacities as the primal start values and start the other variables at zero (Gurobi only uses a complete primal start, in the primal simplex method)
+    model.update()
+    model.setAttr("PStart", model.getVars(), 0)
+    model.setAttr("PStart", variables, values.tolist())
+    model.setParam("LPWarmStart", 2)
+
+    # Tighten the bounds of the capacities that were not zero (a capacity that is not required at a coarser resolution, like short-term storage, can still be required at a finer resolution)
+    # The barrier method without crossover returns an interior solution, so capacities that are not required are tiny positive numbers instead of exact zeros
+    if capacity_margin is None:
+        return []
+    is_positive = values > max(1e-6 * values.max(initial=0), 1e-3)
+    lower_bounds = np.array(model.getAttr("LB", variables))
+    upper_bounds = np.array(model.getAttr("UB", variables))
+    model.setAttr("LB", variables, np.where(is_positive, np.clip((1 - capacity_margin) * values, lower_bounds, upper_bounds), lower_bounds).tolist())
+    model.setAttr("UB", variables, np.where(is_positive, np.clip((1 + capacity_margin) * values, lower_bounds, upper_bounds), upper_bounds).tolist())
+    return [variable for variable, is_bounded in zip(variables, is_positive) if is_bounded]
+
+
+def _count_capacities_at_bounds(model_handle, bounded_variables):
+    """
+    Return the number of bounded capacity variables whose optimal value is at its tightened lower or upper bound, if it's not zero the result can be suboptimal
+    """
+    if not bounded_variables:
+        return 0
+    values = np.array(model_handle.solution.get_values(bounded_variables))
+    lower_bounds = np.array(model_handle.model.getAttr("LB", bounded_variables))
+    upper_bounds = np.array(model_handle.model.getAttr("UB", bounded_variables))
+    return int((np.isclose(values, lower_bounds, rtol=1e-4) | np.isclose(values, upper_bounds, rtol=1e-4)).sum())
+
+
+def _get_capacity_values(model_handle):
+    """
+    Return a dictionary with the optimal value of each capacity variable
+    """
+    capacity_variables = _get_capacity_variables(model_handle.results)
+    return dict(zip(capacity_variables.keys(), model_handle.solution.get_values(list(capacity_variables.values()))))
+
+
+def _calculate_capacity_drift(previous_capacities, capacities):
+    """
+    Return the sum of the absolute changes in the capacities relative to the sum of the previous capacities
+    """
+    keys = [key for key in capacities if key in previous_capacities]
+    previous_values = np.array([previous_capacities[key] for key in keys])
+    values = np.array([capacities[key] for key in keys])
+    return np.abs(values - previous_values).sum() / max(np.abs(previous_values).sum(), 1e-9)
+
+
+def optimize_multi_resolution(config, *, status, output_directory):
+    """
+    Solve the model at increasingly finer resolutions and return the model handle of the final resolution, each stage starts from the capacities of the previous stage
+    """
+    assert validate.is_config(config)
+    assert validate.is_directory_path(output_directory)
+
+    # Only solve the coarse resolutions that are coarser than the resolution of the config, from coarse to fine
+    resolution = config["resolution"]
+    coarse_resolutions = sorted([coarse_resolution for coarse_resolution in config["multi_resolution"]["resolutions"] if pd.Timedelta(coarse_resolution) > pd.Timedelta(resolution)], key=pd.Timedelta, reverse=True)
+    capacity_margin = config["multi_resolution"].get("capacity_margin")
+
+    # Store the durations and capacity drift of the coarse stages, so they can be added to the duration of the final stage
+    stage_duration = pd.Series(dtype="float64")
+    previous_capacities = None
+
+    """
+    Step 1: Solve the coarse stages
+    """
+    for coarse_resolution in coarse_resolutions:
+        status.update(f"Solving the {coarse_resolution} stage")
+        stage_config = deepcopy(config)
+        stage_config["resolution"] = coarse_resolution
+        del stage_config["multi_resolution"]
+
+        # Build the stage model and start from the capacities of the previous stage
+        stage_model_handle = build_model(stage_config, status=status)
+        if previous_capacities is not None:
+            _apply_previous_capacities(stage_model_handle, previous_capacities, capacity_margin=capacity_margin)
+
+        # Solve the stage and store its results in a subdirectory, so they can be compared with the final results
+        stage_output_directory = output_directory / "stages" / coarse_resolution
+        stage_output_directory.mkdir(parents=True)
+        error_message = solve_model(stage_model_handle, status=status, output_directory=stage_output_directory)
+        for phase, phase_duration in stage_model_handle.duration.items():
+            if phase != "cache_hit":
+                stage_duration[f"{phase}_{coarse_resolution}"] = phase_duration
+
+        # Continue with the capacities of the previous stage if the stage could not be solved
+        if error_message is not None:
+            status.update(f"The {coarse_resolution} stage could not be solved: {error_message}", status_type="warning")
+            continue
+
+        # Calculate how much the capacities changed compared to the previous stage
+        capacities = _get_capacity_values(stage_model_handle)
+        if previous_capacities is not None:
+            stage_duration[f"capacity_drift_{coarse_resolution}"] = _calculate_capacity_drift(previous_capacities, capacities)
+        previous_capacities = capacities
+
+    """
+    Step 2: Solve the final stage
+    """
+    status.update(f"Solving the {resolution} stage")
+    final_config = deepcopy(config)
+    del final_config["multi_resolution"]
+    model_handle = build_model(final_config, status=status)
+    bounded_variables = []
+    if previous_capacities is not None:
+        bounded_variables = _apply_previous_capacities(model_handle, previous_capacities, capacity_margin=capacity_margin)
+
+    # Add the durations of the coarse stages before the duration is stored
+    for key, value in stage_duration.items():
+        model_handle.duration[key] = value
+    model_handle.error_message = solve_model(model_handle, status=status, output_directory=output_directory)
+
+    # Reset the warm start parameter, so a re-solve of the returned model handle doesn't start from the capacities of the coarse stages
+    if previous_capacities is not None:
+        model_handle.model.setParam("LPWarmStart", 1)
+
+    # Add the capacity drift of the final stage and the number of capacities that ended at their bound to the stored duration, so a restricted result can be told apart from an optimal one
+    if model_handle.error_message is None and previous_capacities is not None:
+        model_handle.duration[f"capacity_drift_{resolution}"] = _calculate_capacity_drift(previous_capacities, _get_capacity_values(model_handle))
+        if capacity_margin is not None:
+            model_handle.duration[f"capacities_at_bound_{resolution}"] = _count_capacities_at_bounds(model_handle, bounded_variables)
+        model_handle.duration.to_csv(output_directory / "model" / "duration.csv")
+
+    return model_handle
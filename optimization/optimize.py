@@ -1,66 +1,166 @@
 import re
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 
 import gurobipy as gp
 import numpy as np
 import pandas as pd
-import streamlit as st
+import scipy.sparse
 
 import utils
 import validate
+from .model_cache import load_cached_model, store_cached_model
+from .model_handle import ModelHandle
+from .representative_periods import RepresentativePeriods
+from .solver_log import SolverLog
+from .solvers import GurobiSolution, gurobi_parameter_keys, set_gurobi_parameters, set_tuned_parameters, solve_with_highs
+from .temporal_expression import TemporalExpression, TemporalExpressionDict
 
 
-def optimize(config, *, status, output_directory):
+def optimize(config, *, status, output_directory, model_handle=None):
     """
-    Create and run the model
+    Create and run the model, or update and run the model of the model handle if only its parameters have changed, and return the model handle
     """
     assert validate.is_config(config)
     assert validate.is_directory_path(output_directory)
 
+    # Only build the model if there is no model handle or the config changes the structure of its model
+    if model_handle is None or not model_handle.update(config):
+        model_handle = build_model(config, status=status)
+
+    # Solve the model and store the error message in the model handle
+    model_handle.error_message = solve_model(model_handle, status=status, output_directory=output_directory)
+    return model_handle
+
+
+def build_model(config, *, status, climate_year=None):
+    """
+    Create the model and return it as a model handle, so it can be updated and solved again for another config (if a climate year is given, the model only includes the timestamps of that year)
+    """
+    assert validate.is_config(config)
+
+    # Load the model from the cache if it has already been built for the same config and input files
+    use_model_cache = config["optimization"].get("model_cache", False)
+    if use_model_cache:
+        model_handle = load_cached_model(config, climate_year=climate_year)
+        if model_handle is not None:
+            return model_handle
+
     # Create a dictionary to store the run duration of the different phases
     duration = pd.Series(dtype="float64")
     initializing_start = datetime.now()
 
+    # Check if the time series should be aggregated into representative periods
+    time_aggregation = config.get("time_aggregation")
+
+    # Check if the constraints should be created with the matrix API instead of a constraint per timestamp (the representative periods and climate year subproblems are only supported by the vectorized builder)
+    vectorized_builder = config["optimization"].get("vectorized_builder", False) or time_aggregation is not None or climate_year is not None
+
+    # Get the climate years that are included in the model
+    climate_years = range(config["climate_years"]["start"], config["climate_years"]["end"] + 1) if climate_year is None else [climate_year]
+
     # Check if the interconnections should be optimized individually
     optimize_individual_interconnections = config["interconnections"]["optimize_individual_interconnections"] is True and config["interconnections"]["relative_capacity"] != 1
 
     # Calculate the interval length in hours
     interval_length = pd.Timedelta(config["resolution"]).total_seconds() / 3600
 
+    # Check if the variables and constraints that can only be zero or are always satisfied should be left out of the model, and count how many are left out per category
+    reduce_model = config["optimization"].get("reduce_model", False)
+    model_reduction = pd.DataFrame(0, index=["electrolysis", "ires", "interconnections", "storage"], columns=["variables", "constraints"])
+
+    # Check if there is any hydrogen demand (the dispatchable technologies that use hydrogen as fuel also create a hydrogen demand)
+    has_hydrogen_demand = config.get("relative_hydrogen_demand", 0) != 0 or any(utils.get_technology(dispatchable_technology)["fuel_costs"] == "hydrogen" for dispatchable_technology in config["technologies"]["dispatchable"])
+
     """
     Step 1: Create the model and set the parameters
     """
     model = gp.Model(config["name"])
     model.setParam("OutputFlag", 0)
 
-    # Set the user defined parameters
-    model.setParam("Threads", config["optimization"]["thread_count"])
-    model.setParam("Method", config["optimization"]["method"])
-    if config["optimization"]["method"] == 2:
-        model.setParam("BarConvTol", config["optimization"]["barrier_convergence_tolerance"])
-        model.setParam("BarIterLimit", config["optimization"]["max_barrier_iterations"])
+    # Create the model handle, the results are added after the model has been built
+    model_handle = ModelHandle(model, config, duration=duration, results={})
+
+    # Measure the wall time, CPU time, and peak memory of each step
+    instrumentation = model_handle.instrumentation
+    instrumentation.start_step("1")
 
-    # Disable crossover and set BarHomogeneous and Aggregate
-    model.setParam("Crossover", 0)
-    model.setParam("BarHomogeneous", 1)  # Don't know what this does, but it speeds up some more complex models
-    model.setParam("Aggregate", 0)  # Don't know what this does, but it speeds up some more complex models
-    model.setParam("Presolve", 2)  # Use an aggressive presolver
-    model.setParam("NumericFocus", 1)
+    # Set the solver parameters and register them, so they can be changed without rebuilding the model
+    set_gurobi_parameters(model, config)
+    for parameter_key in gurobi_parameter_keys:
+        model_handle.add_parameter_callback(parameter_key, lambda config: set_gurobi_parameters(model, config))
 
     """
     Step 2: Get the temporal demand data
     """
+    instrumentation.start_step("2")
     status.update("Importing demand data")
-    # Get the temporal demand and remove leap days
+    # Get the temporal demand resampled to the required resolution and without leap days
     demand_filepath = utils.path("input", "scenarios", config["scenario"], "demand.csv")
-    temporal_demand_electricity = utils.read_temporal_data(demand_filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"]).resample(config["resolution"]).mean()
-    temporal_demand_electricity = temporal_demand_electricity[~((temporal_demand_electricity.index.month == 2) & (temporal_demand_electricity.index.day == 29))]
+    temporal_demand_electricity = utils.read_resampled_temporal_data(demand_filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"], resolution=config["resolution"])
     # Remove all market nodes that are not part of the optimization
     market_nodes = utils.get_market_nodes_for_countries(config["country_codes"])
     temporal_demand_electricity = temporal_demand_electricity[market_nodes]
 
-    # Create a series with the mean hydrogen demand per market node
-    mean_demand_hydrogen = config.get("relative_hydrogen_demand", 0) * temporal_demand_electricity.mean()
+    # Calculate the mean electricity demand and create a series with the mean hydrogen demand per market node
+    mean_demand_electricity = temporal_demand_electricity.mean()
+    mean_demand_hydrogen = config.get("relative_hydrogen_demand", 0) * mean_demand_electricity
+
+    # Only keep the timestamps of the climate year if the model is a subproblem for a single year (the mean demand remains the mean of all climate years)
+    if climate_year is not None:
+        temporal_demand_electricity = temporal_demand_electricity[temporal_demand_electricity.index.year == climate_year]
+
+    """
+    Step 2B: Cluster the time series into representative periods
+    """
+    instrumentation.start_step("2B")
+    # Store the original timestamps, the model only includes the timestamps of the representative periods if the time series are aggregated
+    temporal_timestamps = temporal_demand_electricity.index
+    representative_periods = None
+    aggregation_error = None
+    if time_aggregation is not None:
+        status.update("Clustering the representative periods")
+
+        # Get all time series that are used in the model
+        clustering_data = {f"demand_{market_node}": temporal_demand_electricity[market_node] for market_node in market_nodes}
+        for market_node in market_nodes:
+            ires_filepath = utils.path("input", "scenarios", config["scenario"], "ires", f"{market_node}.csv")
+            ires_capacity_factors = utils.read_resampled_temporal_data(ires_filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"], resolution=config["resolution"])
+            for column_name in ires_capacity_factors.columns:
+                if any(column_name.startswith(f"{ires_technology}_") for ires_technology in config["technologies"]["ires"]):
+                    clustering_data[column_name] = ires_capacity_factors[column_name]
+            for hydropower_technology in config["technologies"]["hydropower"]:
+                filepath = utils.path("input", "scenarios", config["scenario"], "hydropower", hydropower_technology, f"{market_node}.csv")
+                if filepath.is_file():
+                    temporal_hydropower_data = utils.read_resampled_temporal_data(filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"], resolution=config["resolution"])
+                    clustering_data[f"inflow_{hydropower_technology}_{market_node}"] = temporal_hydropower_data["inflow_MWh"].reindex(temporal_timestamps).ffill().bfill()
+            for connection_type in ["hvac", "hvdc"]:
+                temporal_export_limits = utils.get_export_limits(market_node, connection_type=connection_type, index=temporal_timestamps, config=config)
+                for market_node1, market_node2 in temporal_export_limits.columns:
+                    clustering_data[f"export_limit_{connection_type}_{market_node1}_{market_node2}"] = temporal_export_limits[market_node1, market_node2]
+        clustering_data = pd.DataFrame(clustering_data, index=temporal_timestamps).fillna(0)
+
+        # Cluster the periods and only keep the timestamps of the representative periods in the demand data
+        period_length = max(int(pd.Timedelta(time_aggregation["period"]) / pd.Timedelta(config["resolution"])), 1)
+        representative_timestamps = utils.get_representative_timestamps(clustering_data, period_length=period_length, period_count=time_aggregation["period_count"])
+        representative_periods = RepresentativePeriods(representative_timestamps, period_length=period_length)
+        temporal_demand_electricity = temporal_demand_electricity.loc[representative_periods.index]
+
+        # Calculate the aggregation error of each time series as the error in its mean and the root mean square error relative to its range (a constant series, like an IRES technology without potential, is represented exactly, so its range is replaced by 1 to prevent a division by zero)
+        represented_clustering_data = representative_periods.expand(clustering_data.loc[representative_periods.index])
+        clustering_data_range = (clustering_data.max() - clustering_data.min()).replace(0, 1)
+        aggregation_error = pd.DataFrame({"relative_mean_error": (represented_clustering_data.mean() - clustering_data.mean()) / clustering_data_range, "relative_rmse": ((represented_clustering_data - clustering_data) ** 2).mean() ** 0.5 / clustering_data_range})
+
+        # Check that the representative timestamps represent themselves and that a constant series has no aggregation error
+        assert represented_clustering_data.loc[representative_periods.index].equals(clustering_data.loc[representative_periods.index])
+        assert np.allclose(aggregation_error[clustering_data.nunique() == 1], 0)
+
+    # Calculate the number of original timestamps each timestamp in the model represents and the weights to calculate the mean of a temporal expression
+    timestamp_weights = np.ones(len(temporal_demand_electricity.index)) if representative_periods is None else representative_periods.weights
+    mean_weights = timestamp_weights / timestamp_weights.sum()
+
+    # Create a dictionary to store the start level variables of the storage and reservoirs per market node, which are required to calculate their levels in the original periods
+    period_levels = {market_node: [] for market_node in market_nodes}
 
 
     """
@@ -82,23 +182,46 @@ def optimize(config, *, status, output_directory):
         Step 3A: Import the temporal data
         """
         country_flag = utils.get_country_property(utils.get_country_of_market_node(market_node), "flag")
+        instrumentation.start_step("3A", market_node=market_node)
         status.update(f"{country_flag} Importing IRES data")
 
-        # Get the temporal data and resample to the required resolution
+        # Get the temporal data resampled to the required resolution and without leap days
         ires_filepath = utils.path("input", "scenarios", config["scenario"], "ires", f"{market_node}.csv")
-        ires_capacity_factors = utils.read_temporal_data(ires_filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"]).resample(config["resolution"]).mean()
-        # Remove the leap days from the dataset that could have been introduced by the resample method
-        ires_capacity_factors = ires_capacity_factors[~((ires_capacity_factors.index.month == 2) & (ires_capacity_factors.index.day == 29))]
-        # Create a temporal_results DataFrame with the demand_total_MW and demand_electricity_MW columns
-        temporal_results[market_node] = pd.DataFrame(temporal_demand_electricity[market_node].rename("demand_total_MW"))
-        temporal_results[market_node]["demand_electricity_MW"] = temporal_results[market_node].demand_total_MW
+        ires_capacity_factors = utils.read_resampled_temporal_data(ires_filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"], resolution=config["resolution"])
+        # Create a temporal_results DataFrame with the demand_total_MW and demand_electricity_MW columns (the vectorized builder stores a temporal expression per column instead of a DataFrame with Gurobi objects)
+        if vectorized_builder:
+            temporal_results[market_node] = TemporalExpressionDict(temporal_demand_electricity.index)
+            temporal_results[market_node]["demand_total_MW"] = temporal_demand_electricity[market_node]
+        else:
+            temporal_results[market_node] = pd.DataFrame(temporal_demand_electricity[market_node].rename("demand_total_MW"))
+        temporal_results[market_node]["demand_electricity_MW"] = temporal_results[market_node]["demand_total_MW"]
 
         """
         Step 3B: Define the electrolysis variables
         """
         for electrolysis_technology in config["technologies"]["electrolysis"]:
+            instrumentation.start_step("3B", market_node=market_node, technology=electrolysis_technology)
             status.update(f"{country_flag} Adding {utils.format_technology(electrolysis_technology)} electrolysis")
 
+            # Leave out the electrolysis if there is no hydrogen demand, since the electrolysis demand can only be zero
+            if reduce_model and not has_hydrogen_demand:
+                electrolysis_capacity.loc[market_node, electrolysis_technology] = 0
+                temporal_results[market_node][f"demand_{electrolysis_technology}_MW"] = 0
+                model_reduction.loc["electrolysis"] += [len(temporal_demand_electricity.index) + 1, len(temporal_demand_electricity.index)]
+                continue
+
+            if vectorized_builder:
+                # Create the matrix variables for the electrolysis production capacity and temporal electrolysis demand
+                electrolysis_capacity_market_node = model.addMVar(1)
+                temporal_electrolysis_demand = model.addMVar(len(temporal_demand_electricity.index))
+                electrolysis_capacity.loc[market_node, electrolysis_technology] = electrolysis_capacity_market_node.tolist()[0]
+                temporal_results[market_node][f"demand_{electrolysis_technology}_MW"] = TemporalExpression.from_variables(temporal_electrolysis_demand)
+                temporal_results[market_node]["demand_total_MW"] += TemporalExpression.from_variables(temporal_electrolysis_demand)
+
+                # Ensure that the temporal electrolysis demand does not exceed the electrolysis capacity (the capacity is broadcast over all timestamps)
+                model.addConstr(temporal_electrolysis_demand <= electrolysis_capacity_market_node)
+                continue
+
             # Create the variable for the electrolysis production capacity
             electrolysis_capacity_market_node = model.addVar()
             electrolysis_capacity.loc[market_node, electrolysis_technology] = electrolysis_capacity_market_node
@@ -119,12 +242,35 @@ def optimize(config, *, status, output_directory):
 
         temporal_results[market_node]["generation_ires_MW"] = 0
         for ires_technology in config["technologies"]["ires"]:
+            instrumentation.start_step("3C", market_node=market_node, technology=ires_technology)
             status.update(f"{country_flag} Adding {utils.format_technology(ires_technology, capitalize=False)} generation")
 
             # Create a capacity variable for each IRES node
             ires_nodes = [re.match(f"{ires_technology}_(.+)_cf", column).group(1) for column in ires_capacity_factors.columns if column.startswith(f"{ires_technology}_")]
-            ires_potential = utils.get_potential_per_ires_node(market_node, ires_technology, mean_demand=temporal_demand_electricity.mean(), config=config)
+            ires_potential = utils.get_potential_per_ires_node(market_node, ires_technology, mean_demand=mean_demand_electricity, config=config)
             current_capacity = utils.get_current_capacity_per_ires_node(market_node, ires_technology, config=config)
+
+            # Leave out the IRES nodes if the technology has no potential in this market node, since their capacity can only be zero
+            if reduce_model and ires_potential == 0:
+                for ires_node in ires_nodes:
+                    ires_capacity[market_node].loc[ires_node, ires_technology] = 0
+                temporal_results[market_node][f"generation_{ires_technology}_MW"] = 0
+                model_reduction.loc["ires", "variables"] += len(ires_nodes)
+                continue
+
+            if vectorized_builder:
+                # Create the capacity variables and add them to the ires_capacity DataFrame
+                capacities = model.addMVar(len(ires_nodes), lb=current_capacity, ub=ires_potential)
+                for ires_node, capacity in zip(ires_nodes, capacities.tolist()):
+                    ires_capacity[market_node].loc[ires_node, ires_technology] = capacity
+
+                # Calculate the temporal generation as the product of the dense (timestamps x IRES nodes) capacity factor matrix and the capacity variables
+                capacity_factors = ires_capacity_factors.loc[temporal_demand_electricity.index, [f"{ires_technology}_{ires_node}_cf" for ires_node in ires_nodes]].to_numpy()
+                temporal_ires_generation = TemporalExpression.from_variables(capacities, capacity_factors)
+                temporal_results[market_node][f"generation_{ires_technology}_MW"] = temporal_ires_generation
+                temporal_results[market_node]["generation_ires_MW"] += temporal_ires_generation
+                continue
+
             capacities = model.addVars(ires_nodes, lb=current_capacity, ub=ires_potential)
 
             # Add the capacities to the ires_capacity DataFrame and calculate the temporal generation for a specific technology
@@ -142,6 +288,7 @@ def optimize(config, *, status, output_directory):
         temporal_results[market_node]["generation_dispatchable_MW"] = 0
 
         for dispatchable_technology in config["technologies"]["dispatchable"]:
+            instrumentation.start_step("3D", market_node=market_node, technology=dispatchable_technology)
             status.update(f"{country_flag} Adding {utils.format_technology(dispatchable_technology, capitalize=False)} generation")
 
             # Create the variable for the dispatchable generation capacity
@@ -157,20 +304,32 @@ def optimize(config, *, status, output_directory):
             dispatchable_capacity.loc[market_node, dispatchable_technology] = dispatchable_capacity_market_node
 
             # Create the temporal dispatchable generation variables
-            temporal_dispatchable_generation = pd.Series(model.addVars(temporal_demand_electricity.index))
+            if vectorized_builder:
+                temporal_dispatchable_generation_matrix = model.addMVar(len(temporal_demand_electricity.index))
+                temporal_dispatchable_generation = TemporalExpression.from_variables(temporal_dispatchable_generation_matrix)
+            else:
+                temporal_dispatchable_generation = pd.Series(model.addVars(temporal_demand_electricity.index))
             temporal_results[market_node][f"generation_{dispatchable_technology}_MW"] = temporal_dispatchable_generation
             temporal_results[market_node]["generation_dispatchable_MW"] += temporal_dispatchable_generation
 
+            # Calculate the mean generation of this technology
+            if vectorized_builder:
+                mean_electricity_generation_technology = temporal_dispatchable_generation.weighted_sum(mean_weights)
+            else:
+                mean_electricity_generation_technology = gp.quicksum(temporal_dispatchable_generation) / len(temporal_dispatchable_generation.index)
+
             # If the technology uses hydrogen, add the required hydrogen to mean_demand_hydrogen
             if utils.get_technology(dispatchable_technology)["fuel_costs"] == "hydrogen":
-                mean_electricity_generation_technology = gp.quicksum(temporal_dispatchable_generation) / len(temporal_dispatchable_generation.index)
                 mean_demand_hydrogen.loc[market_node] += mean_electricity_generation_technology / utils.get_technology(dispatchable_technology)["efficiency"]
 
             # Add the mean generation of this technology
-            dispatchable_generation_mean.loc[market_node, dispatchable_technology] = gp.quicksum(temporal_dispatchable_generation) / len(temporal_dispatchable_generation.index)
+            dispatchable_generation_mean.loc[market_node, dispatchable_technology] = mean_electricity_generation_technology
 
             # Ensure that the temporal generation does not exceed the dispatchable capacity
-            model.addConstrs(temporal_dispatchable_generation[timestamp] <= dispatchable_capacity_market_node for timestamp in temporal_demand_electricity.index)
+            if vectorized_builder:
+                model.addConstr(temporal_dispatchable_generation_matrix <= dispatchable_capacity_market_node)
+            else:
+                model.addConstrs(temporal_dispatchable_generation[timestamp] <= dispatchable_capacity_market_node for timestamp in temporal_demand_electricity.index)
 
         """
         Step 3D: Define the hydropower variables and constraints
@@ -184,6 +343,7 @@ def optimize(config, *, status, output_directory):
         temporal_results[market_node]["energy_stored_total_hydropower_MWh"] = 0
 
         for hydropower_technology in config["technologies"]["hydropower"]:
+            instrumentation.start_step("3D", market_node=market_node, technology=hydropower_technology)
             status.update(f"{country_flag} Adding {utils.format_technology(hydropower_technology, capitalize=False)} hydropower")
 
             # Get the specific hydropower assumptions and calculate the interval length
@@ -207,23 +367,19 @@ def optimize(config, *, status, output_directory):
                 temporal_results[market_node][f"energy_stored_{hydropower_technology}_hydropower_MWh"] = 0
                 continue
 
-            # Get the temporal hydropower data
+            # Get the temporal hydropower data resampled to the selected resolution and without leap days
             filepath = utils.path("input", "scenarios", config["scenario"], "hydropower", hydropower_technology, f"{market_node}.csv")
-            temporal_hydropower_data = utils.read_temporal_data(filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"])
-            # Calculate the interval length of the hydropower data
-            hydropower_interval_length = (temporal_hydropower_data.index[1] - temporal_hydropower_data.index[0]).total_seconds() / 3600
-            # Resample the hydropower data to the selected resolution
-            temporal_hydropower_data = temporal_hydropower_data.resample(config["resolution"]).mean()
-            # Remove the leap days from the dataset that could have been introduced by the resample method
-            temporal_hydropower_data = temporal_hydropower_data[~((temporal_hydropower_data.index.month == 2) & (temporal_hydropower_data.index.day == 29))]
+            temporal_hydropower_data = utils.read_resampled_temporal_data(filepath, start_year=config["climate_years"]["start"], end_year=config["climate_years"]["end"], resolution=config["resolution"])
+            # Get the interval length of the original hydropower data
+            hydropower_interval_length = temporal_hydropower_data.attrs["interval_length"]
             # Find and add the rows that are missing in the previous results (the resample method does not add rows after the last timestamp and some weeks don't start on January 1st)
-            for timestamp in temporal_results[market_node].index.difference(temporal_hydropower_data.index):
+            for timestamp in temporal_timestamps.difference(temporal_hydropower_data.index):
                 temporal_hydropower_data.loc[timestamp] = pd.Series([], dtype="float64")  # Sets None to all columns in the new row
             # Sort the DataFrame on its index (the first days of January, when missing, are added to the end of the DataFrame)
             temporal_hydropower_data = temporal_hydropower_data.sort_index()
 
-            # Calculate the average inflow in MW
-            inflow_MW = temporal_hydropower_data["inflow_MWh"].ffill().bfill() / hydropower_interval_length
+            # Calculate the average inflow in MW for the timestamps of the temporal results
+            inflow_MW = temporal_hydropower_data["inflow_MWh"].ffill().bfill().loc[temporal_demand_electricity.index] / hydropower_interval_length
 
             # Set the net hydropower generation to the inflow if there is no reservoir capacity
             if reservoir_capacity == 0:
@@ -235,12 +391,20 @@ def optimize(config, *, status, output_directory):
             # Create temporal variables for the turbine flow
             min_turbine_flow = temporal_hydropower_data.min_generation_MW.ffill().bfill().fillna(0)
             max_turbine_flow = temporal_hydropower_data.max_generation_MW.ffill().bfill().fillna(turbine_capacity)
-            turbine_flow = pd.Series(model.addVars(temporal_hydropower_data.index, lb=min_turbine_flow, ub=max_turbine_flow))
+            if vectorized_builder:
+                turbine_flow_matrix = model.addMVar(len(temporal_demand_electricity.index), lb=min_turbine_flow.loc[temporal_demand_electricity.index].to_numpy(), ub=max_turbine_flow.loc[temporal_demand_electricity.index].to_numpy())
+                turbine_flow = TemporalExpression.from_variables(turbine_flow_matrix)
+            else:
+                turbine_flow = pd.Series(model.addVars(temporal_hydropower_data.index, lb=min_turbine_flow, ub=max_turbine_flow))
 
             # Create temporal variables for the pump flow
             min_pump_flow = temporal_hydropower_data.min_pumping_MW.ffill().bfill().fillna(0)
             max_pump_flow = temporal_hydropower_data.max_pumping_MW.ffill().bfill().fillna(pump_capacity)
-            pump_flow = pd.Series(model.addVars(temporal_hydropower_data.index, lb=min_pump_flow, ub=max_pump_flow))
+            if vectorized_builder:
+                pump_flow_matrix = model.addMVar(len(temporal_demand_electricity.index), lb=min_pump_flow.loc[temporal_demand_electricity.index].to_numpy(), ub=max_pump_flow.loc[temporal_demand_electricity.index].to_numpy())
+                pump_flow = TemporalExpression.from_variables(pump_flow_matrix)
+            else:
+                pump_flow = pd.Series(model.addVars(temporal_hydropower_data.index, lb=min_pump_flow, ub=max_pump_flow))
 
             # Add the net hydropower generation variables to the temporal_results DataFrame
             net_flow = turbine_flow - pump_flow
@@ -248,13 +412,99 @@ def optimize(config, *, status, output_directory):
             temporal_results[market_node]["generation_total_hydropower_MW"] += net_flow
 
             # Create the hydropower spillage variables and add them to the temporal_results DataFrame (probably only required for Portugal)
-            spillage_MW = pd.Series(model.addVars(temporal_hydropower_data.index))
+            if vectorized_builder:
+                spillage_MW_matrix = model.addMVar(len(temporal_demand_electricity.index))
+                spillage_MW = TemporalExpression.from_variables(spillage_MW_matrix)
+            else:
+                spillage_MW = pd.Series(model.addVars(temporal_hydropower_data.index))
             temporal_results[market_node]["spillage_total_hydropower_MW"] += spillage_MW
 
             # Get the turbine and pump efficiency
             turbine_efficiency = hydropower_assumptions.get("turbine_efficiency", 0)
             pump_efficiency = hydropower_assumptions.get("pump_efficiency", 0)
 
+            if vectorized_builder and representative_periods is not None:
+                # Calculate the minimum and maximum reservoir level in each original period (NaN bounds are ignored)
+                min_reservoir_level = temporal_hydropower_data.loc[temporal_timestamps, "min_reservoir_soc"].fillna(0).groupby(representative_periods.periods).min().to_numpy() * reservoir_capacity
+                max_reservoir_level = temporal_hydropower_data.loc[temporal_timestamps, "max_reservoir_soc"].fillna(1).groupby(representative_periods.periods).max().to_numpy() * reservoir_capacity
+
+                # Create the reservoir level variables relative to the start of the representative period and add the reservoir level constraints with regard to the previous timestamp
+                intra_period_reservoir = model.addMVar(len(temporal_demand_electricity.index), lb=-gp.GRB.INFINITY)
+                reservoir_balance = representative_periods.shifted_difference_matrix() @ intra_period_reservoir + interval_length * spillage_MW_matrix + (interval_length / turbine_efficiency) * turbine_flow_matrix - (interval_length * pump_efficiency) * pump_flow_matrix
+                model.addConstr(reservoir_balance == inflow_MW.to_numpy() * interval_length)
+
+                # Link the reservoir levels of the original periods (the reservoir is not cyclic)
+                start_reservoir = representative_periods.add_level_constraints(model, intra_period_reservoir, min_levels=min_reservoir_level, max_levels=max_reservoir_level, cyclic=False)
+
+                # Fix the reservoir level at the first timestamp with a fixed reservoir level in each original period (clipped between the min and max SOC like the other builders)
+                reservoir_soc = temporal_hydropower_data.loc[temporal_timestamps, "reservoir_soc"].to_numpy()
+                min_reservoir_soc = temporal_hydropower_data.loc[temporal_timestamps, "min_reservoir_soc"].to_numpy()
+                max_reservoir_soc = temporal_hydropower_data.loc[temporal_timestamps, "max_reservoir_soc"].to_numpy()
+                fixed_reservoir_soc = np.where(min_reservoir_soc > reservoir_soc, min_reservoir_soc, reservoir_soc)
+                fixed_reservoir_soc = np.where(max_reservoir_soc < fixed_reservoir_soc, max_reservoir_soc, fixed_reservoir_soc)
+                fixed_positions = np.flatnonzero(~np.isnan(reservoir_soc))
+                fixed_periods, first_fixed_positions = np.unique(representative_periods.periods[fixed_positions], return_index=True)
+                if len(fixed_periods) > 0:
+                    fixed_positions = fixed_positions[first_fixed_positions]
+                    model.addConstr(start_reservoir[fixed_periods] + intra_period_reservoir[representative_periods.positions[fixed_positions]] == fixed_reservoir_soc[fixed_positions] * reservoir_capacity)
+
+                # Add the temporal reservoir levels to the temporal_results DataFrame (the start level is the mean of the represented original periods)
+                temporal_reservoir = TemporalExpression.from_variables(intra_period_reservoir) + TemporalExpression.from_variables(start_reservoir, representative_periods.mean_level_matrix())
+                temporal_results[market_node][f"energy_stored_{hydropower_technology}_hydropower_MWh"] = temporal_reservoir
+                temporal_results[market_node]["energy_stored_total_hydropower_MWh"] += temporal_reservoir
+                period_levels[market_node].append(([f"energy_stored_{hydropower_technology}_hydropower_MWh", "energy_stored_total_hydropower_MWh"], start_reservoir))
+                continue
+
+            if vectorized_builder:
+                # Find the timestamps with a fixed reservoir level and clip the fixed level between the min and max SOC (NaN bounds are ignored, like the built-in min and max functions do)
+                reservoir_soc = temporal_hydropower_data.loc[temporal_demand_electricity.index, "reservoir_soc"].to_numpy()
+                min_reservoir_soc = temporal_hydropower_data.loc[temporal_demand_electricity.index, "min_reservoir_soc"].to_numpy()
+                max_reservoir_soc = temporal_hydropower_data.loc[temporal_demand_electricity.index, "max_reservoir_soc"].to_numpy()
+                is_fixed_reservoir_soc = ~np.isnan(reservoir_soc)
+                fixed_reservoir_soc = np.where(min_reservoir_soc > reservoir_soc, min_reservoir_soc, reservoir_soc)
+                fixed_reservoir_soc = np.where(max_reservoir_soc < fixed_reservoir_soc, max_reservoir_soc, fixed_reservoir_soc)
+                fixed_reservoir_level = np.where(is_fixed_reservoir_soc, fixed_reservoir_soc * reservoir_capacity, 0)
+
+                # Create a reservoir SOC variable for each timestamp without a fixed reservoir level
+                variable_reservoir_soc = model.addMVar(int((~is_fixed_reservoir_soc).sum()), lb=np.nan_to_num(min_reservoir_soc[~is_fixed_reservoir_soc], nan=0), ub=np.nan_to_num(max_reservoir_soc[~is_fixed_reservoir_soc], nan=1))
+                variable_reservoir_soc_index = np.cumsum(~is_fixed_reservoir_soc) - 1
+
+                # Only add a reservoir level constraint if there is a previous timestamp and its level is not fixed at zero
+                timestamp_count = len(temporal_demand_electricity.index)
+                current_positions = np.arange(1, timestamp_count)
+                current_positions = current_positions[~is_fixed_reservoir_soc[current_positions - 1] | (fixed_reservoir_level[current_positions - 1] != 0)]
+                previous_positions = current_positions - 1
+                constraint_rows = np.arange(len(current_positions))
+
+                # Flip the sign of the rows with a fixed current level, so the rows are exactly equal to the ones of the loop-based builder
+                current_is_variable = ~is_fixed_reservoir_soc[current_positions]
+                previous_is_variable = ~is_fixed_reservoir_soc[previous_positions]
+                row_sign = np.where(current_is_variable, 1.0, -1.0)
+
+                # Create the shifted-difference matrix for the reservoir SOC variables (current level minus previous level)
+                soc_rows = np.concatenate([constraint_rows[current_is_variable], constraint_rows[previous_is_variable]])
+                soc_columns = np.concatenate([variable_reservoir_soc_index[current_positions[current_is_variable]], variable_reservoir_soc_index[previous_positions[previous_is_variable]]])
+                soc_values = np.concatenate([np.full(current_is_variable.sum(), reservoir_capacity), np.full(previous_is_variable.sum(), -reservoir_capacity)]) * row_sign[soc_rows]
+                soc_matrix = scipy.sparse.csr_matrix((soc_values, (soc_rows, soc_columns)), shape=(len(constraint_rows), variable_reservoir_soc.shape[0]))
+
+                # Create the selection matrix that picks the flows of the current timestamp
+                flow_matrix = scipy.sparse.csr_matrix((row_sign, (constraint_rows, current_positions)), shape=(len(constraint_rows), timestamp_count))
+
+                # Add the reservoir level constraints with regard to the previous timestamp
+                reservoir_rhs = (inflow_MW.to_numpy()[current_positions] * interval_length - fixed_reservoir_level[current_positions] + fixed_reservoir_level[previous_positions]) * row_sign
+                reservoir_balance = (interval_length * flow_matrix) @ spillage_MW_matrix + (interval_length / turbine_efficiency * flow_matrix) @ turbine_flow_matrix - (interval_length * pump_efficiency * flow_matrix) @ pump_flow_matrix
+                if variable_reservoir_soc.shape[0] > 0:
+                    reservoir_balance += soc_matrix @ variable_reservoir_soc
+                if len(constraint_rows) > 0:
+                    model.addConstr(reservoir_balance == reservoir_rhs)
+
+                # Add the temporal reservoir levels to the temporal_results DataFrame (the selection matrix maps each reservoir SOC variable to its timestamp)
+                reservoir_selection_matrix = scipy.sparse.csr_matrix((np.full(variable_reservoir_soc.shape[0], reservoir_capacity), (np.flatnonzero(~is_fixed_reservoir_soc), np.arange(variable_reservoir_soc.shape[0]))), shape=(timestamp_count, variable_reservoir_soc.shape[0]))
+                temporal_reservoir = TemporalExpression.from_variables(variable_reservoir_soc, reservoir_selection_matrix) + fixed_reservoir_level
+                temporal_results[market_node][f"energy_stored_{hydropower_technology}_hydropower_MWh"] = temporal_reservoir
+                temporal_results[market_node]["energy_stored_total_hydropower_MWh"] += temporal_reservoir
+                continue
+
             # Loop over all hours
             reservoir_previous = None
             temporal_reservoir_dict = {}
@@ -298,6 +548,7 @@ def optimize(config, *, status, output_directory):
 
         # Add the variables and constraints for all storage technologies
         for storage_technology in config["technologies"]["storage"]:
+            instrumentation.start_step("3E", market_node=market_node, technology=storage_technology)
             status.update(f"{country_flag} Adding {utils.format_technology(storage_technology, capitalize=False)} storage")
 
             # Get the specific storage assumptions
@@ -305,8 +556,14 @@ def optimize(config, *, status, output_directory):
             efficiency = storage_assumptions["roundtrip_efficiency"] ** 0.5
 
             # Create a variable for the energy and power storage capacity
-            energy_capacity = model.addVar()
-            power_capacity = model.addVar()
+            if vectorized_builder:
+                energy_capacity_matrix = model.addMVar(1)
+                power_capacity_matrix = model.addMVar(1)
+                energy_capacity = energy_capacity_matrix.tolist()[0]
+                power_capacity = power_capacity_matrix.tolist()[0]
+            else:
+                energy_capacity = model.addVar()
+                power_capacity = model.addVar()
 
             # Add the energy and power capacity to the storage DataFrame
             storage_capacity[market_node].loc[storage_technology, "energy"] = energy_capacity
@@ -316,6 +573,46 @@ def optimize(config, *, status, output_directory):
             model.addConstr(energy_capacity >= storage_assumptions["min_energy_power_ratio"] * power_capacity)
             model.addConstr(energy_capacity <= storage_assumptions["max_energy_power_ratio"] * power_capacity)
 
+            if vectorized_builder:
+                timestamp_count = len(temporal_demand_electricity.index)
+
+                # Create the matrix variables for the inflow, outflow, and stored energy (with representative periods the stored energy is relative to the start of the period, so it can be negative)
+                inflow_matrix = model.addMVar(timestamp_count)
+                outflow_matrix = model.addMVar(timestamp_count)
+                temporal_energy_stored_matrix = model.addMVar(timestamp_count, lb=0 if representative_periods is None else -gp.GRB.INFINITY)
+
+                if representative_periods is None:
+                    # Add the SOC constraints as a cyclic shifted difference (the first timestamp is related to the last timestamp)
+                    shifted_difference_matrix = scipy.sparse.identity(timestamp_count, format="csr") - scipy.sparse.eye(timestamp_count, k=-1, format="csr") - scipy.sparse.eye(timestamp_count, k=timestamp_count - 1, format="csr")
+                    model.addConstr(shifted_difference_matrix @ temporal_energy_stored_matrix - (efficiency * interval_length) * inflow_matrix + (interval_length / efficiency) * outflow_matrix == 0)
+
+                    # Add the energy capacity constraints (the capacity is broadcast over all timestamps, and the minimum is already ensured by the lower bound if it's zero)
+                    if reduce_model and storage_assumptions["soc_min"] == 0:
+                        model_reduction.loc["storage", "constraints"] += timestamp_count
+                    else:
+                        model.addConstr(temporal_energy_stored_matrix >= storage_assumptions["soc_min"] * energy_capacity_matrix)
+                    model.addConstr(temporal_energy_stored_matrix <= storage_assumptions["soc_max"] * energy_capacity_matrix)
+                else:
+                    # Add the SOC constraints within each representative period and link the original periods cyclically, so the energy can also be stored between periods
+                    model.addConstr(representative_periods.shifted_difference_matrix() @ temporal_energy_stored_matrix - (efficiency * interval_length) * inflow_matrix + (interval_length / efficiency) * outflow_matrix == 0)
+                    start_energy_stored = representative_periods.add_level_constraints(model, temporal_energy_stored_matrix, min_levels=storage_assumptions["soc_min"] * energy_capacity_matrix, max_levels=storage_assumptions["soc_max"] * energy_capacity_matrix, cyclic=True)
+                    period_levels[market_node].append(([f"energy_stored_{storage_technology}_MWh", "energy_stored_total_MWh"], start_energy_stored))
+
+                # Add the power capacity constraints (the capacity is broadcast over all timestamps)
+                model.addConstr(inflow_matrix <= power_capacity_matrix)
+                model.addConstr(outflow_matrix <= power_capacity_matrix)
+
+                # Add the net storage flow and stored energy to the temporal_results DataFrame
+                net_flow = TemporalExpression.from_variables(inflow_matrix) - TemporalExpression.from_variables(outflow_matrix)
+                temporal_results[market_node][f"net_storage_flow_{storage_technology}_MW"] = net_flow
+                temporal_results[market_node]["net_storage_flow_total_MW"] += net_flow
+                temporal_energy_stored = TemporalExpression.from_variables(temporal_energy_stored_matrix)
+                if representative_periods is not None:
+                    temporal_energy_stored += TemporalExpression.from_variables(start_energy_stored, representative_periods.mean_level_matrix())
+                temporal_results[market_node][f"energy_stored_{storage_technology}_MWh"] = temporal_energy_stored
+                temporal_results[market_node]["energy_stored_total_MWh"] += temporal_energy_stored
+                continue
+
             # Create the inflow and outflow variables
             inflow = pd.Series(model.addVars(temporal_demand_electricity.index))
             outflow = pd.Series(model.addVars(temporal_demand_electricity.index))
@@ -331,6 +628,11 @@ def optimize(config, *, status, output_directory):
             # Set the previous energy level to the last energy level
             energy_stored_previous = temporal_energy_stored.tail(1).item()
 
+            # The minimum energy capacity constraints are already ensured by the lower bound if the minimum state of charge is zero
+            add_soc_min_constraints = not reduce_model or storage_assumptions["soc_min"] != 0
+            if not add_soc_min_constraints:
+                model_reduction.loc["storage", "constraints"] += len(temporal_demand_electricity.index)
+
             # Loop over all hours
             for timestamp in temporal_demand_electricity.index:
                 # Create the state of charge variables
@@ -340,7 +642,8 @@ def optimize(config, *, status, output_directory):
                 model.addConstr(energy_stored_current == energy_stored_previous + (inflow[timestamp] * efficiency - outflow[timestamp] / efficiency) * interval_length)
 
                 # Add the energy capacity constraints (can't be added when the flow variables are defined because it's a gurobipy.Var)
-                model.addConstr(energy_stored_current >= storage_assumptions["soc_min"] * energy_capacity)
+                if add_soc_min_constraints:
+                    model.addConstr(energy_stored_current >= storage_assumptions["soc_min"] * energy_capacity)
                 model.addConstr(energy_stored_current <= storage_assumptions["soc_max"] * energy_capacity)
 
                 # Add the power capacity constraints (can't be added when the flow variables are defined because it's a gurobipy.Var)
@@ -358,7 +661,10 @@ def optimize(config, *, status, output_directory):
         Step 3F: Define the interconnection variables
         """
         # Create empty DataFrames for the interconnections, if they don't exist yet
-        if not len(temporal_export):
+        if not len(temporal_export) and vectorized_builder:
+            temporal_export["hvac"] = TemporalExpressionDict(temporal_results[market_node].index)
+            temporal_export["hvdc"] = TemporalExpressionDict(temporal_results[market_node].index)
+        elif not len(temporal_export):
             temporal_export_columns = pd.MultiIndex.from_tuples([], names=["from", "to"])
             temporal_export["hvac"] = pd.DataFrame(index=temporal_results[market_node].index, columns=temporal_export_columns)
             temporal_export["hvdc"] = pd.DataFrame(index=temporal_results[market_node].index, columns=temporal_export_columns)
@@ -370,16 +676,27 @@ def optimize(config, *, status, output_directory):
             interconnection_capacity["hvdc"] = pd.DataFrame(index=interconnection_capacity_index, columns=["current", "extra"])
 
         for connection_type in ["hvac", "hvdc"]:
+            instrumentation.start_step("3F", market_node=market_node, technology=connection_type)
             status.update(f"{country_flag} Adding {connection_type.upper()} interconnections")
             # Get the export limits
-            temporal_export_limits = utils.get_export_limits(market_node, connection_type=connection_type, index=temporal_results[market_node].index, config=config)
+            temporal_export_limits = utils.get_export_limits(market_node, connection_type=connection_type, index=temporal_timestamps, config=config).loc[temporal_demand_electricity.index]
 
             for temporal_export_limit_column_name in temporal_export_limits.columns:
                 # Get the current temporal export limits
                 temporal_export_limit = temporal_export_limits[temporal_export_limit_column_name]
 
                 # Add the interconnection capacities to the DataFrames and create the temporal interconnection variables
-                if optimize_individual_interconnections:
+                if optimize_individual_interconnections and vectorized_builder:
+                    # Create a variable for the extra interconnection capacity
+                    extra_interconnection_capacity = model.addMVar(1)
+                    # Add the mean current and extra interconnection capacity to the interconnection capacity DataFrame
+                    interconnection_capacity[connection_type].loc[temporal_export_limit_column_name, "current"] = temporal_export_limit.mean()
+                    interconnection_capacity[connection_type].loc[temporal_export_limit_column_name, "extra"] = extra_interconnection_capacity.tolist()[0]
+                    # Create the export variables and limit them to the current and extra capacity (the extra capacity is broadcast over all timestamps)
+                    temporal_export_matrix = model.addMVar(len(temporal_export[connection_type].index))
+                    model.addConstr(temporal_export_matrix - extra_interconnection_capacity <= temporal_export_limit.to_numpy())
+                    temporal_export[connection_type][temporal_export_limit_column_name] = TemporalExpression.from_variables(temporal_export_matrix)
+                elif optimize_individual_interconnections:
                     # Create a variable for the extra interconnection capacity
                     extra_interconnection_capacity = model.addVar()
                     # Add the mean current and extra interconnection capacity to the interconnection capacity DataFrame
@@ -394,19 +711,40 @@ def optimize(config, *, status, output_directory):
                     # Add the mean current and extra interconnection capacity to the interconnection capacity DataFrame
                     interconnection_capacity[connection_type].loc[temporal_export_limit_column_name, "current"] = temporal_export_limit.mean()
                     interconnection_capacity[connection_type].loc[temporal_export_limit_column_name, "extra"] = (config["interconnections"]["relative_capacity"] - 1) * temporal_export_limit.mean()
-                    # Multiply the export limits with the relative capacity factor
+                    # Multiply the export limits with the relative capacity factor (the current export limits are kept to update the relative capacity later)
+                    current_temporal_export_limit = temporal_export_limit.copy()
                     temporal_export_limit *= config["interconnections"]["relative_capacity"]
+                    # Only create the export variables for the timestamps at which the current export limit is not zero if the model is reduced (the relative capacity doesn't change which limits are zero)
+                    is_available = current_temporal_export_limit.to_numpy() != 0 if reduce_model else np.ones(len(current_temporal_export_limit), dtype=bool)
+                    model_reduction.loc["interconnections", "variables"] += (~is_available).sum()
                     # Create the variables for the export variables
-                    temporal_export[connection_type][temporal_export_limit_column_name] = pd.Series(model.addVars(temporal_export[connection_type].index, ub=temporal_export_limit))
+                    if vectorized_builder and not is_available.all():
+                        # Map the export variables to their timestamps with a sparse selection matrix, the export is zero at the other timestamps
+                        temporal_export_matrix = model.addMVar(is_available.sum(), ub=temporal_export_limit.to_numpy()[is_available])
+                        selection_matrix = scipy.sparse.identity(len(is_available), format="csr")[:, is_available]
+                        temporal_export[connection_type][temporal_export_limit_column_name] = TemporalExpression.from_variables(temporal_export_matrix, selection_matrix)
+                        temporal_export_variables = temporal_export_matrix.tolist()
+                    elif vectorized_builder:
+                        temporal_export_matrix = model.addMVar(len(temporal_export[connection_type].index), ub=temporal_export_limit.to_numpy())
+                        temporal_export[connection_type][temporal_export_limit_column_name] = TemporalExpression.from_variables(temporal_export_matrix)
+                        temporal_export_variables = temporal_export_matrix.tolist()
+                    else:
+                        temporal_export_variables = model.addVars(temporal_export[connection_type].index[is_available], ub=temporal_export_limit[is_available])
+                        temporal_export[connection_type][temporal_export_limit_column_name] = pd.Series(temporal_export_variables).reindex(temporal_export[connection_type].index, fill_value=0)
+                        temporal_export_variables = list(temporal_export_variables.values())
+                    # Register the relative capacity as the factor of the upper bounds of the export variables
+                    model_handle.add_bound_parameter("interconnections.relative_capacity", temporal_export_variables, current_temporal_export_limit[is_available])
 
                 # Copy the temporal export DataFrame, so it does not get too fragmented
-                temporal_export[connection_type] = temporal_export[connection_type].copy()
+                if not vectorized_builder:
+                    temporal_export[connection_type] = temporal_export[connection_type].copy()
 
     """
     Step 4: Define demand constraints
     """
     for market_node in market_nodes:
         country_flag = utils.get_country_property(utils.get_country_of_market_node(market_node), "flag")
+        instrumentation.start_step("4", market_node=market_node)
         status.update(f"{country_flag} Adding demand constraints")
 
         # Add a column for the total temporal export
@@ -431,58 +769,93 @@ def optimize(config, *, status, output_directory):
                 temporal_results[market_node][column_name] += export_flow
 
         # Calculate the lost load per hour
-        if "voll" in config:
+        if "voll" in config and vectorized_builder:
+            lost_load_matrix = model.addMVar(len(temporal_export[connection_type].index), ub=temporal_demand_electricity[market_node].to_numpy())
+            lost_load_MW = TemporalExpression.from_variables(lost_load_matrix)
+        elif "voll" in config:
             lost_load_MW = pd.Series(model.addVars(temporal_export[connection_type].index, ub=temporal_results[market_node].demand_electricity_MW))
         else:
             lost_load_MW = pd.Series(0, index=temporal_export[connection_type].index)
         temporal_results[market_node].insert(temporal_results[market_node].columns.get_loc("generation_ires_MW"), "lost_load_MW", lost_load_MW)
 
         # Add the demand constraint
-        temporal_results[market_node].apply(lambda row: model.addConstr(row.generation_ires_MW + row.generation_dispatchable_MW + row.generation_total_hydropower_MW - row.net_storage_flow_total_MW - row.net_export_MW >= row.demand_total_MW - row.lost_load_MW), axis=1)
+        if vectorized_builder:
+            demand_balance = temporal_results[market_node]["generation_ires_MW"] + temporal_results[market_node]["generation_dispatchable_MW"] + temporal_results[market_node]["generation_total_hydropower_MW"] - temporal_results[market_node]["net_storage_flow_total_MW"] - temporal_results[market_node]["net_export_MW"] - temporal_results[market_node]["demand_total_MW"] + temporal_results[market_node]["lost_load_MW"]
+            model.addConstr(demand_balance.to_matrix_expression() >= 0)
+        else:
+            temporal_results[market_node].apply(lambda row: model.addConstr(row.generation_ires_MW + row.generation_dispatchable_MW + row.generation_total_hydropower_MW - row.net_storage_flow_total_MW - row.net_export_MW >= row.demand_total_MW - row.lost_load_MW), axis=1)
 
         # Calculate the curtailed energy per hour
-        curtailed_MW = temporal_results[market_node].generation_ires_MW + temporal_results[market_node].generation_dispatchable_MW + temporal_results[market_node].generation_total_hydropower_MW - temporal_results[market_node].demand_total_MW - temporal_results[market_node].net_storage_flow_total_MW - temporal_results[market_node].net_export_MW
+        curtailed_MW = temporal_results[market_node]["generation_ires_MW"] + temporal_results[market_node]["generation_dispatchable_MW"] + temporal_results[market_node]["generation_total_hydropower_MW"] - temporal_results[market_node]["demand_total_MW"] - temporal_results[market_node]["net_storage_flow_total_MW"] - temporal_results[market_node]["net_export_MW"]
         temporal_results[market_node].insert(temporal_results[market_node].columns.get_loc("generation_ires_MW"), "curtailed_MW", curtailed_MW)
 
     """
     Step 5: Define the hydrogen constraint
     """
+    instrumentation.start_step("5")
     # Check if any of the countries has a hydrogen demand
     no_hydrogen_demand = not mean_demand_hydrogen.apply(lambda row: validate.is_gurobi_variable(row) or row != 0).any()
 
     # Create the hydrogen constraint per year
     if not no_hydrogen_demand:
-        for year in range(config["climate_years"]["start"], config["climate_years"]["end"] + 1):
+        for year in climate_years:
             status.update(f"Adding hydrogen constraint for {year}")
 
             annual_hydrogen_demand = 0
             annual_hydrogen_production = 0
 
             for market_node in market_nodes:
-                # Calculate the summed results of this market node for this year
-                summed_results_year = temporal_results[market_node][temporal_results[market_node].index.year == year].sum() * interval_length
+                # Calculate the summed results of this market node for this year (with representative periods each timestamp is weighted by the number of timestamps it represents in this year)
+                is_year = temporal_results[market_node].index.year == year
+                year_weights = is_year if representative_periods is None else representative_periods.year_weights(year)
+                if not vectorized_builder:
+                    summed_results_year = temporal_results[market_node][is_year].sum() * interval_length
                 annual_hydrogen_demand += mean_demand_hydrogen[market_node] * 8760
 
                 # Add the hydrogen production to the total per production technology
                 for electrolysis_technology in config["technologies"]["electrolysis"]:
                     electrolyzer_efficiency = utils.get_technology(electrolysis_technology)["efficiency"]
-                    annual_hydrogen_production += electrolyzer_efficiency * summed_results_year[f"demand_{electrolysis_technology}_MW"]
+                    if vectorized_builder:
+                        annual_hydrogen_production += electrolyzer_efficiency * (temporal_results[market_node][f"demand_{electrolysis_technology}_MW"].sum(year_weights) * interval_length)
+                    else:
+                        annual_hydrogen_production += electrolyzer_efficiency * summed_results_year[f"demand_{electrolysis_technology}_MW"]
+
+            # Ensure that enough hydrogen is produced in the year and register the relative hydrogen demand as the factor of the annual electricity demand
+            annual_hydrogen_constraint = model.addConstr(annual_hydrogen_production == annual_hydrogen_demand)
+            model_handle.add_constraints("annual_hydrogen", [annual_hydrogen_constraint])
+            model_handle.add_constraint_parameter("relative_hydrogen_demand", annual_hydrogen_constraint, mean_demand_electricity.sum() * 8760)
 
-            # Ensure that enough hydrogen is produced in the year
-            model.addConstr(annual_hydrogen_production == annual_hydrogen_demand)
+    # The relative hydrogen demand can only be updated if the hydrogen constraints remain required
+    uses_hydrogen_dispatchable = mean_demand_hydrogen.apply(validate.is_gurobi_variable).any()
+    model_handle.add_parameter_condition("relative_hydrogen_demand", lambda value: value is not None and not no_hydrogen_demand and (uses_hydrogen_dispatchable or value != 0))
 
     """
     Step 6: Define interconnection capacity constraint if the individual interconnections are optimized
     """
+    instrumentation.start_step("6")
     if optimize_individual_interconnections:
         total_current_capacity = sum(interconnection_capacity[connection_type]["current"].sum() for connection_type in ["hvac", "hvdc"])
         total_extra_capacity = sum(interconnection_capacity[connection_type]["extra"].sum() for connection_type in ["hvac", "hvdc"])
         if total_current_capacity > 0:
-            model.addConstr((1 + (total_extra_capacity / total_current_capacity)) == config["interconnections"]["relative_capacity"])
+            interconnection_capacity_constraint = model.addConstr((1 + (total_extra_capacity / total_current_capacity)) == config["interconnections"]["relative_capacity"])
+            model_handle.add_constraints("interconnection_capacity", [interconnection_capacity_constraint])
+            model_handle.add_constraint_parameter("interconnections.relative_capacity", interconnection_capacity_constraint, 1)
+    else:
+        # Update the extra interconnection capacity when the relative capacity changes
+        def update_extra_interconnection_capacity(config):
+            for connection_type in ["hvac", "hvdc"]:
+                interconnection_capacity[connection_type]["extra"] = (config["interconnections"]["relative_capacity"] - 1) * interconnection_capacity[connection_type]["current"]
+
+        model_handle.add_parameter_callback("interconnections.relative_capacity", update_extra_interconnection_capacity)
+
+    # The relative interconnection capacity can only be updated if the interconnections are still optimized in the same way
+    model_handle.add_parameter_condition("interconnections.relative_capacity", lambda value: (config["interconnections"]["optimize_individual_interconnections"] is True and value != 1) == optimize_individual_interconnections)
 
     """
     Step 8: Define the self-sufficiency constraints per country
     """
+    instrumentation.start_step("8")
+    hydrogen_self_sufficiency = {}
     for country_code in config["country_codes"]:
         country_flag = utils.get_country_property(country_code, "flag")
         status.update(f"{country_flag} Adding self-sufficiency constraint")
@@ -496,20 +869,25 @@ def optimize(config, *, status, output_directory):
         mean_storage_flow = 0
         mean_hydrogen_demand = 0
         mean_hydrogen_production = 0
+        mean_electricity_demand_country = 0
 
         # Loop over all market nodes in the country
         for market_node in utils.get_market_nodes_for_countries([country_code]):
-            # The Gurobi .quicksum method is significantly faster than Panda's .sum method
-            calculate_mean_of_column = lambda column: gp.quicksum(column) / len(column.index)
+            # The Gurobi .quicksum method is significantly faster than Panda's .sum method (the temporal expressions of the vectorized builder calculate their mean directly)
+            if vectorized_builder:
+                calculate_mean_of_column = lambda column: column.weighted_sum(mean_weights)
+            else:
+                calculate_mean_of_column = lambda column: gp.quicksum(column) / len(column.index)
 
             # Calculate the total demand and non-curtailed generation in this country
-            mean_demand_total += calculate_mean_of_column(temporal_results[market_node].demand_total_MW)
-            mean_ires_generation += calculate_mean_of_column(temporal_results[market_node].generation_ires_MW)
-            mean_dispatchable_generation += calculate_mean_of_column(temporal_results[market_node].generation_dispatchable_MW)
-            mean_hydropower_generation += calculate_mean_of_column(temporal_results[market_node].generation_total_hydropower_MW)
-            mean_curtailed += calculate_mean_of_column(temporal_results[market_node].curtailed_MW)
-            mean_storage_flow += calculate_mean_of_column(temporal_results[market_node].net_storage_flow_total_MW)
+            mean_demand_total += calculate_mean_of_column(temporal_results[market_node]["demand_total_MW"])
+            mean_ires_generation += calculate_mean_of_column(temporal_results[market_node]["generation_ires_MW"])
+            mean_dispatchable_generation += calculate_mean_of_column(temporal_results[market_node]["generation_dispatchable_MW"])
+            mean_hydropower_generation += calculate_mean_of_column(temporal_results[market_node]["generation_total_hydropower_MW"])
+            mean_curtailed += calculate_mean_of_column(temporal_results[market_node]["curtailed_MW"])
+            mean_storage_flow += calculate_mean_of_column(temporal_results[market_node]["net_storage_flow_total_MW"])
             mean_hydrogen_demand += mean_demand_hydrogen[market_node]
+            mean_electricity_demand_country += mean_demand_electricity[market_node]
 
             for electrolysis_technology in config["technologies"]["electrolysis"]:
                 electrolyzer_efficiency = utils.get_technology(electrolysis_technology)["efficiency"]
@@ -517,28 +895,54 @@ def optimize(config, *, status, output_directory):
 
         # Add the self-sufficiency constraints
         electricity_production = mean_ires_generation + mean_dispatchable_generation + mean_hydropower_generation - mean_curtailed - mean_storage_flow
-        model.addConstr(electricity_production >= config["self_sufficiency"]["min_electricity"] * mean_demand_total)
-        model.addConstr(electricity_production <= config["self_sufficiency"]["max_electricity"] * mean_demand_total)
+        min_electricity_constraint = model.addConstr(electricity_production >= config["self_sufficiency"]["min_electricity"] * mean_demand_total)
+        max_electricity_constraint = model.addConstr(electricity_production <= config["self_sufficiency"]["max_electricity"] * mean_demand_total)
+        model_handle.add_constraints("electricity_self_sufficiency", [min_electricity_constraint, max_electricity_constraint])
+        model_handle.add_constraint_parameter("self_sufficiency.min_electricity", min_electricity_constraint, mean_demand_total)
+        model_handle.add_constraint_parameter("self_sufficiency.max_electricity", max_electricity_constraint, mean_demand_total)
 
-        # Add the hydrogen constraint to ensure that the temporal hydrogen production equals the total hydrogen demand
+        # Store the hydrogen production and the hydrogen demand without the relative hydrogen demand, so the hydrogen constraints can be recreated when the relative demand changes
         if not no_hydrogen_demand:
-            model.addConstr(mean_hydrogen_production >= config["self_sufficiency"]["min_hydrogen"] * mean_hydrogen_demand)
-            model.addConstr(mean_hydrogen_production <= config["self_sufficiency"]["max_hydrogen"] * mean_hydrogen_demand)
+            hydrogen_self_sufficiency[country_code] = {"production": mean_hydrogen_production, "dispatchable_demand": mean_hydrogen_demand - config.get("relative_hydrogen_demand", 0) * mean_electricity_demand_country, "electricity_demand": mean_electricity_demand_country}
+
+    def add_hydrogen_self_sufficiency_constraints(config):
+        """
+        Add the hydrogen constraints to ensure that the temporal hydrogen production equals the total hydrogen demand and remove the previous ones
+        """
+        model.remove(model_handle.constraints.pop("hydrogen_self_sufficiency", []))
+        for country_hydrogen in hydrogen_self_sufficiency.values():
+            mean_hydrogen_demand = country_hydrogen["dispatchable_demand"] + config.get("relative_hydrogen_demand", 0) * country_hydrogen["electricity_demand"]
+            min_hydrogen_constraint = model.addConstr(country_hydrogen["production"] >= config["self_sufficiency"]["min_hydrogen"] * mean_hydrogen_demand)
+            max_hydrogen_constraint = model.addConstr(country_hydrogen["production"] <= config["self_sufficiency"]["max_hydrogen"] * mean_hydrogen_demand)
+            model_handle.add_constraints("hydrogen_self_sufficiency", [min_hydrogen_constraint, max_hydrogen_constraint])
+
+    # Add the hydrogen constraints and recreate them when one of their parameters changes
+    add_hydrogen_self_sufficiency_constraints(config)
+    for parameter_key in ["relative_hydrogen_demand", "self_sufficiency.min_hydrogen", "self_sufficiency.max_hydrogen"]:
+        model_handle.add_parameter_callback(parameter_key, add_hydrogen_self_sufficiency_constraints)
 
     """
     Step 9: Create a DataFrame with the mean temporal data
     """
+    instrumentation.start_step("9")
     # Create a DataFrame for the mean temporal data
-    relevant_columns = utils.find_common_columns(temporal_results)
+    if vectorized_builder:
+        relevant_columns = [column_name for column_name in temporal_results[market_nodes[0]] if all(column_name in temporal_results[market_node] for market_node in market_nodes)]
+    else:
+        relevant_columns = utils.find_common_columns(temporal_results)
     mean_temporal_data = pd.DataFrame(columns=relevant_columns)
 
     for market_node in market_nodes:
         # Add the mean temporal results to the DataFrame (can't use .mean as some columns include Gurobi variables)
-        mean_temporal_data.loc[market_node] = temporal_results[market_node][relevant_columns].sum() / len(temporal_results[market_node].index)
+        if vectorized_builder:
+            mean_temporal_data.loc[market_node] = [temporal_results[market_node][column_name].weighted_sum(mean_weights) for column_name in relevant_columns]
+        else:
+            mean_temporal_data.loc[market_node] = temporal_results[market_node][relevant_columns].sum() / len(temporal_results[market_node].index)
 
     """
     Step 10: Define the fixed IRES costs constraint
     """
+    instrumentation.start_step("10")
     if config.get("fixed_ires") is not None:
         status.update("Adding the fixed IRES costs constraint")
 
@@ -548,13 +952,21 @@ def optimize(config, *, status, output_directory):
         # Add a constraint so the IRES costs are either smaller or larger than the fixed IRES costs
         fixed_annual_ires_costs = config["fixed_ires"]["annual_costs"]
         if config["fixed_ires"]["direction"] == "gte":
-            model.addConstr(annual_ires_costs >= fixed_annual_ires_costs)
+            fixed_ires_constraint = model.addConstr(annual_ires_costs >= fixed_annual_ires_costs)
         elif config["fixed_ires"]["direction"] == "lte":
-            model.addConstr(annual_ires_costs <= fixed_annual_ires_costs)
+            fixed_ires_constraint = model.addConstr(annual_ires_costs <= fixed_annual_ires_costs)
+
+        # Register the fixed IRES costs as the right-hand side of the constraint and the direction as its sense
+        if config["fixed_ires"]["direction"] in ["gte", "lte"]:
+            model_handle.add_constraints("fixed_ires", [fixed_ires_constraint])
+            model_handle.add_constraint_parameter("fixed_ires.annual_costs", fixed_ires_constraint, 1)
+            model_handle.add_parameter_callback("fixed_ires.direction", lambda config: fixed_ires_constraint.setAttr("Sense", ">" if config["fixed_ires"]["direction"] == "gte" else "<"))
+            model_handle.add_parameter_condition("fixed_ires.direction", lambda value: value in ["gte", "lte"])
 
     """
-    Step 6: Define the dispatchable capacity constraint
+    Step 7: Define the dispatchable capacity constraint
     """
+    instrumentation.start_step("7")
     if config.get("fixed_dispatchable_capacity") is not None:
         # Get the technology and share
         fixed_technology = config["fixed_dispatchable_capacity"]["technology"]
@@ -564,89 +976,139 @@ def optimize(config, *, status, output_directory):
         cumulative_mean_demand = gp.quicksum(mean_temporal_data["demand_electricity_MW"])
         cumulative_capacity = gp.quicksum(dispatchable_capacity[fixed_technology])
 
-        # Add the constraint
-        model.addConstr(cumulative_capacity == fixed_share * cumulative_mean_demand)
+        # Add the constraint and register the share as the factor of the cumulative mean demand
+        fixed_dispatchable_capacity_constraint = model.addConstr(cumulative_capacity == fixed_share * cumulative_mean_demand)
+        model_handle.add_constraints("fixed_dispatchable_capacity", [fixed_dispatchable_capacity_constraint])
+        model_handle.add_constraint_parameter("fixed_dispatchable_capacity.share", fixed_dispatchable_capacity_constraint, cumulative_mean_demand)
 
     """
     Step 11: Set objective function
     """
+    instrumentation.start_step("11")
     status.update("Setting the objective function")
 
-    # Calculate the annual electricity costs
-    annual_electricity_costs = utils.calculate_lcoe(ires_capacity, dispatchable_capacity, storage_capacity, hydropower_capacity, hydrogen_costs=0, mean_temporal_data=mean_temporal_data, config=config, annual_costs=True)
-
     # Calculate the total spillage and give it an artificial cost (this is required because otherwise some curtailment might be accounted as spillage)
-    total_spillage_hydropower_MWh = utils.merge_dataframes_on_column(temporal_results, "spillage_total_hydropower_MW").sum().sum() * interval_length
+    if vectorized_builder:
+        total_spillage_hydropower_MWh = gp.quicksum(temporal_results[market_node]["spillage_total_hydropower_MW"].weighted_sum(timestamp_weights) for market_node in market_nodes) * interval_length
+    else:
+        total_spillage_hydropower_MWh = utils.merge_dataframes_on_column(temporal_results, "spillage_total_hydropower_MW").sum().sum() * interval_length
     artificial_spillage_cost_factor = 100
     total_spillage_costs = total_spillage_hydropower_MWh * artificial_spillage_cost_factor
 
+    # The spillage costs are the costs over all climate years, so the spillage of a climate year subproblem is multiplied by the number of climate years
+    if climate_year is not None:
+        total_spillage_costs *= config["climate_years"]["end"] - config["climate_years"]["start"] + 1
+
     # Calculate the annual electrolyzer costs (don't include electricity costs as this is already included in the electricity costs calculation above)
-    mean_electrolysis_demand = pd.Series({electrolysis_technology: gp.quicksum(utils.merge_dataframes_on_column(temporal_results, f"demand_{electrolysis_technology}_MW").sum()) / len(temporal_demand_electricity.index) for electrolysis_technology in electrolysis_capacity.columns})
-    annual_electrolyzer_costs = utils.calculate_lcoh(electrolysis_capacity, mean_electrolysis_demand, None, config=config, breakdown_level=1, annual_costs=True).electrolyzer
+    if vectorized_builder:
+        mean_electrolysis_demand = pd.Series({electrolysis_technology: gp.quicksum(temporal_results[market_node][f"demand_{electrolysis_technology}_MW"].weighted_sum(timestamp_weights) for market_node in market_nodes) / timestamp_weights.sum() for electrolysis_technology in electrolysis_capacity.columns})
+    else:
+        mean_electrolysis_demand = pd.Series({electrolysis_technology: gp.quicksum(utils.merge_dataframes_on_column(temporal_results, f"demand_{electrolysis_technology}_MW").sum()) / len(temporal_demand_electricity.index) for electrolysis_technology in electrolysis_capacity.columns})
+
+    def set_objective(config):
+        """
+        Set the objective to the annual system costs
+        """
+        # Calculate the annual electricity and electrolyzer costs (don't include electricity costs in the electrolyzer costs as this is already included in the electricity costs)
+        annual_electricity_costs = utils.calculate_lcoe(ires_capacity, dispatchable_capacity, storage_capacity, hydropower_capacity, hydrogen_costs=0, mean_temporal_data=mean_temporal_data, config=config, annual_costs=True)
+        annual_electrolyzer_costs = utils.calculate_lcoh(electrolysis_capacity, mean_electrolysis_demand, None, config=config, breakdown_level=1, annual_costs=True).electrolyzer
 
-    # Set the objective to the annual system costs
-    annualized_system_costs = annual_electricity_costs + annual_electrolyzer_costs + total_spillage_costs
-    model.setObjective(annualized_system_costs, gp.GRB.MINIMIZE)
+        annualized_system_costs = annual_electricity_costs + annual_electrolyzer_costs + total_spillage_costs
+        model.setObjective(annualized_system_costs, gp.GRB.MINIMIZE)
+
+    # Set the objective and recalculate it when the costs change (the technology scenario also changes the fixed IRES costs constraint)
+    set_objective(config)
+    model_handle.add_parameter_callback("extra_hydrogen_costs_per_kg", set_objective)
+    model_handle.add_parameter_callback("technologies.scenario", set_objective)
+    model_handle.add_parameter_condition("technologies.scenario", lambda value: config.get("fixed_ires") is None)
 
     # Add the initializing duration to the dictionary
+    instrumentation.stop_step()
     initializing_end = datetime.now()
     duration["initializing"] = (initializing_end - initializing_start).total_seconds()
 
+    # Add the objects that are required to store the results to the model handle
+    model_handle.results.update(
+        {
+            "market_nodes": market_nodes,
+            "vectorized_builder": vectorized_builder,
+            "temporal_results": temporal_results,
+            "temporal_export": temporal_export,
+            "mean_temporal_data": mean_temporal_data,
+            "ires_capacity": ires_capacity,
+            "dispatchable_capacity": dispatchable_capacity,
+            "hydropower_capacity": hydropower_capacity,
+            "storage_capacity": storage_capacity,
+            "electrolysis_capacity": electrolysis_capacity,
+            "interconnection_capacity": interconnection_capacity,
+            "representative_periods": representative_periods,
+            "period_levels": period_levels,
+            "aggregation_error": aggregation_error,
+            "model_reduction": model_reduction if reduce_model else None,
+        }
+    )
+
+    # Store the model in the cache, so it doesn't have to be built again for the same config
+    if use_model_cache:
+        status.update("Caching the model")
+        caching_start = datetime.now()
+        store_cached_model(model_handle, climate_year=climate_year)
+        duration["caching"] = (datetime.now() - caching_start).total_seconds()
+        duration["cache_hit"] = 0
+
+    return model_handle
+
+
+def solve_model(model_handle, *, status, output_directory):
+    """
+    Solve the model of the model handle and store the results
+    """
+    assert isinstance(model_handle, ModelHandle)
+    assert validate.is_directory_path(output_directory)
+
+    # Get the model, the config it was built or updated for, and its duration and instrumentation
+    model = model_handle.model
+    config = model_handle.config
+    duration = model_handle.duration
+    instrumentation = model_handle.instrumentation
+    aggregation_error = model_handle.results["aggregation_error"]
+    model_reduction = model_handle.results.get("model_reduction")
+
     """
     Step 12: Solve model
     """
     # Set the status message and create
     status.update("Optimizing")
     optimizing_start = datetime.now()
+    instrumentation.add_model_statistics(model)
+    instrumentation.start_step("12")
 
     # Initialize the 'model' subdirectory
     (output_directory / "model").mkdir()
 
-    # Create the optimization log expander
-    with st.expander("Optimization log"):
-        # Create three columns for statistics
-        col1, col2, col3 = st.columns(3)
-        stat1 = col1.empty()
-        stat2 = col2.empty()
-        stat3 = col3.empty()
-
-        log_messages = []
-        info = st.empty()
-
     def optimization_callback(model, where):
         """
-        Show the intermediate results
+        Send the intermediate results and log messages to the solver log, which shows and stores them in a background thread
         """
         if where == gp.GRB.Callback.BARRIER:
             iteration = model.cbGet(gp.GRB.Callback.BARRIER_ITRCNT)
             objective_value = model.cbGet(gp.GRB.Callback.BARRIER_PRIMOBJ)
             barrier_convergence = model.cbGet(gp.GRB.Callback.BARRIER_PRIMOBJ) / model.cbGet(gp.GRB.Callback.BARRIER_DUALOBJ) - 1
-            stat1.metric("Iteration (barrier)", f"{iteration:,}")
-            stat2.metric("Objective", f"{objective_value:,.2E}")
-            stat3.metric("Convergence", f"{barrier_convergence:.2E}")
+            solver_log.set_statistics(("Iteration (barrier)", f"{iteration:,}"), ("Objective", f"{objective_value:,.2E}"), ("Convergence", f"{barrier_convergence:.2E}"))
         if where == gp.GRB.Callback.SIMPLEX and model.cbGet(gp.GRB.Callback.SPX_ITRCNT) % 1000 == 0:
             iteration = model.cbGet(int(gp.GRB.Callback.SPX_ITRCNT))
             objective_value = model.cbGet(gp.GRB.Callback.SPX_OBJVAL)
             infeasibility = model.cbGet(gp.GRB.Callback.SPX_PRIMINF)
-            stat1.metric("Iteration (simplex)", f"{int(iteration):,}")
-            stat2.metric("Objective", f"{objective_value:,.2E}")
-            stat3.metric("Infeasibility", f"{infeasibility:.2E}")
+            solver_log.set_statistics(("Iteration (simplex)", f"{int(iteration):,}"), ("Objective", f"{objective_value:,.2E}"), ("Infeasibility", f"{infeasibility:.2E}"))
         if where == gp.GRB.Callback.MESSAGE:
-            log_message = model.cbGet(gp.GRB.Callback.MSG_STRING)
-            log_messages.append(log_message)
-
-            # Show the log message in the UI or console
-            info.code("".join(log_messages))
-
-            # Add the log message line to log.txt
-            utils.write_text(output_directory / "model" / "log.txt", log_message, mode="a", exist_ok=True)
+            solver_log.add_message(model.cbGet(gp.GRB.Callback.MSG_STRING))
 
-    def run_optimization(model):
+    def run_optimization(model, *, is_rerun=False):
         """
         Run the optimization model recursively
         """
-        # Reset the model if there is already a solution
-        if model.status != 1:
+        # Reset the model if it's rerun, the model of a reused model handle is not reset so the solver can start from its previous basis
+        if is_rerun:
             model.reset()
 
         # Run the model
@@ -655,7 +1117,7 @@ def optimize(config, *, status, output_directory):
         # Rerun the model with DualReductions disabled if the model is infeasible or unbound
         if model.status == gp.GRB.INF_OR_UNBD:
             model.setParam("DualReductions", 0)
-            return run_optimization(model)
+            return run_optimization(model, is_rerun=True)
 
         # Rerun the model with an increased numeric focus if there are numeric issues
         if model.status in [gp.GRB.INF_OR_UNBD, gp.GRB.NUMERIC]:
@@ -663,26 +1125,44 @@ def optimize(config, *, status, output_directory):
             max_numeric_focus = model.getParamInfo("NumericFocus")[4]
             if current_numeric_focus < max_numeric_focus:
                 model.setParam("NumericFocus", current_numeric_focus + 1)
-                return run_optimization(model)
+                return run_optimization(model, is_rerun=True)
 
-    # Run the optimization
-    run_optimization(model)
+    # Run the optimization with the selected solver in the optimization log expander (only if the status is shown in Streamlit), HiGHS solves the model after it has been built with Gurobi and writes the log file itself
+    with status.add_expander("Optimization log") if status.is_interactive else nullcontext(), SolverLog(output_directory / "model" / "log.txt", show=status.is_interactive) as solver_log:
+        if config["optimization"].get("solver", "gurobi") == "highs":
+            solution = solve_with_highs(model, config=config, log_filepath=output_directory / "model" / "log.txt")
+            solver_log.show_tail(utils.read_text(output_directory / "model" / "log.txt"))
+        else:
+            set_tuned_parameters(model, config)
+
+            # Restore the parameters that are changed by the reruns, so the next solve of a reused model handle starts with the same parameters
+            rerun_parameters = {parameter_name: model.getParamInfo(parameter_name)[2] for parameter_name in ["DualReductions", "NumericFocus"]}
+            run_optimization(model)
+            for parameter_name, value in rerun_parameters.items():
+                model.setParam(parameter_name, value)
+            solution = GurobiSolution(model)
+    model_handle.solution = solution
 
     # Store the LP model and optimization log
     if config["optimization"]["store_model"]:
         model.write(f"{output_directory}/model/model.lp")
+        model.write(f"{output_directory}/model/model.mps")
         model.write(f"{output_directory}/model/parameters.prm")
 
     # Store the quality attributes
-    quality = {}
-    for column_name, appendix in [("value", ""), ("sum", "Sum"), ("index", "Index")]:
-        quality[column_name] = {}
-        for quality_attribute in ["BoundVio", "ConstrVio", "ConstrResidual", "DualVio", "DualResidual", "ComplVio"]:
-            try:
-                quality[column_name][quality_attribute] = model.getAttr(f"{quality_attribute}{appendix}")
-            except AttributeError:
-                quality[column_name][quality_attribute] = None
-    pd.DataFrame(quality).to_csv(output_directory / "model" / "quality.csv")
+    pd.DataFrame(solution.get_quality()).to_csv(output_directory / "model" / "quality.csv")
+
+    # Store the aggregation error of the time series if the model is built on representative periods
+    if aggregation_error is not None:
+        aggregation_error.to_csv(output_directory / "model" / "aggregation_error.csv")
+
+    # Store the number of variables and constraints that were left out of the model per category
+    if model_reduction is not None:
+        model_reduction.to_csv(output_directory / "model" / "reduction.csv")
+
+    # Add the size of the presolved model from the log
+    instrumentation.stop_step()
+    instrumentation.add_presolve_statistics(utils.read_text(output_directory / "model" / "log.txt"))
 
     # Add the optimizing duration to the dictionary
     optimizing_end = datetime.now()
@@ -691,32 +1171,7 @@ def optimize(config, *, status, output_directory):
     """
     Step 13: Check if the model could be solved
     """
-    if model.status == gp.GRB.OPTIMAL:
-        error_message = None
-    elif model.status == gp.GRB.INFEASIBLE:
-        error_message = "The model was infeasible"
-    elif model.status == gp.GRB.UNBOUNDED:
-        error_message = "The model was unbounded"
-    elif model.status == gp.GRB.INF_OR_UNBD:
-        error_message = "The model was either infeasible or unbounded"
-    elif model.status == gp.GRB.CUTOFF:
-        error_message = "The optimal objective for the model was worse than the value specified in the Cutoff parameter"
-    elif model.status == gp.GRB.ITERATION_LIMIT:
-        error_message = "The optimization terminated because the total number of iterations performed exceeded the value specified in the IterationLimit or BarIterLimit parameter"
-    elif model.status == gp.GRB.NODE_LIMIT:
-        error_message = "The optimization terminated because the total number of branch-and-cut nodes explored exceeded the value specified in the NodeLimit parameter"
-    elif model.status == gp.GRB.TIME_LIMIT:
-        error_message = f"The optimization terminated due to the time limit in {timedelta(seconds=model.Runtime)}"
-    elif model.status == gp.GRB.SOLUTION_LIMIT:
-        error_message = "The optimization terminated because the number of solutions found reached the value specified in the SolutionLimit parameter"
-    elif model.status == gp.GRB.INTERRUPTED:
-        error_message = "The optimization was terminated by the user"
-    elif model.status == gp.GRB.NUMERIC:
-        error_message = "The optimization was terminated due to unrecoverable numerical difficulties"
-    elif model.status == gp.GRB.SUBOPTIMAL:
-        error_message = "Unable to satisfy optimality tolerances"
-    else:
-        error_message = "The model could not be solved for an unknown reason"
+    error_message = get_error_message(solution)
 
     # Don't store the results if the optimization ended with an error
     if error_message is not None:
@@ -726,66 +1181,150 @@ def optimize(config, *, status, output_directory):
     Step 14: Store the results
     """
     storing_start = datetime.now()
+    instrumentation.start_step("14")
+    result_values = get_result_values(model_handle, status=status)
+    store_result_values(result_values, status=status, output_directory=output_directory, output_format=config["optimization"].get("output_format", "csv"))
 
-    # Make the temporal subdirectories
-    (output_directory / "temporal").mkdir()
-    for sub_directory in ["market_nodes", "interconnections"]:
-        (output_directory / "temporal" / sub_directory).mkdir()
+    # Add the storing duration to the dictionary
+    storing_end = datetime.now()
+    duration["storing"] = (storing_end - storing_start).total_seconds()
+
+    # Store the duration and the steps after the optimization
+    duration.to_csv(output_directory / "model" / "duration.csv")
+    instrumentation.store(output_directory / "model")
 
-    # Make the capacity subdirectories
-    (output_directory / "capacity").mkdir()
-    for sub_directory in ["ires", "storage", "hydropower", "interconnections"]:
-        (output_directory / "capacity" / sub_directory).mkdir()
 
-    # Store the actual values per market node for the temporal results and capacities
+def get_error_message(model):
+    """
+    Return the error message for the status of the solved model or solution, or None if the model was solved to optimality
+    """
+    if model.status == gp.GRB.OPTIMAL:
+        return None
+    if model.status == gp.GRB.INFEASIBLE:
+        return "The model was infeasible"
+    if model.status == gp.GRB.UNBOUNDED:
+        return "The model was unbounded"
+    if model.status == gp.GRB.INF_OR_UNBD:
+        return "The model was either infeasible or unbounded"
+    if model.status == gp.GRB.CUTOFF:
+        return "The optimal objective for the model was worse than the value specified in the Cutoff parameter"
+    if model.status == gp.GRB.ITERATION_LIMIT:
+        return "The optimization terminated because the total number of iterations performed exceeded the value specified in the IterationLimit or BarIterLimit parameter"
+    if model.status == gp.GRB.NODE_LIMIT:
+        return "The optimization terminated because the total number of branch-and-cut nodes explored exceeded the value specified in the NodeLimit parameter"
+    if model.status == gp.GRB.TIME_LIMIT:
+        return f"The optimization terminated due to the time limit in {timedelta(seconds=model.Runtime)}"
+    if model.status == gp.GRB.SOLUTION_LIMIT:
+        return "The optimization terminated because the number of solutions found reached the value specified in the SolutionLimit parameter"
+    if model.status == gp.GRB.INTERRUPTED:
+        return "The optimization was terminated by the user"
+    if model.status == gp.GRB.NUMERIC:
+        return "The optimization was terminated due to unrecoverable numerical difficulties"
+    if model.status == gp.GRB.SUBOPTIMAL:
+        return "Unable to satisfy optimality tolerances"
+    return "The model could not be solved for an unknown reason"
+
+
+def get_result_values(model_handle, *, status):
+    """
+    Return the values of the temporal results and capacities of the solved model of the model handle
+    """
+    assert isinstance(model_handle, ModelHandle)
+
+    # Get the objects required to store the results
+    market_nodes = model_handle.results["market_nodes"]
+    vectorized_builder = model_handle.results["vectorized_builder"]
+    temporal_results = model_handle.results["temporal_results"]
+    temporal_export = model_handle.results["temporal_export"]
+    representative_periods = model_handle.results["representative_periods"]
+    period_levels = model_handle.results["period_levels"]
+    solution = model_handle.solution
+
+    # Create a dictionary to store the values of the matrix variables, so they are only retrieved once
+    variable_values = {}
+    result_values = {"temporal_results": {}, "ires_capacity": {}, "storage_capacity": {}, "hydropower_capacity": {}, "temporal_export": {}, "interconnection_capacity": {}}
+
+    # Convert the temporal results and capacities per market node
     for market_node in market_nodes:
         country_flag = utils.get_country_property(utils.get_country_of_market_node(market_node), "flag")
-        status.update(f"{country_flag} Converting and storing the results")
+        status.update(f"{country_flag} Converting the results")
 
         # Convert the temporal results variables
-        temporal_results_market_node = utils.convert_variables_recursively(temporal_results[market_node])
-        # Store the temporal results to a CSV file
-        temporal_results_market_node.to_csv(output_directory / "temporal" / "market_nodes" / f"{market_node}.csv")
-
-        # Convert and store the IRES capacity
-        ires_capacity_market_node = utils.convert_variables_recursively(ires_capacity[market_node])
-        ires_capacity_market_node.to_csv(output_directory / "capacity" / "ires" / f"{market_node}.csv")
+        if vectorized_builder:
+            temporal_results_market_node = temporal_results[market_node].evaluate(variable_values, solution=solution)
+        else:
+            temporal_results_market_node = utils.convert_variables_recursively(temporal_results[market_node], solution=solution)
+
+        # Expand the results of the representative periods to the original timestamps and replace the mean start level of the storage and reservoir levels by the start level of each original period
+        if representative_periods is not None:
+            temporal_results_market_node = representative_periods.expand(temporal_results_market_node)
+            for column_names, start_levels in period_levels[market_node]:
+                level_corrections = representative_periods.level_corrections(solution.get_values(start_levels))
+                for column_name in column_names:
+                    temporal_results_market_node[column_name] += level_corrections
+        result_values["temporal_results"][market_node] = temporal_results_market_node
+
+        # Convert the IRES, storage, and hydropower capacity
+        result_values["ires_capacity"][market_node] = utils.convert_variables_recursively(model_handle.results["ires_capacity"][market_node], solution=solution)
+        result_values["storage_capacity"][market_node] = utils.convert_variables_recursively(model_handle.results["storage_capacity"][market_node], solution=solution)
+        result_values["hydropower_capacity"][market_node] = model_handle.results["hydropower_capacity"][market_node]
+
+    # Convert the mean temporal data and the dispatchable and electrolysis capacity
+    status.update("Converting the mean temporal results and capacities")
+    result_values["mean_temporal_data"] = utils.convert_variables_recursively(model_handle.results["mean_temporal_data"], solution=solution)
+    result_values["dispatchable_capacity"] = utils.convert_variables_recursively(model_handle.results["dispatchable_capacity"], solution=solution)
+    result_values["electrolysis_capacity"] = utils.convert_variables_recursively(model_handle.results["electrolysis_capacity"], solution=solution)
+
+    # Convert the temporal interconnection flows and interconnection capacities per connection type
+    for connection_type in ["hvac", "hvdc"]:
+        status.update(f"Converting the {connection_type.upper()} interconnection results")
+        if vectorized_builder:
+            temporal_export_connection_type = temporal_export[connection_type].evaluate(variable_values, solution=solution)
+            temporal_export_connection_type.columns = pd.MultiIndex.from_tuples(temporal_export_connection_type.columns, names=["from", "to"])
+            if representative_periods is not None:
+                temporal_export_connection_type = representative_periods.expand(temporal_export_connection_type)
+        else:
+            temporal_export_connection_type = utils.convert_variables_recursively(temporal_export[connection_type], solution=solution)
+        result_values["temporal_export"][connection_type] = temporal_export_connection_type
+        result_values["interconnection_capacity"][connection_type] = utils.convert_variables_recursively(model_handle.results["interconnection_capacity"][connection_type], solution=solution)
 
-        # Convert and store the storage capacity
-        storage_capacity_market_node = utils.convert_variables_recursively(storage_capacity[market_node])
-        storage_capacity_market_node.to_csv(output_directory / "capacity" / "storage" / f"{market_node}.csv")
+    return result_values
 
-        # Convert and store the storage capacity
-        hydropower_capacity[market_node].to_csv(output_directory / "capacity" / "hydropower" / f"{market_node}.csv")
 
-    # Store the mean temporal data
-    status.update("Converting and storing the mean temporal results")
-    mean_temporal_data = utils.convert_variables_recursively(mean_temporal_data)
-    mean_temporal_data.to_csv(output_directory / "temporal" / "market_nodes" / "mean.csv")
+def store_result_values(result_values, *, status, output_directory, output_format):
+    """
+    Store the values of the temporal results and capacities in the output directory
+    """
+    assert validate.is_dict(result_values)
+    assert validate.is_directory_path(output_directory)
 
-    # Convert and store the dispatchable capacity
-    status.update("Converting and storing the dispatchable capacity")
-    dispatchable_capacity = utils.convert_variables_recursively(dispatchable_capacity)
-    dispatchable_capacity.to_csv(output_directory / "capacity" / "dispatchable.csv")
+    # Make the temporal subdirectories
+    (output_directory / "temporal").mkdir()
+    for sub_directory in ["market_nodes", "interconnections"]:
+        (output_directory / "temporal" / sub_directory).mkdir()
 
-    # Convert and store the electrolysis capacity
-    status.update("Converting and storing the electrolysis capacity")
-    electrolysis_capacity = utils.convert_variables_recursively(electrolysis_capacity)
-    electrolysis_capacity.to_csv(output_directory / "capacity" / "electrolysis.csv")
+    # Make the capacity subdirectories
+    (output_directory / "capacity").mkdir()
+    for sub_directory in ["ires", "storage", "hydropower", "interconnections"]:
+        (output_directory / "capacity" / sub_directory).mkdir()
 
-    # Store the actual values per connection type for the temporal export
+    # Store the temporal results and capacities per market node
+    for market_node in result_values["temporal_results"]:
+        country_flag = utils.get_country_property(utils.get_country_of_market_node(market_node), "flag")
+        status.update(f"{country_flag} Storing the results")
+        utils.write_dataframe(output_directory / "temporal" / "market_nodes" / f"{market_node}.{output_format}", result_values["temporal_results"][market_node])
+        utils.write_dataframe(output_directory / "capacity" / "ires" / f"{market_node}.{output_format}", result_values["ires_capacity"][market_node])
+        utils.write_dataframe(output_directory / "capacity" / "storage" / f"{market_node}.{output_format}", result_values["storage_capacity"][market_node])
+        utils.write_dataframe(output_directory / "capacity" / "hydropower" / f"{market_node}.{output_format}", result_values["hydropower_capacity"][market_node])
+
+    # Store the mean temporal data and the dispatchable and electrolysis capacity
+    status.update("Storing the mean temporal results and capacities")
+    utils.write_dataframe(output_directory / "temporal" / "market_nodes" / f"mean.{output_format}", result_values["mean_temporal_data"])
+    utils.write_dataframe(output_directory / "capacity" / f"dispatchable.{output_format}", result_values["dispatchable_capacity"])
+    utils.write_dataframe(output_directory / "capacity" / f"electrolysis.{output_format}", result_values["electrolysis_capacity"])
+
+    # Store the temporal interconnection flows and interconnection capacities per connection type
     for connection_type in ["hvac", "hvdc"]:
-        status.update(f"Converting and storing the {connection_type.upper()} interconnection results")
-        # Convert and store the temporal interconnection flows
-        temporal_export_connection_type = utils.convert_variables_recursively(temporal_export[connection_type])
-        temporal_export_connection_type.to_csv(output_directory / "temporal" / "interconnections" / f"{connection_type}.csv")
-        # Convert and store the interconnection capacities
-        interconnection_capacity_connection_type = utils.convert_variables_recursively(interconnection_capacity[connection_type])
-        interconnection_capacity_connection_type.to_csv(output_directory / "capacity" / "interconnections" / f"{connection_type}.csv")
-
-    # Add the storing duration to the dictionary
-    storing_end = datetime.now()
-    duration["storing"] = (storing_end - storing_start).total_seconds()
-
-    # Store the duration after the optimization
-    duration.to_csv(output_directory / "model" / "duration.csv")
+        status.update(f"Storing the {connection_type.upper()} interconnection results")
+        utils.write_dataframe(output_directory / "temporal" / "interconnections" / f"{connection_type}.{output_format}", result_values["temporal_export"][connection_type])
+        utils.write_dataframe(output_directory / "capacity" / "interconnections" / f"{connection_type}.{output_format}", result_values["interconnection_capacity"][connection_type])
@@ -0,0 +1,14 @@
+class QueueStatus:
+    """
+    Status that sends its updates to a queue, so a sensitivity step or climate year subproblem in a worker process can report its progress to the main process
+    """
+
+    # The solver log is only written to the log file of the run
+    is_interactive = False
+
+    def __init__(self, queue, step_key):
+        self.queue = queue
+        self.step_key = step_key
+
+    def update(self, text, *, status_type="info"):
+        self.queue.put((self.step_key, text, status_type))
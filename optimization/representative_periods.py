@@ -0,0 +1,107 @@
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+
+class RepresentativePeriods:
+    """
+    Mapping of the original timestamps to the timestamps of the representative periods, which are the only timestamps in the model
+    """
+
+    def __init__(self, representative_timestamps, *, period_length):
+        # The representative timestamps is a Series with the timestamp that represents each original timestamp
+        self.timestamps = representative_timestamps.index
+        self.index = pd.DatetimeIndex(np.unique(representative_timestamps.to_numpy()))
+
+        # Get the position of the representative timestamp of each original timestamp and the weight (number of original timestamps) of each representative timestamp
+        self.positions = self.index.get_indexer(representative_timestamps.to_numpy())
+        self.weights = np.bincount(self.positions, minlength=len(self.index)).astype("float64")
+
+        # Get the period of each original timestamp and the first and last position of the representative period of each original period
+        self.periods = np.arange(len(self.timestamps)) // period_length
+        period_count = self.periods.max() + 1
+        self.start_positions = self.positions[np.searchsorted(self.periods, np.arange(period_count), side="left")]
+        self.end_positions = self.positions[np.searchsorted(self.periods, np.arange(period_count), side="right") - 1]
+
+        # Get the representative period of each timestamp in the model and of each original period
+        is_period_start = np.zeros(len(self.index), dtype=bool)
+        is_period_start[self.start_positions] = True
+        self.is_period_start = is_period_start
+        self.blocks = np.cumsum(is_period_start) - 1
+        self.period_blocks = self.blocks[self.start_positions]
+
+    @property
+    def period_count(self):
+        return len(self.start_positions)
+
+    @property
+    def block_count(self):
+        return self.blocks.max() + 1
+
+    def year_weights(self, year):
+        """
+        Return the number of original timestamps in the year that each timestamp in the model represents
+        """
+        return np.bincount(self.positions[self.timestamps.year == year], minlength=len(self.index)).astype("float64")
+
+    def shifted_difference_matrix(self):
+        """
+        Return the matrix that subtracts the previous value in the same representative period from each value (the first value of a period is not subtracted by anything)
+        """
+        timestamp_count = len(self.index)
+        previous_values = scipy.sparse.diags((~self.is_period_start[1:]).astype("float64"), offsets=-1, shape=(timestamp_count, timestamp_count), format="csr")
+        return scipy.sparse.identity(timestamp_count, format="csr") - previous_values
+
+    def mean_level_matrix(self):
+        """
+        Return the (timestamps x original periods) matrix that calculates the mean start level of the original periods that are represented by each timestamp
+        """
+        block_of_timestamp = scipy.sparse.csr_matrix((np.ones(len(self.index)), (np.arange(len(self.index)), self.blocks)), shape=(len(self.index), self.block_count))
+        block_of_period = scipy.sparse.csr_matrix((np.ones(self.period_count), (self.period_blocks, np.arange(self.period_count))), shape=(self.block_count, self.period_count))
+        periods_per_block = np.bincount(self.period_blocks, minlength=self.block_count)
+        return block_of_timestamp @ scipy.sparse.diags(1 / periods_per_block) @ block_of_period
+
+    def add_level_constraints(self, model, intra_period_levels, *, min_levels, max_levels, cyclic):
+        """
+        Link the levels within the representative periods to a start level for each original period and return the start level variables (the levels are relative to the start of the period)
+        """
+        # Create a variable for the start level of each original period and for the minimum and maximum level within each representative period
+        start_levels = model.addMVar(self.period_count, lb=-gp.GRB.INFINITY)
+        min_intra_period_levels = model.addMVar(self.block_count, lb=-gp.GRB.INFINITY, ub=0)
+        max_intra_period_levels = model.addMVar(self.block_count)
+
+        # Ensure that the start level of the next period equals the start level plus the level at the end of the representative period
+        next_period = scipy.sparse.eye(self.period_count, k=1, format="csr")
+        end_level = scipy.sparse.csr_matrix((np.ones(self.period_count), (np.arange(self.period_count), self.end_positions)), shape=(self.period_count, len(self.index)))
+        if cyclic:
+            next_period += scipy.sparse.eye(self.period_count, k=1 - self.period_count, format="csr")
+            model.addConstr(next_period @ start_levels - start_levels - end_level @ intra_period_levels == 0)
+        elif self.period_count > 1:
+            model.addConstr((next_period @ start_levels - start_levels - end_level @ intra_period_levels)[:-1] == 0)
+
+        # Ensure that the minimum and maximum levels are the bounds of the levels within each representative period
+        block_of_timestamp = scipy.sparse.csr_matrix((np.ones(len(self.index)), (np.arange(len(self.index)), self.blocks)), shape=(len(self.index), self.block_count))
+        model.addConstr(intra_period_levels - block_of_timestamp @ min_intra_period_levels >= 0)
+        model.addConstr(intra_period_levels - block_of_timestamp @ max_intra_period_levels <= 0)
+
+        # Ensure that the levels of each original period stay within its minimum and maximum level
+        block_of_period = scipy.sparse.csr_matrix((np.ones(self.period_count), (np.arange(self.period_count), self.period_blocks)), shape=(self.period_count, self.block_count))
+        model.addConstr(start_levels + block_of_period @ min_intra_period_levels - min_levels >= 0)
+        model.addConstr(start_levels + block_of_period @ max_intra_period_levels - max_levels <= 0)
+
+        return start_levels
+
+    def expand(self, data):
+        """
+        Return the DataFrame with a row for each original timestamp, based on the rows of the representative timestamps (the DataFrame should only have the rows of the representative timestamps)
+        """
+        expanded_data = data.iloc[self.positions]
+        expanded_data.index = self.timestamps
+        return expanded_data
+
+    def level_corrections(self, start_levels):
+        """
+        Return the difference between the actual level and the mean level of the represented periods for each original timestamp, based on the values of the start levels
+        """
+        return start_levels[self.periods] - (self.mean_level_matrix() @ start_levels)[self.positions]
@@ -0,0 +1,85 @@
+import shutil
+from copy import deepcopy
+
+import yaml
+
+import utils
+import validate
+
+
+class SensitivityManifest:
+    """
+    Configs and finished steps of a sensitivity analysis that are stored after each step, so an interrupted sensitivity analysis can be resumed with only the missing steps
+    """
+
+    def __init__(self, config, sensitivity_config, *, resume=False):
+        assert validate.is_config(config)
+        assert validate.is_sensitivity_config(sensitivity_config)
+        assert validate.is_bool(resume)
+
+        # Store copies of the configs, because the steps of the sensitivity config are updated during the sensitivity analysis
+        self.config = deepcopy(config)
+        self.sensitivity_config = deepcopy(sensitivity_config)
+        self.resume = resume
+        self.output_directory = utils.path("output", config["name"])
+        self.filepath = self.output_directory / "manifest.yaml"
+        self.finished_steps = {}
+        self.failed_steps = {}
+
+        # Keep the failed steps of the previous attempt, they are removed from the manifest when they finish successfully
+        if resume and self.filepath.is_file():
+            self.failed_steps = SensitivityManifest.read(config["name"])["failed_steps"]
+
+        # The output directory already exists if the sensitivity analysis is resumed
+        self.output_directory.mkdir(parents=True, exist_ok=resume)
+        self._store()
+
+    def _store(self):
+        """
+        Store the configs and the finished and failed steps
+        """
+        utils.write_yaml(self.filepath, {"config": self.config, "sensitivity_config": self.sensitivity_config, "finished_steps": self.finished_steps, "failed_steps": self.failed_steps}, exist_ok=True)
+
+    @staticmethod
+    def read(name):
+        """
+        Return the content of the manifest of a sensitivity analysis, it's not read with the cached YAML reader because it changes after each step
+        """
+        assert validate.is_string(name)
+
+        with open(utils.path("output", name, "manifest.yaml")) as f:
+            return yaml.load(f, Loader=yaml.SafeLoader)
+
+    @staticmethod
+    def has_complete_results(step_directory):
+        """
+        Check if the step directory has the config file and the temporal results and capacities of a finished run
+        """
+        assert validate.is_directory_path(step_directory)
+
+        return (step_directory / "config.yaml").is_file() and (step_directory / "temporal").is_dir() and (step_directory / "capacity").is_dir()
+
+    def is_finished(self, step_key):
+        """
+        Check if the step of a resumed sensitivity analysis finished in a previous attempt
+        """
+        return self.resume and SensitivityManifest.has_complete_results(self.output_directory / step_key)
+
+    def remove_step(self, step_key):
+        """
+        Remove the results of a step that was interrupted, so the step can be run again
+        """
+        step_directory = self.output_directory / step_key
+        if step_directory.exists():
+            shutil.rmtree(step_directory)
+
+    def add_step(self, step_key, step_value, *, error_message=None):
+        """
+        Add a step that finished successfully, or failed with the error message, and store the manifest
+        """
+        if error_message is None:
+            self.finished_steps[step_key] = step_value
+            self.failed_steps.pop(step_key, None)
+        else:
+            self.failed_steps[step_key] = error_message
+        self._store()
@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from collections import deque
+
+
+class SolverLog:
+    """
+    Log and progress of the solver that are written to the log file and shown in the UI by a background thread, so the solver never waits for the disk or UI
+    """
+
+    def __init__(self, log_filepath, *, show=True, refresh_interval=0.5, tail_length=100, max_queue_size=10000):
+        self.log_filepath = log_filepath
+        self.show = show
+        self.refresh_interval = refresh_interval
+        self.max_queue_size = max_queue_size
+
+        # Create three columns for the statistics and a code block for the end of the log, if the log is shown in the UI
+        # Streamlit is only imported if the log is shown, so the headless runners don't import it
+        if show:
+            import streamlit as st
+            from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+            col1, col2, col3 = st.columns(3)
+            self.statistic_placeholders = [col1.empty(), col2.empty(), col3.empty()]
+            self.info = st.empty()
+
+        # Only keep the last lines of the log for the UI and the latest statistics, since older values are never shown
+        self.tail = deque(maxlen=tail_length)
+        self.statistics = None
+
+        # The solver adds the log messages to the queue, if it's full the messages are counted and replaced by a single message
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped_message_count = 0
+        self.dropped_message_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+        # Give the thread access to the Streamlit session, so it can update the placeholders
+        if show:
+            add_script_run_ctx(self.thread)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Stop the thread and wake it up if it's waiting for messages, the wake-up message is not required if the queue is full (the thread is then not waiting or has died)
+        self.stopped.set()
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.thread.join()
+
+    def add_message(self, message):
+        """
+        Add a log message without waiting for the queue
+        """
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            with self.dropped_message_lock:
+                self.dropped_message_count += 1
+
+    def set_statistics(self, *statistics):
+        """
+        Set the latest (label, value) pairs of the statistics, they are shown at the next refresh
+        """
+        self.statistics = statistics
+
+    def show_tail(self, text):
+        """
+        Show the last lines of a log that was written by the solver itself
+        """
+        if self.show:
+            self.tail.extend(text.splitlines(keepends=True))
+            self.info.code("".join(self.tail))
+
+    def _run(self):
+        """
+        Write the queued messages to the log file in batches and refresh the UI at most once per refresh interval
+        """
+        shown_statistics = None
+        with open(self.log_filepath, "a") as file:
+            while True:
+                # Stop after the last messages have been processed
+                is_stopped = self.stopped.is_set()
+                refresh_start = time.monotonic()
+
+                # Get all messages that are added before the next refresh
+                messages = []
+                while True:
+                    try:
+                        message = self.queue.get(timeout=0 if is_stopped else max(self.refresh_interval - (time.monotonic() - refresh_start), 0))
+                    except queue.Empty:
+                        break
+                    if message is None:
+                        break
+                    messages.append(message)
+                    if len(messages) >= self.max_queue_size:
+                        break
+
+                # Add a message for the messages that didn't fit in the queue, the count is reset under the lock so no dropped messages are missed by the solver thread
+                with self.dropped_message_lock:
+                    dropped_message_count = self.dropped_message_count
+                    self.dropped_message_count = 0
+                if dropped_message_count:
+                    messages.append(f"[{dropped_message_count:,} log messages were dropped because the log could not keep up]\n")
+
+                # Write the messages at once and only show the end of the log
+                if messages:
+                    file.write("".join(messages))
+                    file.flush()
+                if messages and self.show:
+                    self.tail.extend(messages)
+                    self.info.code("".join(self.tail))
+
+                # Only update the statistics if they changed
+                statistics = self.statistics
+                if self.show and statistics is not None and statistics is not shown_statistics:
+                    for placeholder, (label, value) in zip(self.statistic_placeholders, statistics):
+                        placeholder.metric(label, value)
+                    shown_statistics = statistics
+
+                if is_stopped and self.queue.empty():
+                    break
@@ -0,0 +1,203 @@
+from datetime import datetime
+
+import gurobipy as gp
+import highspy
+import numpy as np
+
+import utils
+
+# The Gurobi status codes of the HiGHS model statuses, so the error messages are the same for both solvers
+highs_model_statuses = {
+    "kOptimal": gp.GRB.OPTIMAL,
+    "kInfeasible": gp.GRB.INFEASIBLE,
+    "kUnbounded": gp.GRB.UNBOUNDED,
+    "kUnboundedOrInfeasible": gp.GRB.INF_OR_UNBD,
+    "kObjectiveBound": gp.GRB.CUTOFF,
+    "kObjectiveTarget": gp.GRB.CUTOFF,
+    "kTimeLimit": gp.GRB.TIME_LIMIT,
+    "kIterationLimit": gp.GRB.ITERATION_LIMIT,
+    "kSolutionLimit": gp.GRB.SOLUTION_LIMIT,
+    "kInterrupt": gp.GRB.INTERRUPTED,
+}
+
+# The tuned parameters that are only used by the barrier method
+barrier_parameters = ["BarHomogeneous", "Crossover"]
+
+# Config keys of the Gurobi parameters, which can be changed without rebuilding the model
+gurobi_parameter_keys = ["optimization.thread_count", "optimization.method", "optimization.barrier_convergence_tolerance", "optimization.max_barrier_iterations"]
+
+
+def set_gurobi_parameters(model, config):
+    """
+    Set the user defined and fixed parameters of the Gurobi model
+    """
+    model.setParam("Threads", config["optimization"]["thread_count"])
+    model.setParam("Method", config["optimization"]["method"])
+    if config["optimization"]["method"] == 2:
+        model.setParam("BarConvTol", config["optimization"]["barrier_convergence_tolerance"])
+        model.setParam("BarIterLimit", config["optimization"]["max_barrier_iterations"])
+
+    # Disable crossover and set BarHomogeneous and Aggregate
+    model.setParam("Crossover", 0)
+    model.setParam("BarHomogeneous", 1)  # Don't know what this does, but it speeds up some more complex models
+    model.setParam("Aggregate", 0)  # Don't know what this does, but it speeds up some more complex models
+    model.setParam("Presolve", 2)  # Use an aggressive presolver
+    model.setParam("NumericFocus", 1)
+
+
+def set_tuned_parameters(model, config):
+    """
+    Set the Gurobi parameters that were tuned for models of the same size class, the tuned method is only used if the method in the config is automatic
+    """
+    model.update()
+    tuned_parameters = utils.get_tuned_parameters(model.NumNZs)
+    method = config["optimization"]["method"]
+    for parameter_name, value in tuned_parameters.items():
+        if parameter_name == "Method" and method != -1:
+            continue
+
+        # The barrier parameters are only tuned if the trial used the same method, otherwise they are the defaults and would for example turn crossover on again
+        if parameter_name in barrier_parameters and method not in [-1, tuned_parameters.get("Method", -1)]:
+            continue
+        model.setParam(parameter_name, value)
+
+
+class GurobiSolution:
+    """
+    Solution of a model that was solved by Gurobi
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.status = model.status
+        self.Runtime = model.Runtime
+
+    @property
+    def ObjVal(self):
+        return self.model.ObjVal
+
+    def get_values(self, variables):
+        """
+        Return the values of a list of variables or a matrix variable
+        """
+        if isinstance(variables, gp.MVar):
+            return variables.X
+        return np.array(self.model.getAttr("X", variables))
+
+    def get_value(self, expression):
+        """
+        Return the value of an expression
+        """
+        return expression.getValue()
+
+    def get_quality(self):
+        """
+        Return the quality attributes of the solution
+        """
+        quality = {}
+        for column_name, appendix in [("value", ""), ("sum", "Sum"), ("index", "Index")]:
+            quality[column_name] = {}
+            for quality_attribute in ["BoundVio", "ConstrVio", "ConstrResidual", "DualVio", "DualResidual", "ComplVio"]:
+                try:
+                    quality[column_name][quality_attribute] = self.model.getAttr(f"{quality_attribute}{appendix}")
+                except AttributeError:
+                    quality[column_name][quality_attribute] = None
+        return quality
+
+
+class HighsSolution:
+    """
+    Solution of a Gurobi model that was solved by HiGHS, the values are looked up by the index of the Gurobi variables
+    """
+
+    def __init__(self, highs, *, runtime):
+        self.status = highs_model_statuses.get(highs.getModelStatus().name)
+        self.Runtime = runtime
+        self.ObjVal = highs.getInfo().objective_function_value
+        self.values = np.array(highs.getSolution().col_value)
+        self.info = highs.getInfo()
+
+    def get_values(self, variables):
+        """
+        Return the values of a list of variables or a matrix variable
+        """
+        if isinstance(variables, gp.MVar):
+            variables = variables.tolist()
+        return self.values[[variable.index for variable in variables]]
+
+    def get_value(self, expression):
+        """
+        Return the value of an expression
+        """
+        variable_indices = [expression.getVar(index).index for index in range(expression.size())]
+        coefficients = [expression.getCoeff(index) for index in range(expression.size())]
+        return expression.getConstant() + np.dot(coefficients, self.values[variable_indices])
+
+    def get_quality(self):
+        """
+        Return the quality attributes of the solution, HiGHS only reports the primal and dual infeasibilities
+        """
+        quality_attributes = ["BoundVio", "ConstrVio", "ConstrResidual", "DualVio", "DualResidual", "ComplVio"]
+        quality = {column_name: dict.fromkeys(quality_attributes) for column_name in ["value", "sum", "index"]}
+        quality["value"]["ConstrVio"] = self.info.max_primal_infeasibility
+        quality["sum"]["ConstrVio"] = self.info.sum_primal_infeasibilities
+        quality["value"]["DualVio"] = self.info.max_dual_infeasibility
+        quality["sum"]["DualVio"] = self.info.sum_dual_infeasibilities
+        return quality
+
+
+def solve_with_highs(model, *, config, log_filepath):
+    """
+    Solve the Gurobi model with HiGHS and return the solution, the Gurobi model is only used to build the model
+    """
+    model.update()
+
+    # Get the constraint matrix, bounds, and objective of the model (the Gurobi infinity is larger than the HiGHS infinity)
+    constraint_matrix = model.getA().tocsc()
+    variables = model.getVars()
+    constraints = model.getConstrs()
+    column_lower = np.array(model.getAttr("LB", variables))
+    column_upper = np.array(model.getAttr("UB", variables))
+    senses = np.array(model.getAttr("Sense", constraints))
+    rhs = np.array(model.getAttr("RHS", constraints))
+
+    # Create the HiGHS model
+    lp = highspy.HighsLp()
+    lp.num_col_ = constraint_matrix.shape[1]
+    lp.num_row_ = constraint_matrix.shape[0]
+    lp.col_cost_ = np.array(model.getAttr("Obj", variables))
+    lp.col_lower_ = np.where(column_lower <= -gp.GRB.INFINITY, -highspy.kHighsInf, column_lower)
+    lp.col_upper_ = np.where(column_upper >= gp.GRB.INFINITY, highspy.kHighsInf, column_upper)
+    lp.row_lower_ = np.where(senses == "<", -highspy.kHighsInf, rhs)
+    lp.row_upper_ = np.where(senses == ">", highspy.kHighsInf, rhs)
+    lp.offset_ = model.ObjCon
+    lp.sense_ = highspy.ObjSense.kMinimize if model.ModelSense == gp.GRB.MINIMIZE else highspy.ObjSense.kMaximize
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = constraint_matrix.indptr
+    lp.a_matrix_.index_ = constraint_matrix.indices
+    lp.a_matrix_.value_ = constraint_matrix.data
+
+    # Write the log to the log file instead of the console
+    highs = highspy.Highs()
+    highs.setOptionValue("log_to_console", False)
+    highs.setOptionValue("log_file", str(log_filepath))
+
+    # Map the Gurobi method to the HiGHS solver (HiGHS has no concurrent method, so it chooses the solver itself, and the crossover remains enabled because HiGHS doesn't accept the interior solution as optimal)
+    method = config["optimization"]["method"]
+    highs.setOptionValue("threads", config["optimization"]["thread_count"])
+    highs.setOptionValue("solver", {0: "simplex", 1: "simplex", 2: "ipm"}.get(method, "choose"))
+    highs.setOptionValue("simplex_strategy", 4 if method == 0 else 1)
+    if method == 2:
+        highs.setOptionValue("ipm_optimality_tolerance", config["optimization"]["barrier_convergence_tolerance"])
+        highs.setOptionValue("ipm_iteration_limit", config["optimization"]["max_barrier_iterations"])
+
+    # Solve the model
+    solving_start = datetime.now()
+    highs.passModel(lp)
+    highs.run()
+
+    # Rerun the model without presolve if it's infeasible or unbounded, so HiGHS reports which of the two it is (like DualReductions=0 in Gurobi)
+    if highs.getModelStatus() == highspy.HighsModelStatus.kUnboundedOrInfeasible:
+        highs.setOptionValue("presolve", "off")
+        highs.run()
+    return HighsSolution(highs, runtime=(datetime.now() - solving_start).total_seconds())
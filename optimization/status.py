@@ -1,9 +1,29 @@
-import streamlit as st
-
-
 class Status:
+    # The solver log and progress are shown in the Streamlit page
+    is_interactive = True
+
     def __init__(self):
+        # Streamlit is only imported when the status is shown in the app, so the headless runners don't import it
+        import streamlit as st
+
         self.status = st.empty()
 
     def update(self, text, *, status_type="info"):
         getattr(self.status, status_type)(text)
+
+    def add_section(self, title):
+        """
+        Show a subheader and return a new status below it
+        """
+        import streamlit as st
+
+        st.subheader(title)
+        return Status()
+
+    def add_expander(self, title):
+        """
+        Return an expander below the status, it's only used if the status is interactive
+        """
+        import streamlit as st
+
+        return st.expander(title)
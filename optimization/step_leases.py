@@ -0,0 +1,139 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import yaml
+
+import validate
+
+
+class StepLeases:
+    """
+    Lease files of the sensitivity analysis steps in a shared directory, so workers on multiple machines can claim the steps without a coordination service (a lease expires if its worker stops renewing it)
+    """
+
+    def __init__(self, directory, *, lease_duration=600):
+        assert validate.is_directory_path(directory)
+        assert validate.is_number(lease_duration, min_value=1)
+
+        self.directory = directory
+        self.lease_duration = lease_duration
+        self.worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _lease_filepath(self, step_key):
+        return self.directory / f"{step_key}.lease"
+
+    def _result_filepath(self, step_key):
+        return self.directory / f"{step_key}.result"
+
+    def is_done(self, step_key):
+        """
+        Check if the step has finished or failed
+        """
+        return self._result_filepath(step_key).is_file()
+
+    def get_error_message(self, step_key):
+        """
+        Return the error message of a step that has failed, or None if it finished successfully
+        """
+        with open(self._result_filepath(step_key)) as f:
+            return yaml.load(f, Loader=yaml.SafeLoader)["error_message"]
+
+    def reset(self, step_key):
+        """
+        Remove the result of a step, so it's claimed and run again
+        """
+        self._result_filepath(step_key).unlink(missing_ok=True)
+
+    def is_owner(self, step_key):
+        """
+        Check if this worker still holds the lease of the step, another worker takes it over if it expired while the step was running
+        """
+        try:
+            with open(self._lease_filepath(step_key)) as f:
+                return f.read() == self.worker
+        except FileNotFoundError:
+            return False
+
+    def claim(self, step_key):
+        """
+        Try to claim a step that is not done yet and return True if the lease has been acquired, an expired lease of another worker is taken over
+        """
+        lease_filepath = self._lease_filepath(step_key)
+
+        # Move an expired lease away first, only one worker can rename the file so only one worker takes it over
+        expired_filepath = self.directory / f"{step_key}.expired.{self.worker}"
+        try:
+            if time.time() - lease_filepath.stat().st_mtime > self.lease_duration:
+                os.rename(lease_filepath, expired_filepath)
+
+                # Put the lease back if another worker took it over and created a new lease in the meantime
+                if time.time() - expired_filepath.stat().st_mtime <= self.lease_duration:
+                    os.link(expired_filepath, lease_filepath)
+                    os.remove(expired_filepath)
+                    return False
+                os.remove(expired_filepath)
+        except FileNotFoundError:
+            pass
+        except FileExistsError:
+            expired_filepath.unlink(missing_ok=True)
+            return False
+
+        # Create the lease file, this fails if another worker created it first
+        try:
+            file_descriptor = os.open(lease_filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(file_descriptor, "w") as f:
+            f.write(self.worker)
+
+        # The step might have finished between checking the steps and creating the lease
+        if self.is_done(step_key):
+            os.remove(lease_filepath)
+            return False
+        return True
+
+    @contextmanager
+    def keep_alive(self, step_key):
+        """
+        Renew the lease of the step in a background thread while the step is running, the yielded event is set if the lease was lost to another worker
+        """
+        stopped = threading.Event()
+        lease_lost = threading.Event()
+
+        def renew():
+            while not stopped.wait(self.lease_duration / 3):
+                try:
+                    if not self.is_owner(step_key):
+                        raise FileNotFoundError
+                    os.utime(self._lease_filepath(step_key))
+                except FileNotFoundError:
+                    lease_lost.set()
+                    return
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield lease_lost
+        finally:
+            stopped.set()
+            thread.join()
+
+    def release(self, step_key, *, error_message=None):
+        """
+        Store the result of the step and remove its lease, and return False without storing the result if the lease was lost to another worker
+        """
+        if not self.is_owner(step_key):
+            return False
+
+        with open(self._result_filepath(step_key), "w") as f:
+            yaml.dump({"worker": self.worker, "error_message": error_message}, f, Dumper=yaml.Dumper)
+        try:
+            os.remove(self._lease_filepath(step_key))
+        except FileNotFoundError:
+            pass
+        return True
@@ -0,0 +1,156 @@
+import gurobipy as gp
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+
+class TemporalExpression:
+    """
+    Linear expression with a value per timestamp, stored as matrix variables (variable index ranges) with a coefficient array per range
+    """
+
+    def __init__(self, constant, *, terms=None):
+        # The constant has a value per timestamp and each term is a tuple of a matrix variable and its coefficients
+        self.constant = np.asarray(constant, dtype="float64")
+        self.terms = terms if terms is not None else []
+
+    @classmethod
+    def from_variables(cls, variables, coefficients=1):
+        """
+        Create an expression from a matrix variable, the coefficients are either a scalar or array with a value per timestamp, or a (timestamps x variables) matrix
+        """
+        timestamp_count = coefficients.shape[0] if np.ndim(coefficients) == 2 else variables.shape[0]
+        return cls(np.zeros(timestamp_count), terms=[(variables, coefficients)])
+
+    def __len__(self):
+        return len(self.constant)
+
+    def __add__(self, other):
+        if isinstance(other, TemporalExpression):
+            return TemporalExpression(self.constant + other.constant, terms=self.terms + other.terms)
+        return TemporalExpression(self.constant + np.asarray(other, dtype="float64"), terms=list(self.terms))
+
+    def __radd__(self, other):
+        return self + other
+
+    def __neg__(self):
+        return self * -1
+
+    def __sub__(self, other):
+        return self + -other
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, factor):
+        assert np.isscalar(factor)
+
+        return TemporalExpression(self.constant * factor, terms=[(variables, coefficients * factor) for variables, coefficients in self.terms])
+
+    def __rmul__(self, factor):
+        return self * factor
+
+    def to_matrix_expression(self):
+        """
+        Return the expression as a Gurobi MLinExpr with a row per timestamp
+        """
+        matrix_expression = gp.MLinExpr.zeros(self.constant.shape) + self.constant
+        for variables, coefficients in self.terms:
+            if np.ndim(coefficients) == 2:
+                matrix_expression += coefficients @ variables
+            elif np.ndim(coefficients) == 1:
+                matrix_expression += scipy.sparse.diags(coefficients, format="csr") @ variables
+            else:
+                matrix_expression += coefficients * variables
+        return matrix_expression
+
+    def weighted_sum(self, weights):
+        """
+        Return the sum of the expression over all timestamps multiplied by their weight as a Gurobi LinExpr
+        """
+        weights = np.broadcast_to(np.asarray(weights, dtype="float64"), self.constant.shape)
+
+        linear_expression = gp.LinExpr(float(weights @ self.constant))
+        for variables, coefficients in self.terms:
+            # Calculate the coefficient of each variable and only add the variables that have a non-zero coefficient
+            if np.ndim(coefficients) == 2:
+                variable_coefficients = np.asarray(coefficients.T @ weights).ravel()
+            else:
+                variable_coefficients = weights * coefficients
+            relevant_indices = np.flatnonzero(variable_coefficients)
+            linear_expression.addTerms(variable_coefficients[relevant_indices].tolist(), variables[relevant_indices].tolist())
+        return linear_expression
+
+    def sum(self, mask=True):
+        """
+        Return the sum of the expression over all (masked) timestamps as a Gurobi LinExpr
+        """
+        return self.weighted_sum(np.asarray(mask, dtype="float64"))
+
+    def mean(self):
+        """
+        Return the mean of the expression over all timestamps as a Gurobi LinExpr
+        """
+        return self.weighted_sum(1 / len(self))
+
+    def evaluate(self, variable_values=None, *, solution=None):
+        """
+        Return the value of the expression per timestamp after the model is solved (the values of each matrix variable are only retrieved once per variable_values dictionary)
+        """
+        if variable_values is None:
+            variable_values = {}
+
+        values = self.constant.copy()
+        for variables, coefficients in self.terms:
+            # Retrieve all values of the matrix variable at once, from the solution if the model was not solved by Gurobi
+            if id(variables) not in variable_values:
+                variable_values[id(variables)] = variables.X if solution is None else solution.get_values(variables)
+
+            if np.ndim(coefficients) == 2:
+                values += coefficients @ variable_values[id(variables)]
+            else:
+                values += coefficients * variable_values[id(variables)]
+        return values
+
+
+class TemporalExpressionDict(dict):
+    """
+    Dictionary with a temporal expression per column, which supports the parts of the DataFrame interface that are used to build the model
+    """
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    @property
+    def columns(self):
+        return pd.Index(list(self.keys()))
+
+    def __setitem__(self, column_name, value):
+        # Convert scalars and Series into a constant temporal expression
+        if not isinstance(value, TemporalExpression):
+            if isinstance(value, pd.Series):
+                value = value.reindex(self.index)
+            value = TemporalExpression(np.broadcast_to(np.asarray(value, dtype="float64"), (len(self.index),)))
+        super().__setitem__(column_name, value)
+
+    def insert(self, loc, column_name, value):
+        """
+        Insert a column at a specific location, like DataFrame.insert
+        """
+        items = list(self.items())
+        self.clear()
+        for current_column_name, current_value in items[:loc]:
+            self[current_column_name] = current_value
+        self[column_name] = value
+        for current_column_name, current_value in items[loc:]:
+            self[current_column_name] = current_value
+
+    def evaluate(self, variable_values=None, *, solution=None):
+        """
+        Return a DataFrame with the values of all columns after the model is solved
+        """
+        if variable_values is None:
+            variable_values = {}
+
+        return pd.DataFrame({column_name: temporal_expression.evaluate(variable_values, solution=solution) for column_name, temporal_expression in self.items()}, index=self.index)
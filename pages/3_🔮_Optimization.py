@@ -4,6 +4,7 @@ import sys
 import numpy as np
 import streamlit as st
 
+import jobs
 import optimization
 import utils
 import validate
@@ -62,6 +63,14 @@ with st.sidebar.expander("Scope"):
     resolutions = [f"{i}H" for i in range(24, 0, -1) if 24 % i == 0]
     config["resolution"] = st.select_slider("Resolution", resolutions, value="1H", format_func=utils.format_resolution)
 
+    # Select if the time series should be aggregated into representative periods
+    if st.checkbox("Representative periods", help="Only model a number of representative days or weeks that are clustered from the time series"):
+        config["time_aggregation"] = {}
+        col1, col2 = st.columns(2)
+        period_options = {"1D": "Days", "7D": "Weeks"}
+        config["time_aggregation"]["period"] = col1.selectbox("Period", period_options.keys(), format_func=lambda key: period_options[key])
+        config["time_aggregation"]["period_count"] = col2.number_input("Number of periods", value=12, min_value=1, max_value=365)
+
     # Check if the config exceeds the demo bounds
     exceeds_demo = utils.is_demo and (config["climate_years"]["end"] > config["climate_years"]["start"] or len(config["country_codes"]) > 3)
 
@@ -144,6 +153,11 @@ with st.sidebar.expander("Sensitivity analysis"):
     if sensitivity_analysis_type == "curtailment":
         sensitivity_config["step_factor"] = st.number_input("Step factor", value=1.2, min_value=1.05, step=0.05)
         sensitivity_config["max_lcoe"] = st.number_input("Maximum LCOE (€/MWh)", value=800, min_value=1, max_value=2000)
+        search_options = {"adaptive": "Adaptive search", "geometric": "Geometric steps"}
+        sensitivity_config["search"] = st.selectbox("Step placement", search_options.keys(), format_func=lambda key: search_options[key], help="The adaptive search brackets the feasible IRES costs with solves at a daily resolution and only solves the steps where the curve bends at the full resolution, the geometric steps are solved one after the other until the model is infeasible")
+        if sensitivity_config["search"] == "adaptive":
+            sensitivity_config["step_count"] = st.slider("Number of steps", value=10, min_value=3, max_value=50)
+            sensitivity_config["worker_count"] = st.slider("Simultaneous runs", value=1, min_value=1, max_value=min(os.cpu_count(), sensitivity_config["step_count"]), help="The threads are divided over the simultaneous runs")
     elif sensitivity_analysis_type == "climate_years":
         number_of_climate_years = config["climate_years"]["end"] - config["climate_years"]["start"] + 1
         if number_of_climate_years < 3:
@@ -208,10 +222,22 @@ with st.sidebar.expander("Sensitivity analysis"):
         sensitivity_steps = np.linspace(start=np.log10(sensitivity_start), stop=np.log10(sensitivity_stop), num=number_steps)
         sensitivity_config["steps"] = {f"{step:.3f}": float(10 ** step) for step in sensitivity_steps}
 
+    # Select the number of steps that are optimized simultaneously (the geometric curtailment steps depend on the previous steps, so they can't run simultaneously)
+    if sensitivity_config and len(sensitivity_config.get("steps", {})) > 1:
+        sensitivity_config["worker_count"] = st.slider("Simultaneous runs", value=1, min_value=1, max_value=min(os.cpu_count(), len(sensitivity_config["steps"])), help="The threads are divided over the simultaneous runs")
+
+    # Check if the model should be built once and updated for each step (only possible if the steps run one after the other)
+    if sensitivity_config and sensitivity_config.get("worker_count", 1) == 1 and sensitivity_config.get("search") != "adaptive":
+        sensitivity_config["warm_start"] = st.checkbox("Warm-start the steps", help="Update the model of the previous step instead of rebuilding it, so the solver can start from the previous solution")
+
 # Set the optimization parameters
 with st.sidebar.expander("Optimization parameters"):
     config["optimization"] = {}
 
+    # Select the solver
+    solver_options = {"gurobi": "Gurobi", "highs": "HiGHS (open-source)"}
+    config["optimization"]["solver"] = st.selectbox("Solver", solver_options.keys(), format_func=lambda key: solver_options[key], help="HiGHS does not require a license, it chooses the method itself if a concurrent method is selected")
+
     # Select the optimization method
     method_options = {-1: "Automatic", 0: "Primal simplex", 1: "Dual simplex", 2: "Barrier", 3: "Concurrent", 4: "Deterministic concurrent", 5: "Deterministic concurrent simplex"}
     config["optimization"]["method"] = st.selectbox("Method", method_options.keys(), index=3, format_func=lambda key: method_options[key])
@@ -226,21 +252,93 @@ with st.sidebar.expander("Optimization parameters"):
     default_thread_count = 1 if utils.is_demo else cpu_count
     config["optimization"]["thread_count"] = st.slider("Thread count", value=default_thread_count, min_value=1, max_value=cpu_count, disabled=utils.is_demo, help=demo_disabled_message)
 
+    # Check if the climate years should be solved as separate subproblems (only possible if multiple climate years are modeled and they are solved by Gurobi)
+    climate_year_count = config["climate_years"]["end"] - config["climate_years"]["start"] + 1
+    if climate_year_count > 1 and config["optimization"]["solver"] == "gurobi" and st.checkbox("Decompose the climate years", help="Solve a dispatch subproblem per climate year and find the optimal investments with a master problem (Benders decomposition)"):
+        config["decomposition"] = {}
+        col1, col2 = st.columns(2)
+        config["decomposition"]["gap"] = col1.select_slider("Relative gap", options=[10 ** i for i in range(-6, 0)], value=10 ** -3)
+        config["decomposition"]["max_iterations"] = col2.number_input("Maximum iterations", value=200, min_value=1, max_value=10 ** 4)
+        config["decomposition"]["worker_count"] = st.slider("Simultaneous subproblems", value=min(cpu_count, climate_year_count), min_value=1, max_value=min(cpu_count, climate_year_count), help="The threads are divided over the simultaneous subproblems")
+
+    # Check if the model should first be solved at coarser resolutions (not possible in combination with the decomposition)
+    coarse_resolutions = [resolution for resolution in resolutions if int(resolution[:-1]) > int(config["resolution"][:-1])]
+    if coarse_resolutions and config.get("decomposition") is None and st.checkbox("Refine from coarser resolutions", help="Solve the model at coarser resolutions first and start each stage from the capacities of the previous stage (the start is only used by the primal simplex method, with the barrier method the stages are only coupled if the capacities are bounded)"):
+        config["multi_resolution"] = {}
+        default_resolutions = [resolution for resolution in ["24H", "6H"] if resolution in coarse_resolutions]
+        config["multi_resolution"]["resolutions"] = st.multiselect("Coarse resolutions", coarse_resolutions, default=default_resolutions, format_func=utils.format_resolution)
+        capacity_margin_options = {None: "No bounds", 0.1: "10%", 0.25: "25%", 0.5: "50%"}
+        config["multi_resolution"]["capacity_margin"] = st.selectbox("Capacity bounds", capacity_margin_options.keys(), format_func=lambda key: capacity_margin_options[key], help="Limit the non-zero capacities to this margin around the capacities of the previous stage, the result can then be suboptimal (the number of capacities that ended at their bound is stored with the duration)")
+
+    # Check if the constraints should be created with the matrix API
+    config["optimization"]["vectorized_builder"] = st.checkbox("Vectorized model builder", value=False, help="Create the constraints with sparse matrices instead of a constraint per timestamp, the model is equivalent but its rows and columns are in a different order, so a degenerate model can end at another optimum")
+
+    # Check if the variables and constraints that can only be zero should be left out of the model
+    config["optimization"]["reduce_model"] = st.checkbox("Reduce the model", value=True, help="Leave out the variables and constraints that can only be zero or are always satisfied, so the presolve has less work")
+
+    # Check if the built model should be cached, so it's loaded instead of rebuilt when the same model is run again
+    config["optimization"]["model_cache"] = st.checkbox("Cache the built model", disabled=utils.is_demo, help="Only the solver parameters can differ from the cached model")
+
+    # Select the file format of the temporal results and capacities
+    output_format_options = {"csv": "CSV", "parquet": "Parquet (compressed)"}
+    config["optimization"]["output_format"] = st.selectbox("Output format", output_format_options.keys(), format_func=lambda key: output_format_options[key], help="Parquet files are smaller and are read a lot faster for multi-year runs")
+
     # Check if the optimization data should be stored
     config["optimization"]["store_model"] = st.checkbox("Store optimization data", disabled=utils.is_demo, help=demo_disabled_message)
 
+    # Select the memory that is reserved for each run, so the worker doesn't start more runs than fit in the memory
+    memory = st.number_input("Memory per run (GB)", value=8.0, min_value=0.0, step=1.0, disabled=utils.is_demo, help="The worker only starts a run if its memory and threads fit in the remaining memory and cores")
+
 # Check if a notification should be send and results uploaded when the model finishes
 dropbox_keys_available = utils.get_env("DROPBOX_APP_KEY") and utils.get_env("DROPBOX_APP_SECRET") and utils.get_env("DROPBOX_REFRESH_TOKEN")
 config["upload_results"] = st.sidebar.checkbox("Upload results to Dropbox", disabled=not dropbox_keys_available or utils.is_demo, help=demo_disabled_message)
 config["send_notification"] = st.sidebar.checkbox("Send a notification when finished", disabled=not utils.get_env("PUSHOVER_USER_KEY") or not utils.get_env("PUSHOVER_API_TOKEN") or utils.is_demo, help=demo_disabled_message)
 
-# Run the model if the button has been pressed
+# Check if the model of the previous run should be updated instead of rebuilt, so the effect of a parameter can be explored quickly (the model is kept in this session, so the run is not submitted to the job queue)
+reuse_model = st.sidebar.checkbox("Reuse the model of the previous run", disabled=bool(sensitivity_config) or utils.is_demo, help="The model is only rebuilt if the changed parameters affect its structure, the run is started in this session instead of the job queue")
+
+# Submit the run to the job queue if the button has been pressed, the demo has no worker so its runs are started in this session
+job_queue = jobs.JobQueue()
 invalid_config = not validate.is_config(config)
 invalid_sensitivity_config = bool(sensitivity_config) and not validate.is_sensitivity_config(sensitivity_config)
 if st.sidebar.button("Run model", type="primary", use_container_width=True, disabled=invalid_config or invalid_sensitivity_config or exceeds_demo):
-    if config["name"] in utils.get_previous_runs(include_uncompleted_runs=True):
+    if config["name"] in utils.get_previous_runs(include_uncompleted_runs=True) or config["name"] in job_queue.get_active_names():
         st.error(f"There is already a run called '{config['name']}'")
-    elif sensitivity_config:
+    elif reuse_model:
+        st.session_state.model_handle = optimization.run(config, output_directory=utils.path("output", config["name"]), model_handle=st.session_state.get("model_handle"))
+    elif utils.is_demo and sensitivity_config:
         optimization.run_sensitivity(config, sensitivity_config)
-    else:
+    elif utils.is_demo:
         optimization.run(config, output_directory=utils.path("output", config["name"]))
+    elif sensitivity_config:
+        job_queue.submit_sensitivity(config, sensitivity_config, memory=memory)
+        st.success(f"The '{config['name']}' sensitivity analysis has been added to the job queue")
+    else:
+        st.session_state.pop("model_handle", None)
+        job_queue.submit_run(config, memory=memory)
+        st.success(f"Run '{config['name']}' has been added to the job queue")
+
+# Show the jobs in the queue
+if not utils.is_demo:
+    st.subheader("Jobs")
+
+    # Show a warning if there is no worker that runs the jobs
+    if job_queue.get_workers().empty:
+        st.warning("There is no worker running, start one with `python -m jobs` to run the queued jobs")
+
+    # Show the most recent jobs and their progress
+    job_overview = job_queue.get_jobs()
+    if job_overview.empty:
+        st.info("No jobs have been submitted yet")
+    else:
+        st.button("Refresh", help="Get the latest progress of the jobs")
+        st.dataframe(job_overview[["name", "step_key", "state", "progress", "error_message", "core_count", "memory", "submitted_at", "started_at", "finished_at"]], use_container_width=True)
+
+        # Cancel a job that is queued or running
+        active_job_ids = job_overview[job_overview.state.isin(["queued", "running"]) & job_overview.parent_id.isna()].index.tolist()
+        if active_job_ids:
+            col1, col2 = st.columns([3, 1])
+            job_id = col1.selectbox("Job", active_job_ids, format_func=lambda job_id: f"{job_id}: {job_overview.loc[job_id, 'name']} ({job_overview.loc[job_id, 'state']})", label_visibility="collapsed")
+            if col2.button("Cancel job", use_container_width=True):
+                job_queue.cancel_job(int(job_id))
+                st.experimental_rerun()
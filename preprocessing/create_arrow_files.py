@@ -0,0 +1,18 @@
+import streamlit as st
+
+import utils
+import validate
+
+
+def create_arrow_files(filepaths):
+    """
+    Store the preprocessed temporal data of the CSV files as memory-mappable Arrow files next to them
+    """
+    assert validate.is_filepath_list(filepaths, suffix=".csv")
+
+    for filepath in filepaths:
+        with st.spinner(f"Creating the Arrow file for {filepath.name}"):
+            # The interconnection files have two header rows
+            header = [0, 1] if filepath.parent.name == "interconnections" else 0
+            temporal_data = utils.read_temporal_data(filepath, header=header)
+            utils.write_arrow(filepath.with_suffix(".arrow"), temporal_data)
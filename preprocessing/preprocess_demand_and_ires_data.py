@@ -3,6 +3,7 @@ import streamlit as st
 
 import utils
 import validate
+from .create_arrow_files import create_arrow_files
 
 
 def _get_relevant_sheet_names(filepath, market_node):
@@ -129,6 +130,9 @@ def preprocess_demand_and_ires_data(scenarios):
     countries = utils.read_yaml(utils.path("input", "countries.yaml"))
     market_nodes = [market_node for country in countries for market_node in country["market_nodes"]]
 
+    # Keep track of the CSV files, so they can be stored as Arrow files as well
+    csv_filepaths = []
+
     for scenario_index, scenario in enumerate(scenarios):
         # Define the directory variables
         climate_directory = utils.path("input", "eraa", "Climate Data")
@@ -147,6 +151,7 @@ def preprocess_demand_and_ires_data(scenarios):
                 filepath_demand = utils.path("input", "eraa", "Demand Data", f"Demand_TimeSeries_{scenario['year']}_NationalEstimates.xlsx")
                 demand_data = _import_data(demand_data, filepath_demand, market_node=market_node, column_name=market_node)
         demand_data.to_csv(output_directory / "demand.csv")
+        csv_filepaths.append(output_directory / "demand.csv")
 
         # Import the IRES data
         for market_node_index, market_node in enumerate(market_nodes):
@@ -165,5 +170,9 @@ def preprocess_demand_and_ires_data(scenarios):
 
                 # Store the data in a CSV file
                 ires_data.to_csv(ires_directory / f"{market_node}.csv")
+                csv_filepaths.append(ires_directory / f"{market_node}.csv")
+
+    # Store the data as Arrow files, so the optimization can read them without parsing the CSV files
+    create_arrow_files(csv_filepaths)
 
     st.success("The demand and IRES data for all market nodes is successfully preprocessed")
@@ -6,6 +6,7 @@ import streamlit as st
 
 import utils
 import validate
+from .create_arrow_files import create_arrow_files
 
 
 def _get_hydropower_series(sheet, *, min_row, max_row, min_col, max_col, interval):
@@ -51,6 +52,9 @@ def preprocess_hydropower_data(scenarios):
     """
     assert validate.is_list_like(scenarios)
 
+    # Keep track of the temporal CSV files, so they can be stored as Arrow files as well
+    csv_filepaths = []
+
     for scenario in scenarios:
         # Get a list of all market nodes with hydropower data
         filepath_hydropower = utils.path("input", "eraa", "Climate Data", f"PEMMDB_XX00_Hydro Inflow_{scenario['year']}")
@@ -101,7 +105,12 @@ def preprocess_hydropower_data(scenarios):
 
                     # Store the temporal data
                     temporal_data.to_csv(directory / f"{market_node}.csv")
+                    csv_filepaths.append(directory / f"{market_node}.csv")
 
             # Store the capacities
             capacity.to_csv(directory / "capacity.csv")
+
+    # Store the temporal data as Arrow files, so the optimization can read them without parsing the CSV files
+    create_arrow_files(csv_filepaths)
+
     st.success("The hydropower data for all market nodes is successfully preprocessed")
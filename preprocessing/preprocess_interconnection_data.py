@@ -3,6 +3,7 @@ import streamlit as st
 
 import utils
 import validate
+from .create_arrow_files import create_arrow_files
 
 
 def _format_export_limit_type(limit_type):
@@ -27,6 +28,9 @@ def preprocess_interconnection_data(scenarios):
     """
     assert validate.is_list_like(scenarios)
 
+    # Keep track of the CSV files, so they can be stored as Arrow files as well
+    csv_filepaths = []
+
     for scenario_index, scenario in enumerate(scenarios):
         interconnection_types = ["hvac", "hvdc", "limits"]
         for interconnection_type_index, interconnection_type in enumerate(interconnection_types):
@@ -45,12 +49,14 @@ def preprocess_interconnection_data(scenarios):
                     hvac = hvac[sorted(hvac.columns)]
                     hvac.index = utils.create_datetime_index(hvac.index, scenario["year"])
                     hvac.to_csv(output_directory / "hvac.csv")
+                    csv_filepaths.append(output_directory / "hvac.csv")
 
                 if interconnection_type == "hvdc":
                     hvdc = pd.read_excel(filepath, sheet_name="HVDC", index_col=[0, 1], skiprows=10, header=[0, 1])
                     hvdc = hvdc[sorted(hvdc.columns)]
                     hvdc.index = utils.create_datetime_index(hvdc.index, scenario["year"])
                     hvdc.to_csv(output_directory / "hvdc.csv")
+                    csv_filepaths.append(output_directory / "hvdc.csv")
 
                 if interconnection_type == "limits":
                     limits = pd.read_excel(filepath, sheet_name="Max limit", index_col=[0, 1], skiprows=9)
@@ -60,5 +66,9 @@ def preprocess_interconnection_data(scenarios):
                     limits = limits[sorted(limits.columns)]
                     limits.index = utils.create_datetime_index(limits.index, scenario["year"])
                     limits.to_csv(output_directory / "limits.csv")
+                    csv_filepaths.append(output_directory / "limits.csv")
+
+    # Store the data as Arrow files, so the optimization can read them without parsing the CSV files
+    create_arrow_files(csv_filepaths)
 
     st.success("The data for all interconnections is successfully preprocessed")
@@ -0,0 +1,2 @@
+from .export_model import export_model
+from .tune_parameters import tune_parameters
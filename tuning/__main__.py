@@ -0,0 +1,20 @@
+import argparse
+import os
+
+import optimization
+from .export_model import export_model
+from .tune_parameters import tune_parameters
+
+if __name__ == "__main__":
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description="Tune the Gurobi parameters for the model of a previous run")
+    parser.add_argument("run_name", help="Name of the run in the output directory")
+    parser.add_argument("--worker-count", type=int, default=1, help="Number of trials that are solved simultaneously")
+    parser.add_argument("--thread-count", type=int, default=max(os.cpu_count() // 2, 1), help="Number of threads per trial")
+    parser.add_argument("--time-limit", type=float, default=3600, help="Maximum runtime of a trial in seconds")
+    args = parser.parse_args()
+
+    # Export the model of the run and tune the parameters
+    model_filepath = export_model(args.run_name, status=optimization.ConsoleStatus())
+    trials = tune_parameters(model_filepath, worker_count=args.worker_count, thread_count=args.thread_count, time_limit=args.time_limit)
+    print(trials.head(10).to_string(index=False))
@@ -0,0 +1,27 @@
+import optimization
+import utils
+import validate
+
+
+def export_model(run_name, *, status=None):
+    """
+    Rebuild the model of a previous run from its config and store it as an MPS file in the tuning directory, return the path of the MPS file
+    """
+    assert validate.is_string(run_name)
+
+    # Initialize a status object if not defined yet
+    if status is None:
+        status = optimization.Status()
+
+    # Get the config of the run, the model is built as a single model, also if the run was decomposed or refined from coarser resolutions
+    config = utils.read_yaml(utils.path("output", run_name, "config.yaml"))
+    config.pop("decomposition", None)
+    config.pop("multi_resolution", None)
+
+    # Build the model and store it
+    model_handle = optimization.build_model(config, status=status)
+    model_directory = utils.path("tuning", "models")
+    model_directory.mkdir(parents=True, exist_ok=True)
+    model_filepath = model_directory / f"{run_name}.mps"
+    model_handle.model.write(str(model_filepath))
+    return model_filepath
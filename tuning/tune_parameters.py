@@ -0,0 +1,100 @@
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import gurobipy as gp
+import pandas as pd
+import yaml
+
+import utils
+import validate
+from optimization.solvers import barrier_parameters
+
+# The values of the parameters that are hard-coded in the model, the first value of each parameter is the Gurobi default
+parameter_options = {
+    "Method": [-1, 1, 2],
+    "BarHomogeneous": [-1, 1],
+    "Aggregate": [1, 0],
+    "Presolve": [-1, 2],
+    "NumericFocus": [0, 1],
+    "Crossover": [-1, 0],
+}
+
+
+def _get_parameter_combinations():
+    """
+    Return all combinations of the parameter options, without the combinations that only differ in a barrier parameter if the barrier method is not used
+    """
+    parameter_combinations = []
+    for values in itertools.product(*parameter_options.values()):
+        parameters = dict(zip(parameter_options.keys(), values))
+
+        # Set the barrier parameters to their default if the dual simplex method is used
+        if parameters["Method"] == 1:
+            parameters.update({parameter_name: parameter_options[parameter_name][0] for parameter_name in barrier_parameters})
+
+        if parameters not in parameter_combinations:
+            parameter_combinations.append(parameters)
+    return parameter_combinations
+
+
+def _run_trial(model_filepath, parameters, *, thread_count, time_limit):
+    """
+    Solve the model with the given parameters in a worker process and return its status and runtime
+    """
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.read(str(model_filepath), env) as model:
+        for parameter_name, value in parameters.items():
+            model.setParam(parameter_name, value)
+        model.setParam("Threads", thread_count)
+        model.setParam("TimeLimit", time_limit)
+        model.optimize()
+        return {**parameters, "status": model.status, "runtime": model.Runtime, "objective": model.ObjVal if model.SolCount > 0 else None}
+
+
+def tune_parameters(model_filepath, *, worker_count=1, thread_count=1, time_limit=3600, status=None):
+    """
+    Solve the model with each combination of the hard-coded parameters in parallel, store the trials, and store the fastest parameters for the size class of the model so future runs use them
+    """
+    assert validate.is_filepath(model_filepath, suffix=".mps", existing=True)
+    assert validate.is_integer(worker_count, min_value=1)
+    assert validate.is_integer(thread_count, min_value=1)
+    assert validate.is_number(time_limit, min_value=0)
+
+    # Get the size class of the model
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.read(str(model_filepath), env) as model:
+        size_class = utils.get_model_size_class(model.NumNZs)
+
+    # Run the trials in spawned worker processes, so each worker creates its own Gurobi environment
+    parameter_combinations = _get_parameter_combinations()
+    trials = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=worker_count, mp_context=context) as executor:
+        futures = [executor.submit(_run_trial, model_filepath, parameters, thread_count=thread_count, time_limit=time_limit) for parameters in parameter_combinations]
+        for future in as_completed(futures):
+            trials.append(future.result())
+            if status is not None:
+                status.update(f"Finished {len(trials)}/{len(parameter_combinations)} tuning trials")
+
+    # Store the trials sorted by their runtime
+    trials = pd.DataFrame(trials).sort_values("runtime")
+    trials_directory = utils.path("tuning", "trials")
+    trials_directory.mkdir(parents=True, exist_ok=True)
+    trials.to_csv(trials_directory / f"{model_filepath.stem}.csv", index=False)
+
+    # Don't store the parameters if none of the trials was solved to optimality
+    optimal_trials = trials[trials.status == gp.GRB.OPTIMAL]
+    if optimal_trials.empty:
+        return trials
+
+    # Store the parameters of the fastest trial for the size class of the model
+    fastest_trial = optimal_trials.iloc[0]
+    parameters_filepath = utils.path("tuning", "parameters.yaml")
+
+    # The parameters file is not read with the cached YAML reader, so the size classes that another tuning run stored recently are not overwritten
+    tuned_size_classes = {}
+    if parameters_filepath.is_file():
+        with open(parameters_filepath) as f:
+            tuned_size_classes = yaml.load(f, Loader=yaml.SafeLoader) or {}
+    tuned_size_classes[size_class] = {"model": model_filepath.stem, "runtime": float(fastest_trial.runtime), "parameters": {parameter_name: int(fastest_trial[parameter_name]) for parameter_name in parameter_options}}
+    utils.write_yaml(parameters_filepath, tuned_size_classes, exist_ok=True)
+    return trials
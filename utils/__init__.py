@@ -1,5 +1,5 @@
 import utils.previous_run as previous_run
-from .cache import cache
+from .cache import cache, clear_cache
 from .calculate_crf import calculate_crf
 from .calculate_distance import calculate_distance
 from .calculate_lcoe import calculate_lcoe
@@ -14,6 +14,7 @@ from .format_column_name import format_column_name
 from .format_resolution import format_resolution
 from .format_str import format_str
 from .format_technology import format_technology
+from .get_cached_input_data import get_cached_input_data
 from .get_country_of_market_node import get_country_of_market_node
 from .get_country_property import get_country_property
 from .get_current_capacity_per_ires_node import get_current_capacity_per_ires_node
@@ -27,29 +28,40 @@ from .get_hydropower_capacity import get_hydropower_capacity
 from .get_ires_capacity import get_ires_capacity
 from .get_market_nodes_for_countries import get_market_nodes_for_countries
 from .get_mean_temporal_results import get_mean_temporal_results
+from .get_model_size_class import get_model_size_class
 from .get_nested_key import get_nested_key
 from .get_next_run_name import get_next_run_name
 from .get_potential_per_ires_node import get_potential_per_ires_node
 from .get_previous_runs import get_previous_runs
+from .get_representative_timestamps import get_representative_timestamps
+from .get_result_filepath import get_result_filepath
 from .get_scenarios import get_scenarios
 from .get_storage_capacity import get_storage_capacity
 from .get_technologies import get_technologies
 from .get_technology import get_technology
 from .get_temporal_results import get_temporal_results
+from .get_tuned_parameters import get_tuned_parameters
 from .is_demo import is_demo
 from .merge_dataframes_on_column import merge_dataframes_on_column
 from .path import path
+from .read_arrow import read_arrow
 from .read_csv import read_csv
+from .read_dataframe import read_dataframe
+from .read_parquet import read_parquet
+from .read_resampled_temporal_data import read_resampled_temporal_data
 from .read_shapefile import read_shapefile
 from .read_temporal_data import read_temporal_data
 from .read_text import read_text
 from .read_yaml import read_yaml
+from .select_bending_points import select_bending_points
 from .send_notification import send_notification
 from .set_nested_key import set_nested_key
 from .sort_technology_names import sort_technology_names
 from .unzip import unzip
 from .upload_to_dropbox import upload_to_dropbox
 from .validate_files import validate_files
+from .write_arrow import write_arrow
+from .write_dataframe import write_dataframe
 from .write_text import write_text
 from .write_yaml import write_yaml
 from .zip import zip
@@ -1,4 +1,57 @@
-import streamlit as st
+import functools
+import sys
+import time
+from copy import deepcopy
 
-# Remove the spinner and set the TTL of the Streamlit memo cache
-cache = st.cache_data(show_spinner=False, ttl=120)
+# The results of the functions that are cached in memory when the Streamlit app is not running
+_cached_results = []
+
+
+def _cache_in_memory(function, *, ttl=120):
+    """
+    Cache the results of a function in memory for the TTL in seconds, the results are copied like in the Streamlit memo cache so the caller can change them
+    """
+    results = {}
+    _cached_results.append(results)
+
+    @functools.wraps(function)
+    def cached_function(*args, **kwargs):
+        # Don't cache calls with arguments that can't be hashed, like DataFrames and lists
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return function(*args, **kwargs)
+
+        # Calculate the result if it isn't cached or has expired, and remove the other expired results
+        now = time.monotonic()
+        if key not in results or now - results[key][0] > ttl:
+            for expired_key in [cached_key for cached_key, (cached_at, _) in results.items() if now - cached_at > ttl]:
+                del results[expired_key]
+            results[key] = (now, function(*args, **kwargs))
+        return deepcopy(results[key][1])
+
+    return cached_function
+
+
+def clear_cache():
+    """
+    Remove all cached results
+    """
+    if is_streamlit_running:
+        import streamlit as st
+
+        st.cache_data.clear()
+    for results in _cached_results:
+        results.clear()
+
+
+# Only use the Streamlit memo cache if the app is running, so the headless runners don't import Streamlit
+is_streamlit_running = "streamlit" in sys.modules and sys.modules["streamlit"].runtime.exists()
+if is_streamlit_running:
+    import streamlit as st
+
+    # Remove the spinner and set the TTL of the Streamlit memo cache
+    cache = st.cache_data(show_spinner=False, ttl=120)
+else:
+    cache = _cache_in_memory
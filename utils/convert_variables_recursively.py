@@ -1,23 +1,76 @@
 import gurobipy as gp
+import numpy as np
 import pandas as pd
+import scipy.sparse
 
 
-def convert_variables_recursively(data):
+def _convert_array(values, *, solution):
     """
-    Store a dictionary or list as .yaml file
+    Convert an array of objects by calculating the values of all variables and linear expressions at once from a sparse coefficient matrix, without the overhead of applymap
+    """
+    flat_values = values.ravel()
+    converted_values = flat_values.copy()
+    value_types = [type(value) for value in flat_values]
+
+    # Create a sparse matrix with the coefficient of each variable in each variable and linear expression and a vector with their constants
+    is_linear = np.array([value_type is gp.Var or value_type is gp.LinExpr for value_type in value_types], dtype=bool)
+    if is_linear.any():
+        linear_values = flat_values[is_linear]
+        constants = np.zeros(len(linear_values))
+        row_indices = []
+        column_indices = []
+        coefficients = []
+        variables = []
+        column_index_by_variable_index = {}
+        for row_index, value in enumerate(linear_values):
+            if type(value) is gp.Var:
+                terms = [(value, 1.0)]
+            else:
+                terms = [(value.getVar(term_index), value.getCoeff(term_index)) for term_index in range(value.size())]
+                constants[row_index] = value.getConstant()
+
+            # Each variable gets a single column, also if it occurs in multiple cells
+            for variable, coefficient in terms:
+                column_index = column_index_by_variable_index.get(variable.index)
+                if column_index is None:
+                    column_index = column_index_by_variable_index[variable.index] = len(variables)
+                    variables.append(variable)
+                row_indices.append(row_index)
+                column_indices.append(column_index)
+                coefficients.append(coefficient)
+
+        # Get the values of all variables at once and calculate the values of the cells with a single matrix multiplication
+        if variables:
+            variable_values = gp.MVar.fromlist(variables).X if solution is None else solution.get_values(variables)
+        else:
+            variable_values = np.zeros(0)
+        coefficient_matrix = scipy.sparse.csr_matrix((coefficients, (row_indices, column_indices)), shape=(len(linear_values), len(variables)))
+        converted_values[is_linear] = coefficient_matrix @ variable_values + constants
+
+    # Get the values of the quadratic expressions
+    is_quadratic = np.array([value_type is gp.QuadExpr for value_type in value_types], dtype=bool)
+    if is_quadratic.any():
+        converted_values[is_quadratic] = [expression.getValue() if solution is None else solution.get_value(expression) for expression in flat_values[is_quadratic]]
+
+    return converted_values.reshape(values.shape)
+
+
+def convert_variables_recursively(data, *, solution=None):
+    """
+    Convert the Gurobi variables and expressions in a dictionary, list, DataFrame, or Series to their values (from the solution if the model was not solved by Gurobi)
     """
     if type(data) is dict or type(data) is gp.tupledict:
         for key, value in data.items():
-            data[key] = convert_variables_recursively(value)
+            data[key] = convert_variables_recursively(value, solution=solution)
         return data
     if type(data) is list:
-        return [convert_variables_recursively(value) for value in data]
+        return [convert_variables_recursively(value, solution=solution) for value in data]
     if type(data) is pd.core.frame.DataFrame:
-        return data.applymap(convert_variables_recursively)
+        return pd.DataFrame(_convert_array(data.to_numpy(dtype="object"), solution=solution), index=data.index, columns=data.columns).infer_objects()
     if type(data) is pd.core.series.Series:
-        return data.apply(convert_variables_recursively)
+        return pd.Series(_convert_array(data.to_numpy(dtype="object"), solution=solution), index=data.index, name=data.name).infer_objects()
     if type(data) is gp.Var:
-        return data.X
+        return data.X if solution is None else solution.get_values([data])[0]
     if type(data) in [gp.LinExpr, gp.QuadExpr]:
-        return data.getValue()
+        return data.getValue() if solution is None else solution.get_value(data)
     return data
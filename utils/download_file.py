@@ -2,7 +2,6 @@ from datetime import datetime
 
 import py7zr
 import requests
-import streamlit as st
 
 import utils
 import validate
@@ -18,6 +17,9 @@ def download_file(url, filename, *, unzip=False, chunk_size=50 * 1024, show_prog
     assert validate.is_integer(chunk_size)
     assert validate.is_bool(show_progress)
 
+    # The progress is shown in the app, Streamlit is imported here so the headless runners don't import it
+    import streamlit as st
+
     # Create a temporary filename for if it needs to be unzipped
     filename_zip = utils.path(f"temp_{datetime.now().timestamp()}.zip")
 
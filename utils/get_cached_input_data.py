@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import utils
+import validate
+
+
+def _remove_least_recently_used_files(directory, *, max_size):
+    """
+    Remove the least recently used cache files until the total size of the directory is below the maximum size
+    """
+    assert validate.is_directory_path(directory, existing=True)
+    assert validate.is_integer(max_size, min_value=0)
+
+    # Get when the cache files were last used (the modification time is updated when a file is read), skip the files that are removed by another process in the meantime
+    file_stats = []
+    for filepath in directory.glob("*.parquet"):
+        try:
+            file_stats.append((filepath, filepath.stat()))
+        except FileNotFoundError:
+            continue
+    total_size = sum(file_stat.st_size for _, file_stat in file_stats)
+
+    # Remove the oldest files until the cache fits again
+    for filepath, file_stat in sorted(file_stats, key=lambda file: file[1].st_mtime):
+        if total_size <= max_size:
+            break
+        total_size -= file_stat.st_size
+        filepath.unlink(missing_ok=True)
+
+
+def get_cached_input_data(create_data, *, parameters, source_filepaths, max_size=2 * 1024**3):
+    """
+    Return the prepared input data from the disk cache, or create and cache it if it's not cached yet or the source files have changed
+    """
+    assert validate.is_func(create_data)
+    assert validate.is_dict(parameters)
+    assert validate.is_filepath_list(source_filepaths)
+    assert validate.is_integer(max_size, min_value=0)
+
+    # Create a key based on the parameters and the modification time and size of the source files, so the cache is invalidated when a source file changes
+    sources = [{"filepath": str(filepath), "modified": filepath.stat().st_mtime_ns, "size": filepath.stat().st_size} for filepath in source_filepaths]
+    key = hashlib.sha256(json.dumps({"parameters": parameters, "sources": sources}, sort_keys=True, default=str).encode()).hexdigest()
+    cache_directory = utils.path("input", "cache")
+    filepath = cache_directory / f"{key}.parquet"
+
+    # Return the cached data if it exists and mark it as recently used, the data is created again if another process removed the file in the meantime
+    try:
+        os.utime(filepath)
+        table = pq.read_table(filepath)
+        data = table.to_pandas()
+        data.attrs = json.loads(table.schema.metadata.get(b"attrs", b"{}"))
+        return data
+    except FileNotFoundError:
+        pass
+
+    # Create the data
+    data = create_data()
+
+    # Store the data including its attributes, first in a temporary file so other processes never read a partially written file
+    cache_directory.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(data)
+    table = table.replace_schema_metadata({**table.schema.metadata, b"attrs": json.dumps(data.attrs).encode()})
+    temporary_filepath = cache_directory / f"{key}.{uuid.uuid4().hex}.tmp"
+    pq.write_table(table, temporary_filepath)
+    os.replace(temporary_filepath, filepath)
+
+    # Remove the least recently used files if the cache is too large
+    _remove_least_recently_used_files(cache_directory, max_size=max_size)
+
+    return data
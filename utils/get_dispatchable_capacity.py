@@ -20,7 +20,7 @@ def get_dispatchable_capacity(output_directory, *, group=None, country_codes=Non
         country_codes = config["country_codes"]
 
     # Get the dispatchable capacity for the relevant market nodes
-    dispatchable_capacity = utils.read_csv(output_directory / "capacity" / "dispatchable.csv", index_col=0)
+    dispatchable_capacity = utils.read_dataframe(utils.get_result_filepath(output_directory / "capacity", "dispatchable"), index_col=0)
     market_nodes = utils.get_market_nodes_for_countries(country_codes)
     dispatchable_capacity = dispatchable_capacity.loc[market_nodes]
 
@@ -20,7 +20,7 @@ def get_electrolysis_capacity(output_directory, *, group=None, country_codes=Non
         country_codes = config["country_codes"]
 
     # Get the electrolysis capacity for the relevant market nodes
-    electrolysis_capacity = utils.read_csv(output_directory / "capacity" / "electrolysis.csv", index_col=0)
+    electrolysis_capacity = utils.read_dataframe(utils.get_result_filepath(output_directory / "capacity", "electrolysis"), index_col=0)
     market_nodes = utils.get_market_nodes_for_countries(country_codes)
     electrolysis_capacity = electrolysis_capacity.loc[market_nodes]
 
@@ -1,18 +1,19 @@
+import hashlib
+
+import pandas as pd
+
 import utils
 import validate
 
 
-@utils.cache
-def _read_and_map_export_limits(*, scenario, connection_type, timestamps):
+def _read_and_map_export_limits(filepath, *, timestamps):
     """
     Read the export limits and map them to the given timestamps
     """
-    assert validate.is_scenario(scenario)
-    assert validate.is_interconnection_type(connection_type)
+    assert validate.is_filepath(filepath, suffix=".csv", existing=True)
     assert validate.is_series(timestamps)
 
     # Read the interconnection CSV file
-    filepath = utils.path("input", "scenarios", scenario, "interconnections", f"{connection_type}.csv")
     export_limits = utils.read_temporal_data(filepath, header=[0, 1])
 
     # TODO: Fix this...
@@ -27,6 +28,21 @@ def _read_and_map_export_limits(*, scenario, connection_type, timestamps):
     return timestamps.apply(lambda timestamp: export_limits.loc[timestamp.replace(year=year)])
 
 
+@utils.cache
+def _get_mapped_export_limits(*, scenario, connection_type, timestamps):
+    """
+    Return the export limits mapped to the given timestamps, from the disk cache if available
+    """
+    assert validate.is_scenario(scenario)
+    assert validate.is_interconnection_type(connection_type)
+    assert validate.is_series(timestamps)
+
+    # Get the mapped export limits from the disk cache, so they're only mapped once for each set of timestamps
+    filepath = utils.path("input", "scenarios", scenario, "interconnections", f"{connection_type}.csv")
+    parameters = {"filepath": filepath, "timestamps": hashlib.sha256(pd.util.hash_pandas_object(timestamps).to_numpy().tobytes()).hexdigest()}
+    return utils.get_cached_input_data(lambda: _read_and_map_export_limits(filepath, timestamps=timestamps), parameters=parameters, source_filepaths=[filepath])
+
+
 def get_export_limits(market_node, *, config, connection_type, index, direction="export"):
     """
     Find the relevant export limits for a market node
@@ -38,7 +54,7 @@ def get_export_limits(market_node, *, config, connection_type, index, direction=
     assert validate.is_interconnection_direction(direction)
 
     # Read and map the export limits
-    export_limits = _read_and_map_export_limits(scenario=config["scenario"], connection_type=connection_type, timestamps=index.to_series())
+    export_limits = _get_mapped_export_limits(scenario=config["scenario"], connection_type=connection_type, timestamps=index.to_series())
 
     relevant_interconnections = []
     for node in utils.get_market_nodes_for_countries(config["country_codes"]):
@@ -19,8 +19,8 @@ def get_hydropower_capacity(output_directory, *, group=None, country_codes=None)
     # Get the hydropower capacity for each market node
     hydropower_capacity = {}
     for market_node in utils.get_market_nodes_for_countries(country_codes):
-        filepath = output_directory / "capacity" / "hydropower" / f"{market_node}.csv"
-        hydropower_capacity[market_node] = utils.read_csv(filepath, index_col=0)
+        filepath = utils.get_result_filepath(output_directory / "capacity" / "hydropower", market_node)
+        hydropower_capacity[market_node] = utils.read_dataframe(filepath, index_col=0)
 
     # Return a dictionary with the hydropower capacity per market node DataFrame if not grouped
     if group is None:
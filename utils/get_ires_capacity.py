@@ -21,8 +21,8 @@ def get_ires_capacity(output_directory, *, group=None, country_codes=None):
     # Get the capacity for each market node
     ires_capacity = {}
     for market_node in utils.get_market_nodes_for_countries(country_codes):
-        filepath = output_directory / "capacity" / "ires" / f"{market_node}.csv"
-        ires_capacity[market_node] = utils.read_csv(filepath, index_col=0)
+        filepath = utils.get_result_filepath(output_directory / "capacity" / "ires", market_node)
+        ires_capacity[market_node] = utils.read_dataframe(filepath, index_col=0)
 
     # Return a dictionary with the capacity per market node DataFrame if not grouped
     if group is None:
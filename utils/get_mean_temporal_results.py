@@ -4,7 +4,7 @@ import utils
 import validate
 
 
-# Don't cache this, since the data is also cached when reading the CSV file, and it's a lot of data
+# Don't cache this, since the data is also cached when reading the CSV or Parquet file, and it's a lot of data
 def get_mean_temporal_results(output_directory, *, group=None, country_codes=None):
     """
     Return the (grouped) mean temporal results
@@ -19,8 +19,8 @@ def get_mean_temporal_results(output_directory, *, group=None, country_codes=Non
         country_codes = config["country_codes"]
 
     # Get the data
-    filepath = output_directory / "temporal" / "market_nodes" / "mean.csv"
-    mean_temporal_results = utils.read_csv(filepath, index_col=0)
+    filepath = utils.get_result_filepath(output_directory / "temporal" / "market_nodes", "mean")
+    mean_temporal_results = utils.read_dataframe(filepath, index_col=0)
 
     # Filter the countries
     relevant_market_nodes = utils.get_market_nodes_for_countries(country_codes)
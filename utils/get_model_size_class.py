@@ -0,0 +1,12 @@
+import math
+
+import validate
+
+
+def get_model_size_class(nonzero_count):
+    """
+    Return the size class of a model, which is the order of magnitude of its number of non-zeros (e.g. 1e6)
+    """
+    assert validate.is_integer(nonzero_count, min_value=0)
+
+    return f"1e{int(math.log10(max(nonzero_count, 1)))}"
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import scipy.spatial
+
+import validate
+
+
+def _find_medoids(profiles, *, cluster_count, max_iterations=100):
+    """
+    Cluster the profiles with the k-medoids (alternating) method and return the index of the medoid of each cluster and the cluster of each profile
+    """
+    profile_count = profiles.shape[0]
+    random_generator = np.random.default_rng(0)
+
+    # Select the initial medoids with the k-means++ method, so they are spread over the profiles
+    medoids = [int(random_generator.integers(profile_count))]
+    squared_distances = scipy.spatial.distance.cdist(profiles, profiles[medoids], "sqeuclidean").min(axis=1)
+    while len(medoids) < cluster_count and squared_distances.sum() > 0:
+        medoids.append(int(random_generator.choice(profile_count, p=squared_distances / squared_distances.sum())))
+        squared_distances = np.minimum(squared_distances, scipy.spatial.distance.cdist(profiles, profiles[medoids[-1:]], "sqeuclidean")[:, 0])
+    medoids = np.array(medoids)
+
+    for _ in range(max_iterations):
+        # Assign each profile to the nearest medoid
+        clusters = scipy.spatial.distance.cdist(profiles, profiles[medoids]).argmin(axis=1)
+
+        # Select the profile with the smallest total distance to the other profiles in the cluster as the new medoid
+        new_medoids = medoids.copy()
+        for cluster in range(len(medoids)):
+            members = np.flatnonzero(clusters == cluster)
+            if len(members) > 0:
+                new_medoids[cluster] = members[scipy.spatial.distance.cdist(profiles[members], profiles[members]).sum(axis=1).argmin()]
+
+        # Stop if the medoids did not change anymore
+        if np.array_equal(new_medoids, medoids):
+            break
+        medoids = new_medoids
+
+    return medoids, scipy.spatial.distance.cdist(profiles, profiles[medoids]).argmin(axis=1)
+
+
+def get_representative_timestamps(temporal_data, *, period_length, period_count):
+    """
+    Cluster the periods of the temporal data into representative periods and return a Series with the timestamp that represents each timestamp
+    """
+    assert validate.is_dataframe(temporal_data)
+    assert validate.is_integer(period_length, min_value=1)
+    assert validate.is_integer(period_count, min_value=1)
+
+    # Normalize each column between 0 and 1, so all profiles have the same weight in the clustering
+    values = temporal_data.to_numpy(dtype="float64")
+    value_range = values.max(axis=0) - values.min(axis=0)
+    normalized_values = np.divide(values - values.min(axis=0), value_range, out=np.zeros_like(values), where=value_range > 0)
+
+    # Create a profile with the normalized values of all columns for each complete period (the remaining timestamps at the end represent themselves)
+    number_of_periods = len(temporal_data.index) // period_length
+    profiles = normalized_values[: number_of_periods * period_length].reshape(number_of_periods, period_length * values.shape[1])
+
+    # Cluster the periods and get the representative period of each period
+    medoids, clusters = _find_medoids(profiles, cluster_count=min(period_count, number_of_periods))
+    representative_periods = medoids[clusters]
+
+    # Map each timestamp to the timestamp at the same position in its representative period
+    positions = np.arange(len(temporal_data.index))
+    representative_positions = positions.copy()
+    representative_positions[: number_of_periods * period_length] = np.repeat(representative_periods, period_length) * period_length + positions[: number_of_periods * period_length] % period_length
+    return pd.Series(temporal_data.index[representative_positions], index=temporal_data.index)
@@ -0,0 +1,15 @@
+import validate
+
+
+def get_result_filepath(directory, name):
+    """
+    Return the filepath of a result table, which is either stored as Parquet or CSV file
+    """
+    assert validate.is_directory_path(directory)
+    assert validate.is_string(name, min_length=1)
+
+    # Use the Parquet file if it exists, otherwise fall back to the CSV file
+    parquet_filepath = directory / f"{name}.parquet"
+    if parquet_filepath.is_file():
+        return parquet_filepath
+    return directory / f"{name}.csv"
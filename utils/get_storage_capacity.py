@@ -19,8 +19,8 @@ def get_storage_capacity(output_directory, *, group=None, country_codes=None):
     # Get the storage capacity for each market node
     storage_capacity = {}
     for market_node in utils.get_market_nodes_for_countries(country_codes):
-        filepath = output_directory / "capacity" / "storage" / f"{market_node}.csv"
-        storage_capacity[market_node] = utils.read_csv(filepath, index_col=0)
+        filepath = utils.get_result_filepath(output_directory / "capacity" / "storage", market_node)
+        storage_capacity[market_node] = utils.read_dataframe(filepath, index_col=0)
 
     # Return a dictionary with the storage capacity per market node DataFrame if not grouped
     if group is None:
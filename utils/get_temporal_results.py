@@ -1,10 +1,8 @@
-import streamlit as st
-
 import utils
 import validate
 
 
-# Don't cache this, since the data is also cached when reading the CSV file, and it's a lot of data
+# Don't cache this, since the data is also cached when reading the CSV or Parquet file, and it's a lot of data
 def get_temporal_results(output_directory, *, group=None, country_codes=None):
     """
     Return the (grouped) temporal results
@@ -21,10 +19,13 @@ def get_temporal_results(output_directory, *, group=None, country_codes=None):
     # Get the temporal data for each market node
     temporal_results = {}
     for market_node in utils.get_market_nodes_for_countries(country_codes):
-        filepath = output_directory / "temporal" / "market_nodes" / f"{market_node}.csv"
+        filepath = utils.get_result_filepath(output_directory / "temporal" / "market_nodes", market_node)
         temporal_results[market_node] = utils.read_temporal_data(filepath)
 
+        # Streamlit is only imported for the warning, so the headless runners don't import it
         if temporal_results[market_node].isnull().values.any():
+            import streamlit as st
+
             st.warning(f"market node {market_node} contains NaN values")
 
     # Return all market nodes individually if not grouped
@@ -0,0 +1,21 @@
+import yaml
+
+import utils
+import validate
+
+
+def get_tuned_parameters(nonzero_count):
+    """
+    Return the Gurobi parameters that were tuned for models of the same size class, or an empty dictionary if no parameters were tuned for this size class
+    """
+    assert validate.is_integer(nonzero_count, min_value=0)
+
+    # Return an empty dictionary if no model has been tuned yet
+    filepath = utils.path("tuning", "parameters.yaml")
+    if not filepath.is_file():
+        return {}
+
+    # Don't use the cached YAML reader, so the parameters of a tuning run that just finished are used
+    with open(filepath) as f:
+        tuned_size_classes = yaml.load(f, Loader=yaml.SafeLoader) or {}
+    return tuned_size_classes.get(utils.get_model_size_class(nonzero_count), {}).get("parameters", {})
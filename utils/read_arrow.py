@@ -0,0 +1,23 @@
+import pandas as pd
+import pyarrow as pa
+
+import validate
+
+
+def read_arrow(filepath, *, start=None, end=None):
+    """
+    Memory-map an Arrow IPC file and return only the rows with a timestamp between start and end as DataFrame
+    """
+    assert validate.is_filepath(filepath, suffix=".arrow", existing=True)
+
+    # Memory-map the file, so only the rows that are converted are actually read from disk
+    with pa.memory_map(str(filepath), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    # Find the relevant rows based on the index column only
+    index_column_name = table.schema.pandas_metadata["index_columns"][0]
+    index = pd.DatetimeIndex(table.column(index_column_name).to_pandas())
+    rows = range(len(index))[index.slice_indexer(start, end)]
+
+    # Return the relevant rows as DataFrame
+    return table.slice(rows.start, len(rows)).to_pandas()
@@ -0,0 +1,13 @@
+import utils
+import validate
+
+
+def read_dataframe(filepath, **kwargs):
+    """
+    Read, cache, and return a CSV or Parquet file (the keyword arguments are only used for CSV files, since Parquet files store their own index)
+    """
+    assert validate.is_filepath(filepath, existing=True)
+
+    if filepath.suffix == ".parquet":
+        return utils.read_parquet(filepath)
+    return utils.read_csv(filepath, **kwargs)
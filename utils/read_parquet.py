@@ -0,0 +1,14 @@
+import pandas as pd
+
+import utils
+import validate
+
+
+@utils.cache
+def read_parquet(filepath, **kwargs):
+    """
+    Read, cache, and return a Parquet file
+    """
+    assert validate.is_filepath(filepath, suffix=".parquet", existing=True)
+
+    return pd.read_parquet(filepath, **kwargs)
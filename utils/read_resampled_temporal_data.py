@@ -0,0 +1,35 @@
+import utils
+import validate
+
+
+def _read_and_resample_temporal_data(filepath, *, start_year, end_year, resolution, header):
+    """
+    Read the temporal data, resample it to the resolution, and remove the leap days
+    """
+    temporal_data = utils.read_temporal_data(filepath, start_year=start_year, end_year=end_year, header=header)
+
+    # Calculate the interval length in hours of the original data
+    interval_length = (temporal_data.index[1] - temporal_data.index[0]).total_seconds() / 3600
+
+    # Resample the data and remove the leap days that could have been introduced by the resample method
+    temporal_data = temporal_data.resample(resolution).mean()
+    temporal_data = temporal_data[~((temporal_data.index.month == 2) & (temporal_data.index.day == 29))]
+
+    # Store the original interval length as attribute
+    temporal_data.attrs["interval_length"] = interval_length
+    return temporal_data
+
+
+def read_resampled_temporal_data(filepath, *, start_year, end_year, resolution, header=0):
+    """
+    Return the temporal data for the climate years resampled to the resolution without leap days, the original interval length in hours is stored in the 'interval_length' attribute
+    """
+    assert validate.is_filepath(filepath, suffix=".csv", existing=True)
+    assert validate.is_integer(start_year)
+    assert validate.is_integer(end_year)
+    assert validate.is_resolution(resolution)
+    assert validate.is_integer(header, min_value=0) or validate.is_list_like(header)
+
+    # Get the data from the disk cache, so it's only resampled once for each scope
+    parameters = {"filepath": filepath, "start_year": start_year, "end_year": end_year, "resolution": resolution, "header": header}
+    return utils.get_cached_input_data(lambda: _read_and_resample_temporal_data(filepath, start_year=start_year, end_year=end_year, resolution=resolution, header=header), parameters=parameters, source_filepaths=[filepath])
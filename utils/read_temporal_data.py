@@ -10,13 +10,23 @@ def read_temporal_data(filepath, *, start_year=None, end_year=None, timezone=Non
     """
     Returns the temporal data, if specified only for a specific date range
     """
-    assert validate.is_filepath(filepath, suffix=".csv", existing=True)
+    assert validate.is_filepath(filepath, suffix=".csv", existing=True) or validate.is_filepath(filepath, suffix=".parquet", existing=True)
     assert validate.is_integer(start_year, required=False)
     assert validate.is_integer(end_year, required=False)
     assert validate.is_string(timezone, required=False)
     assert validate.is_integer(header, min_value=0) or validate.is_list_like(header)
 
-    temporal_data = utils.read_csv(filepath, parse_dates=True, index_col=0, header=header)
+    # Parquet and Arrow files already store the timezone aware index and the column levels, so the header is only used for CSV files
+    arrow_filepath = filepath.with_suffix(".arrow")
+    if filepath.suffix == ".parquet":
+        temporal_data = utils.read_parquet(filepath)
+    elif arrow_filepath.is_file() and arrow_filepath.stat().st_mtime >= filepath.stat().st_mtime:
+        # Only read the relevant years from the preprocessed Arrow file (with an extra day on both sides, as the years are sliced again after the timezone is set)
+        start = f"{start_year - 1}-12-31" if start_year else None
+        end = f"{end_year + 1}-01-01" if end_year else None
+        temporal_data = utils.read_arrow(arrow_filepath, start=start, end=end)
+    else:
+        temporal_data = utils.read_csv(filepath, parse_dates=True, index_col=0, header=header)
 
     # Set the index to a UTC DatetimeIndex if it's not yet a DatetimeIndex
     if type(temporal_data.index) != pd.core.indexes.datetimes.DatetimeIndex:
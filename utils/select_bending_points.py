@@ -0,0 +1,31 @@
+import numpy as np
+
+import validate
+
+
+def select_bending_points(points, *, count, required_points=None):
+    """
+    Select the points where a curve bends, by repeatedly adding the point that is furthest from the straight lines between the selected points (the first, last, and required points are always selected)
+    """
+    assert validate.is_dataframe(points)
+    assert validate.is_integer(count, min_value=2)
+    assert validate.is_list_like(required_points, required=False)
+
+    # Sort the points along the curve and scale each column to the same range, so the distance is not determined by a single column
+    points = points.sort_index()
+    scaled_points = (points - points.min()) / (points.max() - points.min()).replace(0, 1)
+
+    # Start with the first, last, and required points
+    selected_points = {points.index[0], points.index[-1]} | set(required_points or [])
+    while len(selected_points) < min(count, len(points)):
+        # Calculate the distance of each point to the straight lines between the selected points
+        selected_index = sorted(selected_points)
+        interpolated_points = scaled_points.loc[selected_index].reindex(scaled_points.index).interpolate(method="index")
+        distances = np.sqrt(((scaled_points - interpolated_points) ** 2).sum(axis=1)).drop(selected_index)
+
+        # Stop if all remaining points are on the straight lines, otherwise add the furthest point
+        if distances.max() <= 0:
+            break
+        selected_points.add(distances.idxmax())
+
+    return sorted(selected_points)
@@ -0,0 +1,16 @@
+import pyarrow as pa
+
+import validate
+
+
+def write_arrow(filepath, data):
+    """
+    Store a DataFrame as uncompressed Arrow IPC file, so it can be memory-mapped when it's read
+    """
+    assert validate.is_filepath(filepath, suffix=".arrow")
+    assert validate.is_dataframe(data)
+
+    table = pa.Table.from_pandas(data)
+    with pa.OSFile(str(filepath), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
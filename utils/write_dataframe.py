@@ -0,0 +1,22 @@
+import pandas as pd
+
+import validate
+
+
+def write_dataframe(filepath, data):
+    """
+    Store a DataFrame as CSV or compressed Parquet file, depending on the suffix of the filepath
+    """
+    assert validate.is_filepath(filepath)
+    assert validate.is_dataframe(data)
+
+    # Store the data as CSV file if no Parquet file is requested
+    if filepath.suffix != ".parquet":
+        data.to_csv(filepath)
+        return
+
+    # Parquet files can't restore empty MultiIndex columns, so store them as regular empty columns
+    if data.columns.empty and isinstance(data.columns, pd.MultiIndex):
+        data = data.set_axis(pd.Index([]), axis=1)
+
+    data.to_parquet(filepath, compression="zstd")
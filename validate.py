@@ -7,8 +7,6 @@ import numpy as np
 import pandas as pd
 import shapely
 
-import chart
-
 
 def is_market_node(value, *, required=True):
     if value is None:
@@ -55,6 +53,9 @@ def is_chart(value, *, required=True):
     if value is None:
         return not required
 
+    # The charts are only imported when they are validated, because they import Streamlit
+    import chart
+
     return isinstance(value, chart.Chart)
 
 